@@ -2,9 +2,20 @@
 from config import SYSTEM_PROMPT_TEMPLATE, THRESHOLDS
 from llm_client import LLMClient
 from planner import Planner
+from task_assignment import decision_for_task
+from phase_timer import phase
+import server_logging
+import server_metrics
+from plan_stream import build_plan, project_state
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import os
 import re
 
+# 快速路径规则：eat（饥饿危急且有食物）、single_task（只有一个可执行任务）、idle（没有任务时等待）
+FAST_PATH_RULES = ("eat", "single_task", "idle")
+FAST_PATH_WAIT_MINUTES = 10
+
 
 def _llm_visible_task_source() -> str:
     # all | perceiver
@@ -12,7 +23,69 @@ def _llm_visible_task_source() -> str:
 
 
 def _is_perceiver_task(task) -> bool:
-    return str(getattr(task, "source", "")).strip().lower() == "perceiver"
+    return str(task.source or "").strip().lower() == "perceiver"
+
+
+def _fast_path_rules() -> set:
+    """
+    RIMSPACE_FAST_PATH=1|all 启用全部规则，也可以逗号分隔指定部分规则（如 "eat,idle"）；默认关闭
+    """
+    raw = os.environ.get("RIMSPACE_FAST_PATH", "0").strip().lower()
+    if raw in {"", "0", "false", "no", "off"}:
+        return set()
+    if raw in {"1", "true", "yes", "on", "all"}:
+        return set(FAST_PATH_RULES)
+    return {r.strip() for r in raw.split(",") if r.strip() in FAST_PATH_RULES}
+
+
+# 预取允许的偏差：饥饿/疲劳欲望值差异与各设施库存总差异
+PREFETCH_DESIRE_TOLERANCE = 10
+PREFETCH_INVENTORY_TOLERANCE = 2
+_prefetch_executor = None
+
+
+def _prefetch_threshold() -> int:
+    """剩余队列长度降到该值时开始预取下一次 LLM 决策；0（默认）表示不预取"""
+    try:
+        return max(0, int(os.environ.get("RIMSPACE_PREFETCH_QUEUE", "0")))
+    except ValueError:
+        return 0
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-prefetch")
+    return _prefetch_executor
+
+
+def _decision_fingerprint(agent, char_data, environment_data):
+    stats = char_data.get("CharacterStats", {})
+    inventory = {}
+    for actor in environment_data.get("Actors", []):
+        inv = actor.get("Inventory", {}) if isinstance(actor, dict) else {}
+        for item_id, count in (inv.items() if isinstance(inv, dict) else []):
+            if isinstance(count, int) and count:
+                inventory[(actor.get("ActorName"), str(item_id))] = count
+    return {
+        "location": char_data.get("CurrentLocation"),
+        "hunger": max(0, 100 - stats.get("Hunger", 100)),
+        "exhaustion": max(0, 100 - stats.get("Energy", 100)),
+        "tasks": frozenset(t.task_id for t in agent._get_visible_tasks(char_data, environment_data)),
+        "inventory": inventory,
+    }
+
+
+def _fingerprints_match(expected, actual) -> bool:
+    if expected["location"] != actual["location"] or expected["tasks"] != actual["tasks"]:
+        return False
+    if abs(expected["hunger"] - actual["hunger"]) > PREFETCH_DESIRE_TOLERANCE:
+        return False
+    if abs(expected["exhaustion"] - actual["exhaustion"]) > PREFETCH_DESIRE_TOLERANCE:
+        return False
+    keys = set(expected["inventory"]) | set(actual["inventory"])
+    drift = sum(abs(expected["inventory"].get(k, 0) - actual["inventory"].get(k, 0)) for k in keys)
+    return drift <= PREFETCH_INVENTORY_TOLERANCE
 
 
 def _is_no_blackboard_mode() -> bool:
@@ -56,6 +129,56 @@ def _normalize_skill_name(skill_name: str) -> str:
         return s
     return f"can{s}"
 
+def _match_decision_task(command_type, decision_json, tasks):
+    """找出 LLM 决策对应的黑板任务（用于认领），找不到时返回 None"""
+    target = str(decision_json.get("target_name") or "").strip()
+    if command_type == "Transport":
+        item_id = str(decision_json.get("item_id") or "")
+        candidates = [t for t in tasks if t.item_id is not None and str(t.item_id) == item_id and t.source]
+        exact = next(
+            (t for t in candidates
+             if t.source == target and t.destination == decision_json.get("aux_name")),
+            None,
+        )
+        # 只认领起点 / 终点都与决策一致的任务，避免占住其他角色应执行的同物品搬运任务
+        return exact
+    if not target:
+        return None
+    if command_type in {"Plant", "Harvest"}:
+        return next(
+            (t for t in tasks if t.description.startswith(command_type) and t.description.endswith(f" {target}")),
+            None,
+        )
+    if command_type == "Craft":
+        patterns = (f"Craft {target} ", f"Produce {target}", f"× {target} ")
+        return next((t for t in tasks if any(p in t.description for p in patterns)), None)
+    return None
+
+
+class PendingDecision:
+    """
+    决策前半段的结果：要么是可直接下发的指令，要么是待发送给 LLM 的 Prompt。
+    prefetch 为仍然有效的预取请求（Future），此时直接等待其结果而不再重新请求。
+    source 为决策来源（queue / assignment / fast_path / prefetch / llm），用于运行指标。
+    """
+    def __init__(self, command=None, system_prompt="", user_context="", prefetch=None, source="llm"):
+        self.command = command
+        self.system_prompt = system_prompt
+        self.user_context = user_context
+        self.prefetch = prefetch
+        self.source = source
+
+    def query(self, llm):
+        """在共享状态锁之外调用：取预取结果，预取失败时退回普通请求"""
+        if self.prefetch is not None:
+            try:
+                return self.prefetch.result()
+            except Exception as e:
+                server_logging.log(f"[LLM Prefetch] 预取失败，重新请求: {e}", logging.WARNING)
+        server_metrics.inc("rimspace_llm_calls_total", kind="sync")
+        return llm.query(self.system_prompt, self.user_context)
+
+
 class RimSpaceAgent:
     def __init__(self, name, profession, blackboard_instance):
         self.name = name
@@ -68,6 +191,8 @@ class RimSpaceAgent:
         self.action_queue = []
         self.feedback_buffer = ""
         self.last_decision_context = {}  # 存储上一次LLM决策的上下文
+        # 预取中的下一次 LLM 决策：(Future, 预计状态指纹)，仅在当前进程内有效
+        self._prefetch = None
         
         # 内部 D2A 状态 (0-100)
         self.desires = {
@@ -76,30 +201,39 @@ class RimSpaceAgent:
             "duty": 0
         }
 
-    def update_state(self, char_data, environment_data):
+    def compute_desires(self, char_data, environment_data):
         """
-        核心步骤：将游戏数据映射为 D2A 欲望值
+        将游戏数据映射为 D2A 欲望值（只计算，不修改 Agent 状态）
         """
+        desires = {}
         # 1. 映射生理欲望
         # 假设游戏里 Energy 是 100-0 (100最精神)，我们需要反转为 Exhaustion 0-100 (100最累)
         game_energy = char_data.get("CharacterStats", {}).get("Energy", 100)
-        self.desires["exhaustion"] = max(0, 100 - game_energy)
+        desires["exhaustion"] = max(0, 100 - game_energy)
         
         # 假设游戏里 Hunger 是 0-100 (100最饱)，我们需要反转为 Hunger Desire 0-100 (100最饿)
         game_food = char_data.get("CharacterStats", {}).get("Hunger", 100)
-        self.desires["hunger"] = max(0, 100 - game_food)
+        desires["hunger"] = max(0, 100 - game_food)
 
         # 2. 映射社会欲望 (Sense of Duty)
         # 简单逻辑：每个任务增加 20 点压力
         task_count = len(self._get_visible_tasks(char_data, environment_data))
-        self.desires["duty"] = min(100, task_count * 20)
+        desires["duty"] = min(100, task_count * 20)
+        return desires
+
+    def update_state(self, char_data, environment_data):
+        """
+        核心步骤：将游戏数据映射为 D2A 欲望值
+        """
+        self.desires.update(self.compute_desires(char_data, environment_data))
         #print(f"[状态更新] {self.name} - Hunger: {self.desires['hunger']}, Exhaustion: {self.desires['exhaustion']}, Duty: {self.desires['duty']}")
 
-    def generate_observation_text(self, char_data, environment_data):
-        """生成给 LLM 看的自然语言描述"""
-        h = self.desires["hunger"]
-        e = self.desires["exhaustion"]
-        d = self.desires["duty"]
+    def generate_observation_text(self, char_data, environment_data, desires=None):
+        """生成给 LLM 看的自然语言描述；desires 缺省为 Agent 当前的欲望值"""
+        desires = desires if desires is not None else self.desires
+        h = desires["hunger"]
+        e = desires["exhaustion"]
+        d = desires["duty"]
         
         status_text = f"""
         [Current Desires]
@@ -363,15 +497,12 @@ class RimSpaceAgent:
         desc = task.description
         
         # 补充参数信息 (Transport 任务)
-        if "Transport" in desc and hasattr(task, "item_id"):
-            item_id = getattr(task, "item_id", "")
-            count = getattr(task, "count", "")
-            source = getattr(task, "source", "")
-            destination = getattr(task, "destination", "")
-            desc += f" [item_id={item_id}, count={count}, source={source}, destination={destination}]"
+        if "Transport" in desc and task.item_id is not None:
+            count = "" if task.count is None else task.count
+            desc += f" [item_id={task.item_id}, count={count}, source={task.source or ''}, destination={task.destination or ''}]"
         
         # 补充前置条件信息
-        if hasattr(task, "preconditions") and task.preconditions and environment_data:
+        if task.preconditions and environment_data:
             unmet_conditions = []
             for cond in task.preconditions:
                 wrapped_env = {"Environment": environment_data} if "Environment" not in environment_data else environment_data
@@ -383,19 +514,51 @@ class RimSpaceAgent:
                 desc += f" [Preconditions-Unmet: {', '.join(unmet_conditions)}]"
             else:
                 desc += " [Preconditions-OK]"
-        elif hasattr(task, "preconditions") and task.preconditions:
+        elif task.preconditions:
             desc += f" [Preconditions: {len(task.preconditions)} items]"
         
         return desc
 
     def _get_visible_tasks(self, char_data, environment_data):
-        tasks = self.blackboard.get_executable_tasks(char_data, environment_data)
-        if _llm_visible_task_source() == "perceiver":
-            tasks = [t for t in tasks if _is_perceiver_task(t)]
+        with phase("tasks"):
+            tasks = self.blackboard.get_executable_tasks(char_data, environment_data)
+            if _llm_visible_task_source() == "perceiver":
+                tasks = [t for t in tasks if _is_perceiver_task(t)]
         return tasks
 
+    def export_state(self):
+        """导出可变决策状态（动作队列等），供共享状态后端持久化"""
+        return {
+            "action_queue": self.action_queue,
+            "feedback_buffer": self.feedback_buffer,
+            "last_decision_context": self.last_decision_context,
+            "desires": self.desires,
+        }
+
+    def load_state(self, state):
+        """从共享状态后端恢复可变决策状态"""
+        self.action_queue = state.get("action_queue", [])
+        self.feedback_buffer = state.get("feedback_buffer", "")
+        self.last_decision_context = state.get("last_decision_context", {})
+        self.desires = state.get("desires", self.desires)
+
     def make_decision(self, char_data, environment_data):
         """主决策循环"""
+        pending = self.prepare_decision(char_data, environment_data)
+        if pending.command is not None:
+            return pending.command
+
+        # 3. 调用 LLM
+        # print(f"[{self.name}] Thinking...")
+        response_str = pending.query(self.llm)
+        return self.complete_decision(char_data, environment_data, response_str)
+
+    def prepare_decision(self, char_data, environment_data, assigned_decision=None):
+        """
+        决策前半段：更新状态并消费动作队列；队列为空时构建 Prompt。
+        LLM 调用不在此处进行，服务器可以在释放共享状态锁后再调用 LLM。
+        :param assigned_decision: 集中任务分配给出的决策（与 LLM 输出同格式），给出时直接规划，不构建 Prompt
+        """
         
         # 0. 始终先更新状态 (确保每一帧的状态都是最新的，即使在执行队列中)
         self.update_state(char_data, environment_data)
@@ -414,25 +577,102 @@ class RimSpaceAgent:
             # [优化] 添加剩余步数信息 (可选)
             next_cmd["RemainingSteps"] = len(self.action_queue)
 
+            threshold = _prefetch_threshold()
+            if threshold and self._prefetch is None and len(self.action_queue) <= threshold:
+                self._start_prefetch(char_data, environment_data, [next_cmd] + self.action_queue)
+
             # print(f"[{self.name}] Executing queued action: {next_cmd.get('CommandType')} (Left: {len(self.action_queue)})")
             # print(f"[{self.name}] Remaining action_queue: {self.action_queue}")
-            return next_cmd
+            return PendingDecision(command=next_cmd, source="queue")
+
+        # 上一个计划已执行完毕，释放其认领的任务
+        self.blackboard.release_claims(self.name)
+
+        prefetch, self._prefetch = self._prefetch, None
+
+        if assigned_decision is not None:
+            assigned_decision.setdefault("decision_source", "assignment")
+            return PendingDecision(command=self.apply_decision(char_data, environment_data, assigned_decision), source="assignment")
+
+        fast_decision = self._fast_path_decision(char_data, environment_data)
+        if fast_decision is not None:
+            return PendingDecision(command=self.apply_decision(char_data, environment_data, fast_decision), source="fast_path")
+
+        if prefetch is not None:
+            future, expected = prefetch
+            if _fingerprints_match(expected, _decision_fingerprint(self, char_data, environment_data)):
+                server_metrics.inc("rimspace_prefetch_total", result="hit")
+                return PendingDecision(prefetch=future, source="prefetch")
+            server_metrics.inc("rimspace_prefetch_total", result="stale")
+            server_logging.log(f"[LLM Prefetch] {self.name} 的世界状态已偏离预期，丢弃预取结果")
 
         # 2. 构建 Prompt
-        specific_profile = self.load_profile(self.profession)
-        world_state = self.generate_world_state(environment_data)
-        system_prompt = SYSTEM_PROMPT_TEMPLATE.format(
-            profession=self.profession,
-            name=self.name,
-            specific_profile=specific_profile,
-            world_state=world_state
-        )
-        user_context = self.generate_observation_text(char_data, environment_data)
-        
-        # 3. 调用 LLM
-        # print(f"[{self.name}] Thinking...")
-        response_str = self.llm.query(system_prompt, user_context)
+        return self._build_prompts(char_data, environment_data)
+
+    def _build_prompts(self, char_data, environment_data, desires=None):
+        with phase("prompt"):
+            specific_profile = self.load_profile(self.profession)
+            world_state = self.generate_world_state(environment_data)
+            system_prompt = SYSTEM_PROMPT_TEMPLATE.format(
+                profession=self.profession,
+                name=self.name,
+                specific_profile=specific_profile,
+                world_state=world_state
+            )
+            user_context = self.generate_observation_text(char_data, environment_data, desires)
+        server_metrics.observe("rimspace_prompt_chars", len(system_prompt) + len(user_context))
+        return PendingDecision(system_prompt=system_prompt, user_context=user_context)
+
+    def _start_prefetch(self, char_data, environment_data, remaining_commands):
+        """
+        按计划执行完后的预计状态提前构建 Prompt，并在后台线程中请求 LLM。
+        预计状态的欲望值单独计算，不修改 Agent 当前的 desires。
+        有未消费的 Planner 反馈时不预取，避免反馈被预取的 Prompt 提前清空。
+        """
+        if self.feedback_buffer:
+            return
+        projected_char, projected_env = project_state(char_data, environment_data, remaining_commands)
+        projected_desires = self.compute_desires(projected_char, projected_env)
+        pending = self._build_prompts(projected_char, projected_env, projected_desires)
+        expected = _decision_fingerprint(self, projected_char, projected_env)
+        server_metrics.inc("rimspace_llm_calls_total", kind="prefetch")
+        future = _get_prefetch_executor().submit(self.llm.query, pending.system_prompt, pending.user_context)
+        self._prefetch = (future, expected)
+
+    def take_plan(self, first_cmd, char_data, environment_data):
+        """
+        整段计划下发：把首条指令与动作队列中的剩余指令一起附上前置条件交给客户端，
+        并清空动作队列（之后由客户端在本地执行，执行完毕或失败时再回调）。
+        """
+        commands = [first_cmd]
+        for cmd in self.action_queue:
+            step = dict(cmd)
+            step["CharacterName"] = self.name
+            step.setdefault("Decision", self.last_decision_context)
+            commands.append(step)
+        self.action_queue = []
+        return build_plan(commands, char_data, environment_data)
+
+    def report_plan_status(self, plan_status):
+        """处理客户端回调的计划执行结果；失败时释放认领的任务并把原因反馈给下一次决策"""
+        if not isinstance(plan_status, dict):
+            return
+        if str(plan_status.get("Status", "")).strip().lower() != "failed":
+            return
+        self.action_queue = []
+        self.blackboard.release_claims(self.name, failed=True)
+        command_type = plan_status.get("CommandType", "Plan")
+        reason = plan_status.get("Reason") or "Precondition not met."
+        self.feedback_buffer = f"Last Action '{command_type}' Failed: {reason}"
+
+    def complete_decision(self, char_data, environment_data, response_str):
+        """决策后半段：解析 LLM 输出并交给 Planner 生成动作序列"""
         decision_json = self.llm.parse_json_response(response_str)
+        decision_json["decision_source"] = "llm"
+        return self.apply_decision(char_data, environment_data, decision_json)
+
+    def apply_decision(self, char_data, environment_data, decision_json):
+        """把高层决策（LLM 输出或任务分配结果）交给 Planner，返回第一条指令"""
         
         # [修正] 安全获取 command，防止 None
         command_type = decision_json.get("command", "Wait") # 默认为 Wait
@@ -462,7 +702,7 @@ class RimSpaceAgent:
             relevant_tasks = self.blackboard.get_executable_tasks(char_data, environment_data)
             transport_task = next((t for t in relevant_tasks if "Transport" in t.description), None)
             
-            if transport_task and hasattr(transport_task, 'item_id'):
+            if transport_task and transport_task.item_id is not None:
                 # 仅补缺，不覆盖 LLM 已给出的参数
                 if decision_json.get("item_id") in (None, "", 0):
                     decision_json["item_id"] = transport_task.item_id
@@ -470,12 +710,25 @@ class RimSpaceAgent:
                     decision_json["target_name"] = transport_task.source
                 if not decision_json.get("aux_name"):
                     decision_json["aux_name"] = transport_task.destination
+                if decision_json.get("count") in (None, "", 0) and transport_task.count:
+                    decision_json["count"] = transport_task.count
+
+        carry_capacity = self.planner.free_carry_capacity(char_data)
+        if carry_capacity is not None:
+            decision_json["carry_capacity"] = carry_capacity
         
-        plan_result = self.planner.generate_plan(self.name, command_type, decision_json, environment_data)
+        with phase("plan"):
+            plan_result = self.planner.generate_plan(self.name, command_type, decision_json, environment_data)
         
         if plan_result.success:
             # 规划成功
             self.action_queue = plan_result.plan
+
+            # 认领对应的黑板任务，避免其他角色同时执行同一任务
+            candidates = self.blackboard.get_executable_tasks(char_data, environment_data)
+            claimed = _match_decision_task(command_type, decision_json, candidates)
+            if claimed is not None:
+                self.blackboard.claim_task(claimed, self.name)
             
             # [修正] 保存当前的决策上下文，供队列中后续动作使用
             self.last_decision_context = decision_json
@@ -500,6 +753,7 @@ class RimSpaceAgent:
         else:
             # 规划失败（如资源不足，Planner已自动发布任务）
             # print(f"[{self.name}] Plan Failed: {plan_result.feedback}")
+            self.blackboard.release_claims(self.name, failed=True)
             formatted_feedback = _format_failure_feedback_for_mode(plan_result.feedback)
             guidance = self._build_missing_resource_guidance(formatted_feedback, char_data)
             if guidance:
@@ -523,6 +777,42 @@ class RimSpaceAgent:
                 "RemainingSteps": 0
             }
     
+    def _fast_path_decision(self, char_data, environment_data):
+        """
+        结果确定的状态直接给出决策，不调用 LLM；无法确定时返回 None。
+        决策带有 decision_source="fast_path"，日志与消融统计可据此区分。
+        """
+        rules = _fast_path_rules()
+        if not rules:
+            return None
+
+        hungry = self.desires["hunger"] > 70
+        tired = self.desires["exhaustion"] > 70
+
+        if "eat" in rules and hungry:
+            # 与 _plan_eat 使用同一判定：只有存储中有食物时 Eat 才能规划成功
+            if self.planner.find_food_source(environment_data):
+                return {"thought": "[Fast Path] Hunger is critical and food is available.",
+                        "command": "Eat", "target_name": "", "decision_source": "fast_path"}
+
+        # 饥饿/疲劳时的取舍（例如没有食物时先睡觉还是继续干活）交给 LLM
+        if hungry or tired:
+            return None
+
+        tasks = self._get_visible_tasks(char_data, environment_data)
+        if "single_task" in rules and len(tasks) == 1:
+            decision = decision_for_task(tasks[0], self.planner)
+            if decision is not None:
+                decision["thought"] = f"[Fast Path] Only executable task: {tasks[0].description}"
+                decision["decision_source"] = "fast_path"
+                return decision
+
+        if "idle" in rules and not tasks:
+            return {"thought": "[Fast Path] No executable tasks on the blackboard.",
+                    "command": "Wait", "target_name": "", "minutes": FAST_PATH_WAIT_MINUTES,
+                    "decision_source": "fast_path"}
+        return None
+
     def load_profile(self, profession):
         """从文档库加载特定职业的背景故事"""
         # 构建文件路径: LLMServerNew/../文档/profile_{profession}.txt
@@ -0,0 +1,227 @@
+'''
+黑板伸缩性基准
+用 10 ~ 10000 个合成任务填充黑板，测量 post_task（新任务 / 重复目标）、update 与
+get_executable_tasks 随任务数量增长的单次耗时，以及每个任务占用的内存与 update / 筛选的峰值内存。
+任务目标覆盖几种典型形状：Global 库存汇总、前缀匹配的培养舱、精确设施、嵌套键（"1001.count"）。
+
+耗时与内存分两遍测量（tracemalloc 会显著拖慢执行），结果写入 JSON，
+修改黑板数据结构前后各跑一次，用 --compare 对比。
+
+用法:
+  python benchmark_blackboard.py --sizes 10,100,1000,10000 --output ../Log/bb_bench.json
+  python benchmark_blackboard.py --sizes 10,100,1000 --compare ../Log/bb_bench.json
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from benchmark_server import build_synthetic_world
+from blackboard import Blackboard, BlackboardTask, Goal, TaskStatus
+
+GOAL_SHAPES = ("global", "prefix", "exact", "nested")
+_SKILLS = ("CanFarm", "CanCraft", "CanCook", None)
+
+
+def build_world(scale: int) -> Dict:
+    """benchmark_server 的合成世界，额外加入带嵌套字典属性的货架（用于嵌套键目标）"""
+    world = build_synthetic_world(scale)
+    actors = world["Environment"]["Actors"]
+    for i in range(1, scale + 1):
+        actors.append({
+            "ActorName": f"Shelf_{i}",
+            "ActorType": "EInteractionType::EAT_Storage",
+            "Inventory": {},
+            "Stock": {"1001": {"count": 3}, "2003": {"count": 1}},
+        })
+    world["GameTime"] = "Day 1  08:00"
+    return world
+
+
+def make_task(index: int, rng: random.Random, scale: int) -> BlackboardTask:
+    """第 index 个合成任务；目标值取得足够大，保证 update 不会把任务移除"""
+    shape = GOAL_SHAPES[index % len(GOAL_SHAPES)]
+    target = 1000 + index
+    if shape == "global":
+        goal = Goal("Global", "Inventory", rng.choice(("1001", "1002", "2003")), ">=", target)
+    elif shape == "prefix":
+        goal = Goal("CultivateChamber", "CultivateInfo", "GrowthProgress", ">=", target)
+    elif shape == "exact":
+        goal = Goal(f"Storage_{rng.randint(1, scale)}", "Inventory", "1001", ">=", target)
+    else:
+        goal = Goal(f"Shelf_{rng.randint(1, scale)}", "Stock", "1001.count", ">=", target)
+    preconditions = []
+    if index % 3 == 0:
+        preconditions.append(Goal("Global", "Inventory", "1001", ">=", 1))
+    task = BlackboardTask(
+        f"Synthetic {shape} task #{index}",
+        goal,
+        preconditions=preconditions,
+        priority=1 + index % 5,
+        required_skill=_SKILLS[index % len(_SKILLS)],
+    )
+    if index % 10 == 0:
+        # 一部分任务处于他人认领中，覆盖 is_claimed_by_other 分支
+        task.status = TaskStatus.IN_PROGRESS
+        task.claimed_by = "Other"
+    return task
+
+
+def _timed(fn: Callable[[], None], repeat: int) -> float:
+    """执行 repeat 次，返回单次平均毫秒"""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / max(1, repeat)
+
+
+def _peak_kib(fn: Callable[[], None]) -> float:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base) / 1024.0
+
+
+def run_size(size: int, world_scale: int, cycles: int, measure_memory: bool, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    world = build_world(world_scale)
+    environment = world["Environment"]
+    characters = world["Characters"]["Characters"]
+    tasks = [make_task(i, rng, world_scale) for i in range(size)]
+    # 同一随机种子重新生成一遍，得到目标完全相同的重复任务
+    rng_dup = random.Random(seed)
+    duplicates = [make_task(i, rng_dup, world_scale) for i in range(size)]
+
+    bb = Blackboard()
+    results: List[Tuple[str, float, int]] = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        for task in tasks:
+            bb.post_task(task)
+        results.append(("post_task_new", (time.perf_counter() - t0) * 1000.0 / max(1, size), size))
+
+        # 与已有任务目标相同：沿用原任务并刷新字段
+        t0 = time.perf_counter()
+        for task in duplicates:
+            bb.post_task(task)
+        results.append(("post_task_duplicate", (time.perf_counter() - t0) * 1000.0 / max(1, size), size))
+        assert len(bb.tasks) == size, "synthetic goals must be unique"
+
+        results.append(("update", _timed(lambda: bb.update(world), cycles), cycles))
+
+        def filter_all():
+            for char in characters:
+                bb.get_executable_tasks(char, environment)
+        per_agent = _timed(filter_all, cycles) / max(1, len(characters))
+        results.append(("get_executable_tasks", per_agent, cycles * len(characters)))
+
+    memory: Dict[str, float] = {}
+    if measure_memory:
+        # 单独一遍测内存：这里只构造任务并直接挂到黑板上，不受 post_task 去重扫描影响
+        def build():
+            fresh = Blackboard()
+            rng_mem = random.Random(seed)
+            fresh.tasks = [make_task(i, rng_mem, world_scale) for i in range(size)]
+            memory["_keep"] = fresh  # 保留引用，峰值即为保留内存
+        with contextlib.redirect_stdout(io.StringIO()):
+            memory["bytes_per_task"] = _peak_kib(build) * 1024.0 / max(1, size)
+            memory.pop("_keep", None)
+            memory["update"] = _peak_kib(lambda: bb.update(world))
+            memory["get_executable_tasks"] = _peak_kib(lambda: bb.get_executable_tasks(characters[0], environment))
+
+    rows = []
+    for op, ms, n in results:
+        row = {"size": size, "op": op, "ms_per_op": ms, "ops": n}
+        if op in ("update", "get_executable_tasks") and op in memory:
+            row["peak_kib"] = memory[op]
+        if op == "post_task_new" and "bytes_per_task" in memory:
+            row["bytes_per_task"] = memory["bytes_per_task"]
+        rows.append(row)
+    return rows
+
+
+def _print_row(row: Dict) -> None:
+    extra = ""
+    if "bytes_per_task" in row:
+        extra = f" mem={row['bytes_per_task']:.0f} B/task"
+    elif "peak_kib" in row:
+        extra = f" peak={row['peak_kib']:.1f} KiB"
+    print(f"[BBBench] size={row['size']:<6d} {row['op']:<22s} {row['ms_per_op'] * 1000.0:12.2f} us/op{extra}", flush=True)
+
+
+def compare_results(baseline: Dict, current: Dict, tolerance: float) -> List[str]:
+    """按 (任务数, 操作) 对比单次耗时，返回超出容差的退化描述"""
+    regressions = []
+    base = {(r["size"], r["op"]): r for r in baseline.get("results", [])}
+    for row in current.get("results", []):
+        ref = base.get((row["size"], row["op"]))
+        if ref is None:
+            continue
+        ratio = row["ms_per_op"] / max(ref["ms_per_op"], 1e-9)
+        print(f"[BBBench] size={row['size']:<6d} {row['op']:<22s} x{ratio:.2f}", flush=True)
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"size={row['size']} {row['op']}: x{ratio:.2f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure how Blackboard operations scale with the number of tasks.")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated task counts")
+    parser.add_argument("--world-scale", type=int, default=8, help="Synthetic world scale (see benchmark_server.py)")
+    parser.add_argument("--cycles", type=int, default=20, help="update / filtering cycles per size")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", default="", help="Write results JSON to this path")
+    parser.add_argument("--compare", default="", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before --compare fails")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = []
+    for size in sizes:
+        rows = run_size(size, args.world_scale, args.cycles, not args.no_memory, args.seed)
+        for row in rows:
+            _print_row(row)
+        results.extend(rows)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "world_scale": args.world_scale,
+            "cycles": args.cycles,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BBBench] results written to {args.output}", flush=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f"[BBBench] REGRESSION {line}", flush=True)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
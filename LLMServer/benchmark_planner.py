@@ -0,0 +1,205 @@
+'''
+Planner 吞吐基准：合成的深层配方图
+generate_catalog() 按层生成 Item.json / Task.json 格式的合成配方：
+第 0 层是种植原料（CultivateChamber），第 1..depth 层每个配方需要 branching 种下一层原料；
+shared 为子原料的共享比例（0 = 纯树形，越大则越多配方共用同一个中间件）。
+
+基准对每组 (depth, branching, shared) 分别计时：
+- analyze_and_post_crafting_task  顶层配方下单（首次 / 黑板已有任务时重复调用）
+- ensure_min_stock                顶层产品保底库存
+- _plan_craft                     制作顶层产品（原料缺失，触发系统补货）
+并报告发布到黑板的任务数。世界中仓库默认为空（最坏情况：整条供应链都要铺开）。
+
+用法:
+  python benchmark_planner.py --depths 2,4,6 --branching 2,3 --shared 0,0.5
+  python benchmark_planner.py --write-catalog ../Log/synth_catalog --depths 5 --branching 3 --shared 0.3
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from benchmark_server import build_synthetic_world
+from blackboard import Blackboard
+from game_data_manager import GameDataManager
+from planner import Planner
+
+_ID_STRIDE = 10000
+
+
+def generate_catalog(depth: int, branching: int, shared: float = 0.0, roots: int = 1,
+                     max_count: int = 2, seed: int = 7) -> Tuple[List[Dict], List[Dict]]:
+    """返回 (items, tasks)，格式与 Data/Item.json、Data/Task.json 相同；顶层产品在 items 末尾"""
+    rng = random.Random(seed)
+    widths = [max(1, roots)]
+    for _ in range(depth):
+        wanted = widths[-1] * branching * (1.0 - shared)
+        widths.append(max(branching, int(math.ceil(wanted))))
+    widths.reverse()  # widths[0] 为原料层
+
+    items: List[Dict] = []
+    tasks: List[Dict] = []
+    layers: List[List[int]] = []
+    for layer, width in enumerate(widths):
+        ids = []
+        for index in range(width):
+            item_id = (layer + 1) * _ID_STRIDE + index
+            name = f"SynthL{layer}_{index}"
+            items.append({
+                "ItemID": item_id,
+                "ItemName": name,
+                "DisplayName": name,
+                "SpaceCost": 1,
+                "IsFood": False,
+            })
+            if layer == 0:
+                ingredients = []
+            else:
+                lower = layers[layer - 1]
+                # 依次取下一层的原料，保证每个中间件至少被用到一次；共享比例越大，相邻配方重叠越多
+                start = index * max(1, int(round(branching * (1.0 - shared))))
+                picks = [lower[(start + k) % len(lower)] for k in range(branching)]
+                ingredients = [{"ItemID": sub, "Count": rng.randint(1, max_count)} for sub in dict.fromkeys(picks)]
+            tasks.append({
+                "TaskID": item_id,
+                "TaskName": name,
+                "ProductID": item_id,
+                "TaskWorkLoad": 10 * (layer + 1),
+                "Ingredients": ingredients,
+                "RequiredFacility": "CultivateChamber" if layer == 0 else "WorkStation",
+                "RequiredSkill": {"CanFarm" if layer == 0 else "CanCraft": True},
+            })
+            ids.append(item_id)
+        layers.append(ids)
+    return items, tasks
+
+
+def write_catalog(out_dir: str, items: List[Dict], tasks: List[Dict]) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "Item.json"), "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False, indent=4)
+    with open(os.path.join(out_dir, "Task.json"), "w", encoding="utf-8") as f:
+        json.dump(tasks, f, ensure_ascii=False, indent=4)
+
+
+def _median_ms(fn: Callable[[], None], repeat: int) -> float:
+    samples = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def run_case(depth: int, branching: int, shared: float, repeat: int, world_scale: int, seed: int) -> List[Dict]:
+    items, tasks = generate_catalog(depth, branching, shared, seed=seed)
+    game_data = GameDataManager.from_catalog(items, tasks)
+    environment = build_synthetic_world(world_scale)["Environment"]
+    top = items[-1]
+    top_id = str(top["ItemID"])
+    char_params = {"target_name": top["ItemName"], "current_location": "None"}
+
+    rows = []
+
+    def measure(op: str, fn: Callable[[Planner], None], warm: bool = False):
+        posted = []
+
+        def once():
+            planner = Planner(Blackboard(), game_data=game_data)
+            if warm:
+                fn(planner)
+            t0 = time.perf_counter()
+            fn(planner)
+            elapsed = (time.perf_counter() - t0) * 1000.0
+            posted.append(len(planner.blackboard.tasks))
+            return elapsed
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            samples = sorted(once() for _ in range(max(1, repeat)))
+        rows.append({
+            "depth": depth,
+            "branching": branching,
+            "shared": shared,
+            "recipes": len(tasks),
+            "op": op,
+            "ms": samples[len(samples) // 2],
+            "tasks_posted": posted[-1],
+        })
+
+    measure("analyze_and_post_crafting_task",
+            lambda p: p.analyze_and_post_crafting_task("WorkStation_1", top_id, 1, environment))
+    measure("analyze_and_post_crafting_task(repeat)",
+            lambda p: p.analyze_and_post_crafting_task("WorkStation_1", top_id, 1, environment), warm=True)
+    measure("ensure_min_stock",
+            lambda p: p.ensure_min_stock(top_id, 2, "WorkStation_1", environment))
+    measure("_plan_craft",
+            lambda p: p._plan_craft("Crafter1", dict(char_params), environment))
+    return rows
+
+
+def _print_row(row: Dict) -> None:
+    print(
+        f"[PlannerBench] depth={row['depth']:<2d} branching={row['branching']:<2d} shared={row['shared']:<4.2f} "
+        f"recipes={row['recipes']:<5d} {row['op']:<40s} {row['ms']:10.2f} ms  tasks={row['tasks_posted']}",
+        flush=True,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time Planner supply-chain expansion on synthetic recipe graphs.")
+    parser.add_argument("--depths", default="2,4,6", help="Comma-separated recipe depths")
+    parser.add_argument("--branching", default="2,3", help="Comma-separated ingredient counts per recipe")
+    parser.add_argument("--shared", default="0,0.5", help="Comma-separated shared sub-component ratios in [0, 1)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (median is reported)")
+    parser.add_argument("--world-scale", type=int, default=2, help="Synthetic world scale (see benchmark_server.py)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="", help="Write results JSON to this path")
+    parser.add_argument("--write-catalog", default="", help="Only write Item.json/Task.json for the first case to this directory")
+    args = parser.parse_args()
+
+    depths = [int(v) for v in args.depths.split(",") if v.strip()]
+    branchings = [int(v) for v in args.branching.split(",") if v.strip()]
+    shared_ratios = [float(v) for v in args.shared.split(",") if v.strip()]
+
+    if args.write_catalog:
+        items, tasks = generate_catalog(depths[0], branchings[0], shared_ratios[0], seed=args.seed)
+        write_catalog(args.write_catalog, items, tasks)
+        print(f"[PlannerBench] {len(tasks)} recipes written to {args.write_catalog}")
+        return 0
+
+    results = []
+    for depth in depths:
+        for branching in branchings:
+            for shared in shared_ratios:
+                for row in run_case(depth, branching, shared, args.repeat, args.world_scale, args.seed):
+                    _print_row(row)
+                    results.append(row)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "repeat": args.repeat,
+                    "world_scale": args.world_scale,
+                    "seed": args.seed,
+                    "python": sys.version.split()[0],
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"[PlannerBench] results written to {args.output}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+'''
+LLMServer 端到端性能基准
+按规模生成合成世界（培养舱、仓库、工作台、灶台与角色数量随 scale 线性增长），
+驱动 /GetInstruction，统计延迟 p50/p95/p99、每秒请求数与各阶段耗时（见 phase_timer.py）。
+结果写入 JSON，可用 --compare 与之前的基线对比。
+
+默认在进程内通过 Flask test client 运行，并启用 LLM 桩（RIMSPACE_LLM_STUB=1），不需要网络与模型。
+也可以用 --server 压测已经启动的服务器（该服务器需以 RIMSPACE_LLM_STUB=1 启动）。
+
+用法:
+  python benchmark_server.py --scales 1,2,4,8 --rounds 5 --output ../Log/bench.json
+  python benchmark_server.py --compare ../Log/bench_baseline.json
+  python benchmark_server.py --server http://127.0.0.1:5001/GetInstruction
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from phase_timer import PHASES_HEADER, parse_phases_header
+from sim_production_mission import SimWorld
+
+PHASE_ORDER = ("update", "perceive", "tasks", "prompt", "llm", "plan")
+
+
+def build_synthetic_world(scale: int) -> Dict:
+    """scale 份基础设施与角色：4 个培养舱、1 个仓库、1 个工作台、1 个灶台、1 张桌子、3 张床、3 个角色"""
+    actors = []
+    characters = []
+    for i in range(1, scale + 1):
+        for j, crop in enumerate(("Cotton", "Cotton", "Corn", "Corn"), start=1):
+            actors.append({
+                "ActorName": f"CultivateChamber_{i}_{j}",
+                "ActorType": "EInteractionType::EAT_CultivateChamber",
+                "Inventory": {},
+                "CultivateInfo": {
+                    "CurrentPhase": "ECultivatePhase::ECP_WaitingToPlant",
+                    "TargetCultivateType": f"ECultivateType::ECT_{crop}",
+                    "CurrentCultivateType": "ECultivateType::ECT_None",
+                    "GrowthProgress": 0,
+                    "GrowthMaxProgress": 24,
+                },
+            })
+        actors.extend([
+            {"ActorName": f"Storage_{i}", "ActorType": "EInteractionType::EAT_Storage", "Inventory": {"1001": 6, "1002": 4}},
+            {"ActorName": f"WorkStation_{i}", "ActorType": "EInteractionType::EAT_WorkStation", "Inventory": {}, "TaskList": {"3001": 1}},
+            {"ActorName": f"Stove_{i}", "ActorType": "EInteractionType::EAT_Stove", "Inventory": {}, "TaskList": {"2003": 1}},
+            {"ActorName": f"Table_{i}", "ActorType": "EInteractionType::EAT_Table"},
+        ])
+        actors.extend({"ActorName": f"Bed_{i}_{j}", "ActorType": "EInteractionType::EAT_Bed"} for j in range(1, 4))
+        for role, skill in (("Farmer", "CanFarm"), ("Crafter", "CanCraft"), ("Chef", "CanCook")):
+            characters.append({
+                "CharacterName": f"{role}{i}",
+                "CurrentLocation": "None",
+                "ActionState": "ECharacterActionState::Idle",
+                "Inventory": {},
+                "CharacterStats": {"Hunger": 100.0, "MaxHunger": 100.0, "Energy": 100.0, "MaxEnergy": 100.0},
+                "CharacterSkills": [skill],
+            })
+    return {"Environment": {"Actors": actors}, "Characters": {"Characters": characters}}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class _InProcessTransport:
+    """进程内驱动 Flask 应用；服务器的控制台输出被丢弃，写日志文件的开销仍计入"""
+
+    def __init__(self, verbose: bool = False):
+        os.environ.setdefault("RIMSPACE_LOG_LEVEL", "DEBUG" if verbose else "WARNING")
+        import llm_server
+        self._client = llm_server.app.test_client()
+        self._verbose = verbose
+
+    def post(self, payload: bytes) -> Tuple[Dict, Dict[str, float]]:
+        sink = contextlib.nullcontext() if self._verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            response = self._client.post("/GetInstruction", data=payload, content_type="application/json")
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:300]}")
+        return response.get_json(), parse_phases_header(response.headers.get(PHASES_HEADER, ""))
+
+
+class _HttpTransport:
+    def __init__(self, server_url: str, timeout: Optional[float]):
+        from http_client import PooledHttpClient
+        self._http = PooledHttpClient()
+        self._url = server_url
+        self._timeout = timeout
+
+    def post(self, payload: bytes) -> Tuple[Dict, Dict[str, float]]:
+        response = self._http.post(self._url, data=payload, timeout=self._timeout)
+        response.raise_for_status()
+        return response.json(), parse_phases_header(response.headers.get(PHASES_HEADER, ""))
+
+
+def run_scale(transport, scale: int, rounds: int, session_id: str) -> Dict:
+    world = SimWorld(build_synthetic_world(scale))
+    agents = [c["CharacterName"] for c in world.characters["Characters"]]
+    latencies: List[float] = []
+    phase_totals: Dict[str, float] = {}
+    extra = {"SessionID": session_id}
+
+    t_start = time.perf_counter()
+    for _ in range(rounds):
+        for agent in agents:
+            payload = world.build_request_bytes(agent, extra)
+            t0 = time.perf_counter()
+            decision, phases = transport.post(payload)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            for name, ms in phases.items():
+                phase_totals[name] = phase_totals.get(name, 0.0) + ms
+            world.apply_command(agent, decision)
+        world.degrade_character_stats(1)
+        world.tick_environment(12)
+    wall = time.perf_counter() - t_start
+
+    n = len(latencies)
+    ordered_phases = [p for p in PHASE_ORDER if p in phase_totals] + sorted(set(phase_totals) - set(PHASE_ORDER))
+    return {
+        "scale": scale,
+        "actors": len(world.environment["Actors"]),
+        "agents": len(agents),
+        "requests": n,
+        "wall_s": wall,
+        "rps": n / wall if wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / n if n else 0.0,
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+        },
+        # 每个请求各阶段的平均耗时（毫秒）
+        "phases_ms": {name: phase_totals[name] / n for name in ordered_phases} if n else {},
+    }
+
+
+def _print_result(result: Dict) -> None:
+    lat = result["latency_ms"]
+    print(
+        f"[Bench] scale={result['scale']:<4d} actors={result['actors']:<5d} agents={result['agents']:<4d} "
+        f"req={result['requests']:<5d} rps={result['rps']:8.1f} "
+        f"p50={lat['p50']:7.2f} p95={lat['p95']:7.2f} p99={lat['p99']:7.2f} ms",
+        flush=True,
+    )
+    if result["phases_ms"]:
+        parts = " ".join(f"{name}={ms:.2f}" for name, ms in result["phases_ms"].items())
+        print(f"[Bench]   phases (ms/request): {parts}", flush=True)
+
+
+def compare_results(baseline: Dict, current: Dict, tolerance: float) -> List[str]:
+    """按 scale 对比 p95 延迟与 rps，返回超出容差的退化描述"""
+    regressions = []
+    base_by_scale = {r["scale"]: r for r in baseline.get("results", [])}
+    for result in current.get("results", []):
+        base = base_by_scale.get(result["scale"])
+        if base is None:
+            continue
+        p95_ratio = result["latency_ms"]["p95"] / max(base["latency_ms"]["p95"], 1e-9)
+        rps_ratio = result["rps"] / max(base["rps"], 1e-9)
+        print(f"[Bench] scale={result['scale']:<4d} p95 x{p95_ratio:.2f}  rps x{rps_ratio:.2f}", flush=True)
+        if p95_ratio > 1.0 + tolerance:
+            regressions.append(f"scale={result['scale']}: p95 latency x{p95_ratio:.2f}")
+        if rps_ratio < 1.0 - tolerance:
+            regressions.append(f"scale={result['scale']}: throughput x{rps_ratio:.2f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /GetInstruction latency and throughput on synthetic worlds.")
+    parser.add_argument("--scales", default="1,2,4,8", help="Comma-separated world scales")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per scale (each round = every agent requests once)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated LLM latency of the stub (in-process only)")
+    parser.add_argument("--server", default="", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=None, help="HTTP timeout in seconds (--server only)")
+    parser.add_argument("--output", default="", help="Write results JSON to this path")
+    parser.add_argument("--compare", default="", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression before --compare fails")
+    parser.add_argument("--verbose", action="store_true", help="Keep the server console output (in-process only)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    if args.server:
+        transport = _HttpTransport(args.server, args.timeout)
+    else:
+        os.environ["RIMSPACE_LLM_STUB"] = "1"
+        os.environ["RIMSPACE_LLM_STUB_LATENCY_MS"] = str(args.llm_latency_ms)
+        transport = _InProcessTransport(verbose=args.verbose)
+
+    run_id = datetime.now().strftime("%y%m%d%H%M%S")
+    results = []
+    for scale in scales:
+        result = run_scale(transport, scale, args.rounds, session_id=f"bench-{run_id}-{scale}")
+        results.append(result)
+        _print_result(result)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "mode": "http" if args.server else "in_process",
+            "rounds": args.rounds,
+            "llm_latency_ms": args.llm_latency_ms,
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Bench] results written to {args.output}", flush=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f"[Bench] REGRESSION {line}", flush=True)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,147 +3,213 @@ LLMServer 黑板模块
 用于存储和管理环境中的任务和状态信息，供智能体决策使用。
 '''
 
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from enum import Enum
+import operator
 import uuid
 import os
-import copy
+import re
+import weakref
+
+import server_logging
+import server_metrics
 
 
 def _disable_filtering() -> bool:
     flag = os.environ.get("RIMSPACE_BB_DISABLE_FILTER", "0").strip().lower()
     return flag in {"1", "true", "yes", "on"}
 
+
+def _lease_minutes() -> int:
+    # 任务认领的租约时长（游戏分钟），0 表示不启用认领
+    try:
+        return max(0, int(os.environ.get("RIMSPACE_BB_LEASE_MINUTES", "60")))
+    except ValueError:
+        return 60
+
+
+_GAME_TIME_RE = re.compile(r"Day\s*(\d+)\s+(\d{1,2}):(\d{2})")
+
+
+def parse_game_minutes(game_time) -> Optional[int]:
+    """把 "Day N  HH:MM" 格式的游戏时间转换为绝对分钟数，无法解析时返回 None"""
+    match = _GAME_TIME_RE.search(str(game_time or ""))
+    if not match:
+        return None
+    day, hour, minute = (int(g) for g in match.groups())
+    return (day * 24 + hour) * 60 + minute
+
+_COMPARATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+
 # Goal 模块
 class Goal:
-    def __init__(self, target_actor, property_type, key, operator, value, exclude_actor=None):
-        self.target_actor = target_actor # 要检查的Actor的状态，比如"WorkStation"，"CultivateChamber_1"等
-        self.property_type = property_type # 要查的那个状态，比如"Inventory", "TaskList"，"CultivateInfo"等
-        self.key = key # 具体的键，比如"TaskID"，"CutivatePhase",  "ItemID"等
-        self.operator = operator # 比较操作符，比如"==", "!=", ">", "<"等
-        self.value = value # 目标值
-        self.exclude_actor = exclude_actor # 新增：用于在计算时排除特定的 Actor
-    
+    """
+    不可变的目标 / 前置条件。字段可哈希时相同参数的 Goal 共享同一实例（弱引用缓存），
+    供应链展开每次请求会重复构造大量相同的前置条件，驻留后不再重复分配。
+    """
+    __slots__ = (
+        "target_actor", "property_type", "key", "operator", "value", "exclude_actor",
+        # 构造时编译的判定参数，is_satisfied 不再解析字符串
+        "_compare", "_equality", "_global", "_global_key", "_key_path",
+        "__weakref__",
+    )
+
+    _interned: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+
+    def __new__(cls, target_actor, property_type, key, operator, value, exclude_actor=None):
+        # 1 / 1.0 / True 相等且哈希相同，键中加入类型，避免取回值类型不同的缓存实例
+        fields = (target_actor, property_type, key, type(key), operator, value, type(value), exclude_actor)
+        try:
+            cached = cls._interned.get(fields)
+        except TypeError:
+            # 目标值不可哈希（如字典），不参与驻留
+            fields = None
+            cached = None
+        if cached is not None:
+            return cached
+        self = object.__new__(cls)
+        set_field = object.__setattr__
+        set_field(self, "target_actor", target_actor)  # 要检查的Actor的状态，比如"WorkStation"，"CultivateChamber_1"等
+        set_field(self, "property_type", property_type)  # 要查的那个状态，比如"Inventory", "TaskList"，"CultivateInfo"等
+        set_field(self, "key", key)  # 具体的键，比如"TaskID"，"CutivatePhase",  "ItemID"等
+        set_field(self, "operator", operator)  # 比较操作符，比如"==", "!=", ">", "<"等
+        set_field(self, "value", value)  # 目标值
+        set_field(self, "exclude_actor", exclude_actor)  # 用于在计算时排除特定的 Actor
+        set_field(self, "_compare", _COMPARATORS.get(operator))  # 未知操作符为 None，判定恒为 False
+        set_field(self, "_equality", operator in ("==", "!="))
+        set_field(self, "_global", target_actor == "Global" and property_type == "Inventory")
+        set_field(self, "_global_key", None if key is None else str(key))
+        if key is None:
+            key_path = None
+        elif "." in str(key):
+            key_path = tuple(str(key).split("."))
+        else:
+            key_path = (key,)
+        set_field(self, "_key_path", key_path)
+        if fields is not None:
+            cls._interned[fields] = self
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Goal is immutable (cannot set {name!r})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Goal is immutable (cannot delete {name!r})")
+
+    def __reduce__(self):
+        # pickle / deepcopy 经由构造函数重建，反序列化后同样被驻留
+        return (Goal, (self.target_actor, self.property_type, self.key, self.operator, self.value, self.exclude_actor))
+
+
     def is_satisfied(self, game_state_snapshot)->bool:
+        compare = self._compare
+        if compare is None:
+            return False
+        actors_list = game_state_snapshot.get("Environment", {}).get("Actors", [])
+
         # 全局库存检查（目标对象为 "Global"时）
-        if self.target_actor == "Global" and self.property_type == "Inventory":
+        if self._global:
             total = 0
-            actors_list = game_state_snapshot.get("Environment", {}).get("Actors", [])
-            for a in actors_list:
-                if a.get("Type") == "Character": 
-                    continue 
-                
-                # 2. 新增逻辑：如果配置了 exclude_actor，则跳过该设施的库存
-                if self.exclude_actor and a.get("ActorName") == self.exclude_actor:
-                    continue
-                    
-                inv = a.get("Inventory", {})
-                if isinstance(inv, dict) and self.key is not None:
-                    total += inv.get(str(self.key), 0)
-            
-            op = self.operator
+            inventory_key = self._global_key
+            if inventory_key is not None:
+                exclude_actor = self.exclude_actor
+                for a in actors_list:
+                    if a.get("Type") == "Character":
+                        continue
+                    # 如果配置了 exclude_actor，则跳过该设施的库存
+                    if exclude_actor and a.get("ActorName") == exclude_actor:
+                        continue
+                    inv = a.get("Inventory", {})
+                    if isinstance(inv, dict):
+                        total += inv.get(inventory_key, 0)
             try:
-                if op == "==": return total == self.value
-                elif op == "!=": return total != self.value
-                elif op == ">": return total > self.value
-                elif op == "<": return total < self.value
-                elif op == ">=": return total >= self.value
-                elif op == "<=": return total <= self.value
-                else: return False
+                return compare(total, self.value)
             except Exception:
                 return False
 
-        actors_list = game_state_snapshot.get("Environment", {}).get("Actors", [])
-        
         # 支持两种模式：
         # 1. 精确匹配：target_actor="CultivateChamber_1" (完全相等)
         # 2. 分类匹配：target_actor="CultivateChamber" (检查所有包含该名称的设施，汇总数值)
-        
+        # 是否存在精确匹配取决于快照，因此每次评估时判断
+        target_actor = self.target_actor
         matched_actors = []
         for actor in actors_list:
             actor_name = actor.get("ActorName", "")
-            # 先尝试精确匹配
-            if actor_name == self.target_actor:
+            # 精确匹配必然也是前缀匹配，不匹配前缀的 Actor 只需一次比较
+            if not actor_name.startswith(target_actor):
+                continue
+            if actor_name == target_actor:
                 matched_actors = [actor]
                 break
-            # 否则尝试前缀匹配（用于分类检查）
-            elif actor_name.startswith(self.target_actor):
-                matched_actors.append(actor)
-        
+            matched_actors.append(actor)
+
         if not matched_actors:
             return False
-        
+
         # 如果有多个匹配的设施，汇总它们的数值
+        property_type = self.property_type
+        key_path = self._key_path
         total_value = 0
         has_numeric = False
         non_numeric_values = []
         for actor_state in matched_actors:
-            prop = actor_state.get(self.property_type)
+            prop = actor_state.get(property_type)
             if prop is None:
                 continue
-            
-            # 支持嵌套字典和简单字典
-            value = 0
-            if isinstance(prop, dict) and self.key is not None:
-                # 检查 key 是否包含"."（表示嵌套，如 "1001.count"）
-                if "." in str(self.key):
-                    # 处理嵌套情况：逐层获取
-                    keys = str(self.key).split(".")
-                    value = prop
-                    for k in keys:
-                        if isinstance(value, dict):
-                            value = value.get(k, 0)
-                        else:
-                            value = 0
-                            break
-                else:
-                    # 处理简单情况：直接按键查询
-                    value = prop.get(self.key, 0)
-            else:
-                # 非字典属性或无 key，直接使用 prop
-                value = prop
-            
+
+            # 支持嵌套字典（"1001.count" 已预先拆分）和简单字典；非字典属性或无 key 时直接使用 prop
+            value = prop
+            if key_path is not None and isinstance(prop, dict):
+                for k in key_path:
+                    if isinstance(value, dict):
+                        value = value.get(k, 0)
+                    else:
+                        value = 0
+                        break
+
             # 数值用于汇总，非数值保留用于直接比较
             if isinstance(value, (int, float)):
                 total_value += value
                 has_numeric = True
             else:
                 non_numeric_values.append(value)
-        
-        # 比较操作
-        op = self.operator
+
         try:
             if has_numeric:
-                if op == "==":
-                    return total_value == self.value
-                elif op == "!=":
-                    return total_value != self.value
-                elif op == ">":
-                    return total_value > self.value
-                elif op == "<":
-                    return total_value < self.value
-                elif op == ">=":
-                    return total_value >= self.value
-                elif op == "<=":
-                    return total_value <= self.value
-                else:
-                    return False
-
-            # 非数值目标仅在单一匹配时进行直接比较
-            if len(non_numeric_values) != 1:
+                return compare(total_value, self.value)
+            # 非数值目标仅在单一匹配时进行直接比较，且只支持 == / !=
+            if len(non_numeric_values) != 1 or not self._equality:
                 return False
-            actual_value = non_numeric_values[0]
-            if op == "==":
-                return actual_value == self.value
-            if op == "!=":
-                return actual_value != self.value
-            return False
+            return compare(non_numeric_values[0], self.value)
         except Exception:
             return False
 
     def GoalDescription(self) -> str:
         return f"Ensure {self.target_actor}'s {self.property_type}[{self.key}] {self.operator} {self.value}"
 
+    def to_state(self) -> Dict:
+        """序列化为可写入日志的字典"""
+        return {
+            "target_actor": self.target_actor,
+            "property_type": self.property_type,
+            "key": self.key,
+            "operator": self.operator,
+            "value": self.value,
+            "exclude_actor": self.exclude_actor,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "Goal":
+        return cls(**state)
+
 class TaskStatus(Enum):
     PENDING = "Pending"
     IN_PROGRESS = "InProgress"
@@ -152,20 +218,54 @@ class TaskStatus(Enum):
 
 
 class BlackboardTask:
+    __slots__ = (
+        "task_id", "description", "goal", "preconditions", "priority", "required_skill",
+        "item_id", "source", "destination", "count",
+        "progress_counter", "progress_target", "progress_kind",
+        "progress_item_id", "progress_actor", "progress_actor_prefix",
+        "status", "claimed_by", "lease_expires_at",
+    )
+    # post_task 遇到重复目标时从新任务刷新的动态参数。
+    # 字段为 None 表示发布者没有提供该参数，刷新时保留原任务的值（刷新只会覆盖、不会清空字段）
+    REFRESH_FIELDS = (
+        "item_id", "source", "destination", "count",
+        "progress_counter", "progress_target", "progress_kind",
+        "progress_item_id", "progress_actor", "progress_actor_prefix",
+    )
+
     def __init__ (self, description: str, goal: Goal, preconditions: List[Goal] = None, priority: int = 1, required_skill: Optional[str] = None):
-        self.task_id = str(uuid.uuid4())
-        self.description = description
-        self.goal = goal
-        self.preconditions = preconditions or []
-        self.priority = priority
-        self.required_skill = required_skill
+        self.task_id: str = str(uuid.uuid4())
+        self.description: str = description
+        self.goal: Goal = goal
+        self.preconditions: List[Goal] = preconditions or []
+        self.priority: int = priority
+        self.required_skill: Optional[str] = required_skill
+        # 搬运任务参数（source 对感知层任务为 "perceiver"，用于区分任务来源）
+        self.item_id: Optional[str] = None
+        self.source: Optional[str] = None
+        self.destination: Optional[str] = None
+        self.count: Optional[int] = None
         # 可选：事件进度型任务元数据（用于“累计完成量”目标）
-        self.progress_counter = None
-        self.progress_target = None
-        self.progress_kind = None
-        self.progress_item_id = None
-        self.progress_actor = None
-        self.progress_actor_prefix = None
+        self.progress_counter: Optional[str] = None
+        self.progress_target: Optional[int] = None
+        self.progress_kind: Optional[str] = None
+        self.progress_item_id: Optional[str] = None
+        self.progress_actor: Optional[str] = None
+        self.progress_actor_prefix: Optional[str] = None
+        # 认领状态：被某个角色认领后对其他角色隐藏，租约到期（游戏分钟）后自动释放
+        self.status: TaskStatus = TaskStatus.PENDING
+        self.claimed_by: Optional[str] = None
+        self.lease_expires_at: Optional[int] = None
+
+    def __getstate__(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __setstate__(self, state):
+        for field in self.__slots__:
+            setattr(self, field, state[field])
+
+    def is_claimed_by_other(self, agent_name: str) -> bool:
+        return self.status == TaskStatus.IN_PROGRESS and self.claimed_by not in (None, agent_name)
     
     def is_active(self, game_state: Dict) -> bool:
         return not self.goal.is_satisfied(game_state)
@@ -188,12 +288,163 @@ class BlackboardTask:
             "prio": self.priority,
             # 不传 Goal 的细节给 LLM，除非需要，通常 LLM 只需要知道 desc 和 params
         }
+
+    def to_state(self) -> Dict:
+        """序列化全部字段（含搬运/进度参数），用于黑板日志"""
+        state = self.__getstate__()
+        state["goal"] = self.goal.to_state()
+        state["preconditions"] = [cond.to_state() for cond in self.preconditions]
+        state["status"] = self.status.value
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "BlackboardTask":
+        state = dict(state)
+        task = cls(
+            description=state.pop("description"),
+            goal=Goal.from_state(state.pop("goal")),
+            preconditions=[Goal.from_state(c) for c in state.pop("preconditions", [])],
+            priority=state.pop("priority", 1),
+            required_skill=state.pop("required_skill", None),
+        )
+        status = state.pop("status", TaskStatus.PENDING)
+        task.status = status if isinstance(status, TaskStatus) else TaskStatus(status)
+        for field, value in state.items():
+            # 忽略旧日志中已不存在的字段
+            if field in cls.__slots__:
+                setattr(task, field, value)
+        return task
 class Blackboard:
     def __init__ (self):
         self.tasks: List[BlackboardTask] = []
-        self.last_snapshot: Dict = {}
+        # 上一次 update 时各 Actor 的库存（库存比对的基线，每次 update 都会刷新）
+        self.last_inventory: Optional[Dict[str, Dict[str, int]]] = None
         self.progress_counters: Dict[str, int] = {}
+        # 库存变化的版本号：每次 update 递增；记录各 Actor 库存最近一次变化时的版本，
+        # 日志输出据此只重新评估受影响任务的前置条件（见 blackboard_render.py）
+        self.inventory_revision = 0
+        self._inventory_revisions: Dict[str, int] = {}
+        self._inventory_reset_revision = 0
+        # 进度计数器索引，随任务发布/移除增量维护
+        self._progress_refs: Dict[str, int] = {}
+        self._progress_defs: Dict[str, Dict] = {}
+        self._progress_by_actor: Dict[Tuple[str, str], Set[str]] = {}
+        self._progress_by_prefix: Dict[str, Dict[str, Set[str]]] = {}
+        self._progress_by_item: Dict[str, Set[str]] = {}
+        # 最近一次 update 时的游戏时间（分钟），用于任务认领的租约
+        self.current_minute: Optional[int] = None
+        # 可选的预写日志（见 blackboard_journal.py），为 None 时黑板只存在于内存中
+        self.journal = None
 
+    def attach_journal(self, journal) -> None:
+        self.journal = journal
+
+    def _journal_event(self, event: Dict) -> None:
+        if self.journal is not None:
+            self.journal.append(event)
+
+    def export_state(self) -> Dict:
+        """导出黑板的全部可变状态，供共享状态后端持久化"""
+        return {
+            "tasks": self.tasks,
+            "progress_counters": self.progress_counters,
+            "last_inventory": self.last_inventory,
+            "current_minute": self.current_minute,
+            "inventory_revision": self.inventory_revision,
+            "inventory_revisions": self._inventory_revisions,
+            "inventory_reset_revision": self._inventory_reset_revision,
+        }
+
+    def load_state(self, state: Dict) -> None:
+        """原地恢复黑板状态（保持实例不变，已持有该黑板引用的 Planner 依然有效）"""
+        self.tasks = state.get("tasks", [])
+        self.progress_counters = state.get("progress_counters", {})
+        self.last_inventory = state.get("last_inventory")
+        self.current_minute = state.get("current_minute")
+        self.inventory_revision = state.get("inventory_revision", 0)
+        self._inventory_revisions = state.get("inventory_revisions", {})
+        # 没有版本记录的旧状态：视为所有库存都已变化
+        self._inventory_reset_revision = state.get("inventory_reset_revision", self.inventory_revision)
+        self._rebuild_progress_index()
+
+    # ========== 进度计数器索引 ==========
+    def _rebuild_progress_index(self) -> None:
+        self._progress_refs = {}
+        self._progress_defs = {}
+        self._progress_by_actor = {}
+        self._progress_by_prefix = {}
+        self._progress_by_item = {}
+        for task in self.tasks:
+            self._index_progress(task)
+
+    def _index_progress(self, task: BlackboardTask) -> None:
+        counter = task.progress_counter
+        if not counter:
+            return
+        refs = self._progress_refs.get(counter, 0)
+        self._progress_refs[counter] = refs + 1
+        if refs:
+            # 同一计数器由多个任务共享时，沿用最先登记的定义
+            return
+
+        item_id = str(task.progress_item_id or "")
+        actor = task.progress_actor
+        actor_prefix = task.progress_actor_prefix
+        self._progress_defs[counter] = {
+            "kind": task.progress_kind,
+            "item_id": item_id,
+            "actor": actor,
+            "actor_prefix": actor_prefix,
+        }
+        if actor:
+            self._progress_by_actor.setdefault((item_id, actor), set()).add(counter)
+        elif actor_prefix:
+            self._progress_by_prefix.setdefault(item_id, {}).setdefault(actor_prefix, set()).add(counter)
+        else:
+            self._progress_by_item.setdefault(item_id, set()).add(counter)
+
+    def _unindex_progress(self, task: BlackboardTask) -> None:
+        counter = task.progress_counter
+        if not counter or counter not in self._progress_refs:
+            return
+        refs = self._progress_refs[counter] - 1
+        if refs > 0:
+            self._progress_refs[counter] = refs
+            return
+        del self._progress_refs[counter]
+
+        pdef = self._progress_defs.pop(counter)
+        item_id = pdef["item_id"]
+        if pdef["actor"]:
+            bucket = self._progress_by_actor.get((item_id, pdef["actor"]), set())
+            bucket.discard(counter)
+            if not bucket:
+                self._progress_by_actor.pop((item_id, pdef["actor"]), None)
+        elif pdef["actor_prefix"]:
+            prefixes = self._progress_by_prefix.get(item_id, {})
+            bucket = prefixes.get(pdef["actor_prefix"], set())
+            bucket.discard(counter)
+            if not bucket:
+                prefixes.pop(pdef["actor_prefix"], None)
+            if not prefixes:
+                self._progress_by_prefix.pop(item_id, None)
+        else:
+            bucket = self._progress_by_item.get(item_id, set())
+            bucket.discard(counter)
+            if not bucket:
+                self._progress_by_item.pop(item_id, None)
+
+    def _matching_counters(self, actor_name: str, item_id: str) -> Set[str]:
+        counters = set(self._progress_by_item.get(item_id, ()))
+        counters.update(self._progress_by_actor.get((item_id, actor_name), ()))
+        for prefix, prefixed in self._progress_by_prefix.get(item_id, {}).items():
+            if actor_name.startswith(prefix):
+                counters.update(prefixed)
+        return counters
+
+    # ========== 库存增量 ==========
+    # 进度统计的范围：Environment.Actors 中设施的库存；角色背包不计入（与 Global 库存目标一致）。
+    # 客户端增量与库存比对都按此范围过滤，且只有正增量计入进度（见 _accumulate_progress）。
     def _extract_actor_inventory(self, snapshot: Dict) -> Dict[str, Dict[str, int]]:
         actor_inv: Dict[str, Dict[str, int]] = {}
         env = snapshot.get("Environment", {}) if isinstance(snapshot, dict) else {}
@@ -205,7 +456,7 @@ class Blackboard:
             return actor_inv
 
         for actor in actors:
-            if not isinstance(actor, dict):
+            if not isinstance(actor, dict) or actor.get("Type") == "Character":
                 continue
             name = actor.get("ActorName")
             inv = actor.get("Inventory", {})
@@ -218,62 +469,80 @@ class Blackboard:
             actor_inv[str(name)] = safe_inv
         return actor_inv
 
-    def _inventory_deltas(self, prev_snapshot: Dict, curr_snapshot: Dict) -> List[Tuple[str, str, int]]:
-        prev = self._extract_actor_inventory(prev_snapshot)
-        curr = self._extract_actor_inventory(curr_snapshot)
+    def _inventory_deltas(self, prev: Dict[str, Dict[str, int]], curr: Dict[str, Dict[str, int]]) -> List[Tuple[str, str, int]]:
         deltas: List[Tuple[str, str, int]] = []
 
         actor_names = set(prev.keys()) | set(curr.keys())
         for actor_name in actor_names:
             prev_inv = prev.get(actor_name, {})
             curr_inv = curr.get(actor_name, {})
+            if prev_inv == curr_inv:
+                continue
             item_ids = set(prev_inv.keys()) | set(curr_inv.keys())
             for item_id in item_ids:
                 delta = curr_inv.get(item_id, 0) - prev_inv.get(item_id, 0)
-                if delta > 0:
+                if delta:
                     deltas.append((actor_name, item_id, delta))
         return deltas
 
-    def _match_progress_def(self, pdef: Dict, actor_name: str, item_id: str) -> bool:
-        if str(pdef.get("item_id")) != str(item_id):
-            return False
-
-        actor_exact = pdef.get("actor")
-        actor_prefix = pdef.get("actor_prefix")
-        if actor_exact:
-            return actor_name == actor_exact
-        if actor_prefix:
-            return actor_name.startswith(actor_prefix)
-        return True
-
-    def _accumulate_progress(self, prev_snapshot: Dict, curr_snapshot: Dict) -> None:
-        # 只为当前任务中声明了 progress_counter 的任务累计进度
-        progress_defs: Dict[str, Dict] = {}
-        for task in self.tasks:
-            counter = getattr(task, "progress_counter", None)
-            if not counter:
+    def _client_inventory_deltas(self, game_state: Dict) -> Optional[List[Tuple[str, str, int]]]:
+        """
+        读取客户端随请求附带的库存增量（自上一次请求以来已执行指令造成的变化）：
+        "InventoryDeltas": [{"ActorName": "Storage", "ItemID": 1001, "Delta": 2}, ...]
+        未提供时返回 None，由调用方回退到库存比对。角色背包的增量不在统计范围内，直接丢弃。
+        """
+        raw = game_state.get("InventoryDeltas") if isinstance(game_state, dict) else None
+        if not isinstance(raw, list):
+            return None
+        characters = game_state.get("Characters", {})
+        char_list = characters.get("Characters", []) if isinstance(characters, dict) else []
+        character_names = {c.get("CharacterName") for c in char_list if isinstance(c, dict)} if raw else set()
+        deltas: List[Tuple[str, str, int]] = []
+        for entry in raw:
+            if not isinstance(entry, dict):
                 continue
-            if counter in progress_defs:
+            actor_name = entry.get("ActorName")
+            item_id = entry.get("ItemID")
+            delta = entry.get("Delta")
+            if not actor_name or item_id is None or not isinstance(delta, int):
                 continue
-            progress_defs[counter] = {
-                "kind": getattr(task, "progress_kind", None),
-                "item_id": str(getattr(task, "progress_item_id", "")),
-                "actor": getattr(task, "progress_actor", None),
-                "actor_prefix": getattr(task, "progress_actor_prefix", None),
-            }
-
-        if not progress_defs:
+            if delta and actor_name not in character_names:
+                deltas.append((str(actor_name), str(item_id), delta))
+        return deltas
+
+    def _record_inventory_changes(self, prev: Optional[Dict[str, Dict[str, int]]], curr: Dict[str, Dict[str, int]]) -> None:
+        self.inventory_revision += 1
+        if prev is None:
+            # 没有基线时无法得知哪些库存变化过
+            self._inventory_revisions = {}
+            self._inventory_reset_revision = self.inventory_revision
             return
+        revision = self.inventory_revision
+        for actor_name in prev.keys() | curr.keys():
+            if prev.get(actor_name) != curr.get(actor_name):
+                self._inventory_revisions[actor_name] = revision
+
+    def inventory_changes_since(self, revision: Optional[int]) -> Optional[Set[str]]:
+        """
+        返回自版本 revision 之后库存发生过变化的 Actor 名称。
+        无法确定时（尚无版本、基线在此之后被重置、或版本来自另一块黑板）返回 None，调用方应视为全部变化。
+        """
+        if revision is None or revision < self._inventory_reset_revision or revision > self.inventory_revision:
+            return None
+        return {name for name, changed_at in self._inventory_revisions.items() if changed_at > revision}
 
-        deltas = self._inventory_deltas(prev_snapshot, curr_snapshot)
+    def _accumulate_progress(self, deltas: List[Tuple[str, str, int]]) -> None:
+        # 只为当前任务中声明了 progress_counter 的任务累计进度；取走（负增量）不抵扣已完成的进度
         for actor_name, item_id, delta in deltas:
-            for counter, pdef in progress_defs.items():
-                if self._match_progress_def(pdef, actor_name, item_id):
-                    self.progress_counters[counter] = self.progress_counters.get(counter, 0) + int(delta)
+            if delta <= 0:
+                continue
+            for counter in self._matching_counters(actor_name, item_id):
+                self.progress_counters[counter] = self.progress_counters.get(counter, 0) + int(delta)
+                self._journal_event({"op": "progress", "counter": counter, "delta": int(delta)})
 
     def _is_progress_task_done(self, task: BlackboardTask) -> bool:
-        counter = getattr(task, "progress_counter", None)
-        target = getattr(task, "progress_target", None)
+        counter = task.progress_counter
+        target = task.progress_target
         if not counter or target is None:
             return False
         return self.progress_counters.get(counter, 0) >= int(target)
@@ -288,17 +557,26 @@ class Blackboard:
                 g.operator == task.goal.operator and
                 g.value == task.goal.value):
                 # 重复目标任务沿用原实例，但刷新描述与动态参数，避免 source/destination 过期
-                t.description = task.description
-                for field in (
-                    "item_id", "source", "destination", "count",
-                    "progress_counter", "progress_target", "progress_kind",
-                    "progress_item_id", "progress_actor", "progress_actor_prefix",
-                ):
-                    if hasattr(task, field):
-                        setattr(t, field, getattr(task, field))
+                updates = {}
+                for field in BlackboardTask.REFRESH_FIELDS:
+                    value = getattr(task, field)
+                    if value is not None and getattr(t, field) != value:
+                        updates[field] = value
+                # 内容没有变化时不重写索引、不追加日志（每次请求都会重复发布同一批任务）
+                if updates or t.description != task.description:
+                    self._unindex_progress(t)
+                    t.description = task.description
+                    for field, value in updates.items():
+                        setattr(t, field, value)
+                    self._index_progress(t)
+                    self._journal_event({"op": "post", "task": t.to_state()})
+                server_metrics.inc("rimspace_tasks_posted_total", result="refreshed")
                 return t  # 返回已存在的任务实例
         self.tasks.append(task)
-        print(f"[Blackboard] 新任务已添加: {task.description}")
+        self._index_progress(task)
+        self._journal_event({"op": "post", "task": task.to_state()})
+        server_metrics.inc("rimspace_tasks_posted_total", result="new")
+        server_logging.log(f"[Blackboard] 新任务已添加: {task.description}")
         return task  # 返回新添加的任务实例
     
     def update(self, game_state: Dict):
@@ -306,27 +584,89 @@ class Blackboard:
         【关键逻辑】
         每回合调用。检查所有任务的 Goal。
         如果 Goal 已经满足 (is_satisfied == True)，则移除任务。
+        进度增量优先使用客户端提供的 InventoryDeltas，否则比对前后两次的库存。
+        同时根据 GameTime 释放租约已到期的认领。
         """
-        if self.last_snapshot:
-            self._accumulate_progress(self.last_snapshot, game_state)
+        now = parse_game_minutes(game_state.get("GameTime")) if isinstance(game_state, dict) else None
+        if now is not None:
+            self.current_minute = now
+            self._expire_claims(now)
+
+        # 无论增量来自客户端还是库存比对，都更新库存基线，之后的请求随时可以回退到比对
+        curr_inventory = self._extract_actor_inventory(game_state)
+        client_deltas = self._client_inventory_deltas(game_state)
+        if client_deltas is not None:
+            self._accumulate_progress(client_deltas)
+        elif self.last_inventory is not None and self._progress_defs:
+            self._accumulate_progress(self._inventory_deltas(self.last_inventory, curr_inventory))
+        self._record_inventory_changes(self.last_inventory, curr_inventory)
+        self.last_inventory = curr_inventory
 
         active_tasks = []
         for t in self.tasks:
             if self._is_progress_task_done(t):
-                counter = getattr(t, "progress_counter", "")
+                counter = t.progress_counter
                 current = self.progress_counters.get(counter, 0)
-                target = getattr(t, "progress_target", 0)
-                print(f"[Blackboard] 进度已达成，自动移除: {t.description} ({current}/{target})")
+                target = t.progress_target
+                server_logging.log(f"[Blackboard] 进度已达成，自动移除: {t.description} ({current}/{target})")
+                t.status = TaskStatus.COMPLETED
+                self._unindex_progress(t)
+                self._journal_event({"op": "remove", "task_id": t.task_id})
             elif t.goal.is_satisfied(game_state):
-                print(f"[Blackboard] 需求已满足，自动移除: {t.description}")
+                server_logging.log(f"[Blackboard] 需求已满足，自动移除: {t.description}")
+                t.status = TaskStatus.COMPLETED
+                self._unindex_progress(t)
+                self._journal_event({"op": "remove", "task_id": t.task_id})
             else:
                 active_tasks.append(t)
         self.tasks = active_tasks
-        self.last_snapshot = copy.deepcopy(game_state) if isinstance(game_state, dict) else {}
+        if self.journal is not None:
+            self.journal.record_baseline(self.last_inventory or {})
+            self.journal.maybe_compact(self)
+
+    # ========== 任务认领 ==========
+    def claim_task(self, task: BlackboardTask, agent_name: str) -> bool:
+        """
+        角色认领任务，认领期间该任务对其他角色不可见。
+        同一角色同时只持有一个认领：认领新任务时释放旧的。
+        :return: 是否认领成功（任务已被他人认领、认领未启用或尚无游戏时间时返回 False）
+        """
+        lease = _lease_minutes()
+        if not lease or task not in self.tasks or task.is_claimed_by_other(agent_name):
+            return False
+        # GameTime 无法解析时沿用最近一次已知的游戏时间；从未得到过游戏时间则不认领，避免租约永不过期
+        if self.current_minute is None:
+            return False
+        self.release_claims(agent_name, exclude=task)
+        task.status = TaskStatus.IN_PROGRESS
+        task.claimed_by = agent_name
+        task.lease_expires_at = self.current_minute + lease
+        self._journal_event({"op": "post", "task": task.to_state()})
+        return True
+
+    def release_claims(self, agent_name: str, failed: bool = False, exclude: Optional[BlackboardTask] = None) -> None:
+        """释放角色持有的认领（计划执行完毕或规划失败时调用）"""
+        for t in self.tasks:
+            if t is exclude or t.claimed_by != agent_name or t.status != TaskStatus.IN_PROGRESS:
+                continue
+            self._release(t, TaskStatus.FAILED if failed else TaskStatus.PENDING)
+
+    def _expire_claims(self, now: int) -> None:
+        for t in self.tasks:
+            if t.status == TaskStatus.IN_PROGRESS and t.lease_expires_at is not None and now >= t.lease_expires_at:
+                server_logging.log(f"[Blackboard] 认领已过期: {t.description} (by {t.claimed_by})")
+                self._release(t, TaskStatus.PENDING)
+
+    def _release(self, task: BlackboardTask, status: TaskStatus) -> None:
+        # FAILED 只记录最近一次结果，任务仍对所有角色可见，可被重新认领
+        task.status = status
+        task.claimed_by = None
+        task.lease_expires_at = None
+        self._journal_event({"op": "post", "task": task.to_state()})
 
     def get_executable_tasks(self, agent_info, game_state: Dict) -> List[BlackboardTask]:
         """
-        获取当前可执行的任务列表（无未完成依赖 + 符合技能要求）
+        获取当前可执行的任务列表（无未完成依赖 + 符合技能要求 + 未被其他角色认领）
         :param agent_info: 角色信息，主要是角色的技能
         :param game_state: 游戏状态，可能是 {"Environment": {...}} 或 {"Actors": [...]} 格式
         :return: 可执行的任务列表
@@ -349,6 +689,10 @@ class Blackboard:
         # 构建当前存在的任务ID集合        
         executable_tasks = []
         for t in self.tasks:
+            # 0. 已被其他角色认领的任务不可见
+            if t.is_claimed_by_other(char_name):
+                continue
+
             # 1. 检查技能要求
             required = t.required_skill
             if required is not None and required.lower() not in agent_skills:
@@ -0,0 +1,208 @@
+'''
+黑板预写日志 (write-ahead journal)
+把黑板的变更事件追加写入 JSON Lines 文件，并定期压缩为快照，服务器重启时回放即可恢复黑板，
+不必由感知层重新铺设整条供应链（也就不会重复发布任务）。
+
+事件类型：
+- post:     发布/刷新任务（按 task_id 覆盖）
+- remove:   任务完成后移除
+- progress: 进度计数器增量
+- baseline: 上一次 update 时各 Actor 的库存（用于重启后继续计算进度增量）
+
+快照文件为 `<journal>.snapshot.json`，记录已包含的最后一个事件序号，
+压缩过程中崩溃也不会重复回放进度增量。
+
+通过环境变量启用：
+- RIMSPACE_BB_JOURNAL=<日志路径>（或 1，使用 Log/blackboard_journal.jsonl）
+- RIMSPACE_BB_JOURNAL_COMPACT_EVERY=<事件数>（默认 500）
+- RIMSPACE_BB_JOURNAL_RESET=1 启动时丢弃旧日志（开始新的一局时使用）
+'''
+
+import json
+import os
+from typing import Dict, Optional
+
+from blackboard import Blackboard, BlackboardTask
+
+
+def _journal_path_from_env(default_dir: str) -> Optional[str]:
+    raw = os.environ.get("RIMSPACE_BB_JOURNAL", "").strip()
+    if not raw or raw.lower() in {"0", "false", "no", "off"}:
+        return None
+    if raw.lower() in {"1", "true", "yes", "on"}:
+        return os.path.join(default_dir, "blackboard_journal.jsonl")
+    return os.path.abspath(raw)
+
+
+def _compact_every_from_env() -> int:
+    try:
+        return max(1, int(os.environ.get("RIMSPACE_BB_JOURNAL_COMPACT_EVERY", "500")))
+    except ValueError:
+        return 500
+
+
+def _reset_from_env() -> bool:
+    flag = os.environ.get("RIMSPACE_BB_JOURNAL_RESET", "0").strip().lower()
+    return flag in {"1", "true", "yes", "on"}
+
+
+class BlackboardJournal:
+    def __init__(self, path: str, compact_every: int = 500):
+        self.path = os.path.abspath(path)
+        self.snapshot_path = self.path + ".snapshot.json"
+        self.compact_every = max(1, int(compact_every))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._seq = 0
+        self._events_since_compact = 0
+        self._baseline: Dict[str, Dict[str, int]] = {}
+        self._handle = None
+
+    # ========== 写入 ==========
+    def _open(self):
+        if self._handle is None:
+            self._handle = open(self.path, "a", encoding="utf-8")
+        return self._handle
+
+    def append(self, event: Dict) -> None:
+        self._seq += 1
+        record = dict(event)
+        record["seq"] = self._seq
+        handle = self._open()
+        handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        handle.flush()
+        self._events_since_compact += 1
+
+    def record_baseline(self, inventory: Dict[str, Dict[str, int]]) -> None:
+        """库存基线只在发生变化时写入，避免每次请求都落一份完整库存"""
+        if inventory == self._baseline:
+            return
+        self._baseline = inventory
+        self.append({"op": "baseline", "inventory": inventory})
+
+    def maybe_compact(self, blackboard: Blackboard) -> None:
+        if self._events_since_compact >= self.compact_every:
+            self.compact(blackboard)
+
+    def compact(self, blackboard: Blackboard) -> None:
+        """写入快照（原子替换）后清空日志"""
+        snapshot = {
+            "seq": self._seq,
+            "tasks": [t.to_state() for t in blackboard.tasks],
+            "progress_counters": dict(blackboard.progress_counters),
+            "baseline": self._baseline,
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        self._events_since_compact = 0
+
+    def reset(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._seq = 0
+        self._events_since_compact = 0
+        self._baseline = {}
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    # ========== 恢复 ==========
+    def restore(self, blackboard: Blackboard) -> int:
+        """
+        读取快照并回放其后的日志事件，原地恢复黑板状态。
+        :return: 回放的事件数
+        """
+        tasks: Dict[str, BlackboardTask] = {}
+        counters: Dict[str, int] = {}
+        snapshot_seq = 0
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_seq = int(snapshot.get("seq", 0))
+            for state in snapshot.get("tasks", []):
+                task = BlackboardTask.from_state(state)
+                tasks[task.task_id] = task
+            counters = {k: int(v) for k, v in snapshot.get("progress_counters", {}).items()}
+            self._baseline = snapshot.get("baseline", {}) or {}
+
+        replayed = 0
+        last_seq = snapshot_seq
+        if os.path.exists(self.path):
+            valid_bytes = 0
+            needs_newline = False
+            with open(self.path, "rb") as f:
+                for raw_line in f:
+                    try:
+                        event = json.loads(raw_line.decode("utf-8")) if raw_line.strip() else None
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半，截断后丢弃
+                        break
+                    valid_bytes += len(raw_line)
+                    needs_newline = not raw_line.endswith(b"\n")
+                    if event is None:
+                        continue
+                    seq = int(event.get("seq", 0))
+                    if seq <= snapshot_seq:
+                        continue
+                    op = event.get("op")
+                    if op == "post":
+                        # 已存在的 task_id 覆盖后在 dict 中保持原有顺序
+                        task = BlackboardTask.from_state(event["task"])
+                        tasks[task.task_id] = task
+                    elif op == "remove":
+                        tasks.pop(event.get("task_id"), None)
+                    elif op == "progress":
+                        counter = event.get("counter")
+                        counters[counter] = counters.get(counter, 0) + int(event.get("delta", 0))
+                    elif op == "baseline":
+                        self._baseline = event.get("inventory", {}) or {}
+                    last_seq = max(last_seq, seq)
+                    replayed += 1
+
+            # 去掉残缺的尾行，保证后续追加的事件从新的一行开始
+            if valid_bytes < os.path.getsize(self.path) or needs_newline:
+                with open(self.path, "r+b") as f:
+                    f.truncate(valid_bytes)
+                    if needs_newline:
+                        f.seek(valid_bytes)
+                        f.write(b"\n")
+
+        self._seq = last_seq
+        self._events_since_compact = replayed
+        blackboard.load_state({
+            "tasks": list(tasks.values()),
+            "progress_counters": counters,
+            # 空基线表示尚未建立（或客户端一直提供增量），与新建黑板一致
+            "last_inventory": self._baseline or None,
+        })
+        return replayed
+
+
+def attach_journal_from_env(blackboard: Blackboard, default_dir: str) -> Optional[BlackboardJournal]:
+    """按环境变量为黑板启用日志；启用时先回放已有日志再挂载"""
+    path = _journal_path_from_env(default_dir)
+    if not path:
+        return None
+    journal = BlackboardJournal(path, compact_every=_compact_every_from_env())
+    if _reset_from_env():
+        journal.reset()
+    else:
+        journal.restore(blackboard)
+    blackboard.attach_journal(journal)
+    return journal
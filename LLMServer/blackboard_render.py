@@ -0,0 +1,151 @@
+'''
+黑板任务列表的日志输出
+RIMSPACE_BB_LOG_MODE 控制每次 /GetInstruction 的黑板输出：
+- diff（默认）：只输出与上次输出相比的变化（新增 / 移除 / 前置条件状态翻转 / 进度或认领变化），没有变化时不输出
+- full：每次输出完整任务列表（原有格式）
+- off：不输出，也不评估前置条件
+
+两种格式都以 "[Blackboard]" 行开头、以 "    N. " 缩进编号行列出任务，split_log_by_role.py 可直接解析。
+diff 模式下编号行带标记：[+] 新增、[~] 变化、[-] 移除（移除的任务使用上次输出时的编号）。
+
+库存类前置条件的评估结果按任务缓存，只有其涉及的 Actor 库存在 Blackboard.update 中发生变化时才重新评估；
+非库存类条件（培养阶段、任务队列等）每次都重新评估。
+'''
+
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+MODES = ("diff", "full", "off")
+
+
+def log_mode() -> str:
+    mode = os.environ.get("RIMSPACE_BB_LOG_MODE", "diff").strip().lower()
+    return mode if mode in MODES else "diff"
+
+
+def precondition_status(task, wrapped_env: Optional[Dict]) -> str:
+    """前置条件部分的显示内容"""
+    prep_status = ""
+    if task.preconditions and wrapped_env:
+        unmet_conditions = []
+        for cond in task.preconditions:
+            if not cond.is_satisfied(wrapped_env):
+                # 格式：Actor.Property[Key] operator value
+                cond_str = f"{cond.target_actor}.{cond.property_type}[{cond.key}] {cond.operator} {cond.value}"
+                unmet_conditions.append(cond_str)
+
+        if unmet_conditions:
+            prep_status = f" [Preconditions Unmet: {', '.join(unmet_conditions)}]"
+        else:
+            prep_status = " [All Preconditions Met]"
+    elif task.preconditions:
+        prep_status = f" [Preconditions: {len(task.preconditions)} items]"
+    return prep_status
+
+
+def _affected(cond, changed: Set[str]) -> bool:
+    """库存变化是否可能改变该条件的结果"""
+    if cond.property_type != "Inventory":
+        return True
+    if not changed:
+        return False
+    if cond.target_actor == "Global":
+        return True
+    return any(name.startswith(cond.target_actor) for name in changed)
+
+
+def render_task(task, blackboard, wrapped_env: Optional[Dict], prep_status: Optional[str] = None) -> str:
+    """单个任务的显示内容（不含编号）：技能、描述、进度、前置条件与认领情况"""
+    skill = task.required_skill or "None"
+    progress_status = ""
+    if task.progress_counter and task.progress_target is not None:
+        current = blackboard.progress_counters.get(task.progress_counter, 0)
+        progress_status = f" [Progress: {current}/{int(task.progress_target)}]"
+
+    # 追加前置条件信息
+    if prep_status is None:
+        prep_status = precondition_status(task, wrapped_env)
+
+    claim_status = ""
+    if task.claimed_by:
+        claim_status = f" [Claimed: {task.claimed_by}]"
+
+    return f"[{skill}] {task.description}{progress_status}{prep_status}{claim_status}"
+
+
+class BlackboardRenderer:
+    """
+    记住上一次输出的任务（task_id -> (编号, 显示内容)），每个会话一个实例。
+    render() 返回要写入日志的行（不含会话前缀）。
+    """
+
+    def __init__(self):
+        self._last: Dict[str, Tuple[int, str]] = {}
+        self._rendered = False
+        # task_id -> (评估时的前置条件列表, 前置条件显示内容)
+        self._conditions: Dict[str, Tuple[List, str]] = {}
+        self._revision: Optional[int] = None
+
+    def _precondition_status(self, task, wrapped_env: Optional[Dict], changed: Optional[Set[str]]) -> str:
+        if not task.preconditions:
+            return ""
+        if not wrapped_env:
+            return precondition_status(task, wrapped_env)
+        cached = self._conditions.get(task.task_id)
+        if (cached is not None and changed is not None and cached[0] == task.preconditions
+                and not any(_affected(cond, changed) for cond in task.preconditions)):
+            return cached[1]
+        prep_status = precondition_status(task, wrapped_env)
+        self._conditions[task.task_id] = (list(task.preconditions), prep_status)
+        return prep_status
+
+    def render(self, blackboard, environment=None, mode: Optional[str] = None) -> List[str]:
+        mode = mode or log_mode()
+        if mode == "off":
+            return []
+
+        # 包装 environment 以符合 Goal.is_satisfied 的期望格式
+        wrapped_env = None
+        if environment:
+            wrapped_env = {"Environment": environment} if "Environment" not in environment else environment
+
+        # 自上次输出以来库存变化过的 Actor；None 表示无法确定，全部重新评估
+        changed = blackboard.inventory_changes_since(self._revision)
+        self._revision = blackboard.inventory_revision
+
+        current: Dict[str, Tuple[int, str]] = {}
+        for idx, task in enumerate(blackboard.tasks, start=1):
+            prep_status = self._precondition_status(task, wrapped_env, changed)
+            current[task.task_id] = (idx, render_task(task, blackboard, wrapped_env, prep_status))
+        if len(self._conditions) > len(current):
+            self._conditions = {task_id: v for task_id, v in self._conditions.items() if task_id in current}
+
+        previous, self._last = self._last, current
+        first = not self._rendered
+        self._rendered = True
+
+        if mode == "full" or first:
+            if not current:
+                return ["[Blackboard] 任务列表: (empty)"]
+            lines = ["[Blackboard] 任务列表:"]
+            lines.extend(f"    {idx}. {body}" for idx, body in current.values())
+            return lines
+
+        items = []
+        added = changed = removed = 0
+        for task_id, (idx, body) in current.items():
+            old = previous.get(task_id)
+            if old is None:
+                added += 1
+                items.append(f"    {idx}. [+] {body}")
+            elif old[1] != body:
+                changed += 1
+                items.append(f"    {idx}. [~] {body}")
+        for task_id, (idx, body) in previous.items():
+            if task_id not in current:
+                removed += 1
+                items.append(f"    {idx}. [-] {body}")
+        if not items:
+            return []
+        header = f"[Blackboard] 任务变化: +{added} ~{changed} -{removed}（共 {len(current)} 项）"
+        return [header] + items
@@ -1,6 +1,10 @@
 import json
+import logging
 import os
 import config
+import server_logging
+from travel_graph import TravelGraph
+from recipe_graph import RecipeGraph
 
 class GameDataManager:
     _instance = None
@@ -15,8 +19,45 @@ class GameDataManager:
             return
 
         # 加载静态数据
-        self.items = self._load_json(config.ITEM_DATA_PATH)
-        self.tasks = self._load_json(config.TASK_DATA_PATH)
+        self._build_indexes(self._load_json(config.ITEM_DATA_PATH), self._load_json(config.TASK_DATA_PATH))
+
+        # 可选的静态路径代价（InitGameData.json 中的 ActorLocations / TravelCosts）
+        init_path = getattr(config, "INIT_GAME_DATA_PATH", None) or os.path.join(
+            os.path.dirname(config.ITEM_DATA_PATH), "InitGameData.json"
+        )
+        init_data = self._load_json(init_path)
+        self.travel_graph = TravelGraph.from_init_data(init_data)
+        self.actor_capacities = _parse_capacities(init_data)
+        
+        self._initialized = True
+
+    @classmethod
+    def from_catalog(cls, items, tasks, travel_graph=None, actor_capacities=None) -> "GameDataManager":
+        """
+        用给定的物品 / 配方列表构建独立实例（不读取 Data/，也不替换全局单例），
+        供基准测试与合成配方图使用：Planner(blackboard, game_data=GameDataManager.from_catalog(...))
+        """
+        instance = object.__new__(cls)
+        instance._build_indexes(items, tasks)
+        instance.travel_graph = travel_graph
+        instance.actor_capacities = dict(actor_capacities or {})
+        instance._initialized = True
+        return instance
+
+    def actor_capacity(self, actor_name):
+        """
+        设施的库存容量（TotalSpace）。按名称精确匹配，否则按最长的类型前缀匹配（"Storage" 匹配 "Storage_2"）；
+        未配置时返回 None。
+        """
+        capacities = self.actor_capacities
+        if actor_name in capacities:
+            return capacities[actor_name]
+        matched = [prefix for prefix in capacities if actor_name.startswith(prefix)]
+        return capacities[max(matched, key=len)] if matched else None
+
+    def _build_indexes(self, items, tasks):
+        self.items = items
+        self.tasks = tasks
 
         # 建立索引
         self.item_map = {str(i["ItemID"]): i for i in self.items}
@@ -25,11 +66,30 @@ class GameDataManager:
         
         # 反向索引：通过 ProductID 查找对应的配方(Task)
         self.product_to_recipe = {str(t["ProductID"]): t for t in self.tasks}
-        
-        self._initialized = True
+
+        # 配方图：加载时检查环 / 缺失配方，Planner 据此迭代展开需求
+        self.recipe_graph = RecipeGraph.compile(self.items, self.tasks)
+        names = {str(i["ItemID"]): i.get("ItemName", "") for i in self.items}
+        for problem in self.recipe_graph.problems(names):
+            server_logging.log(f"[RecipeGraph] {problem}", logging.WARNING)
 
     def _load_json(self, path):
         if os.path.exists(path):
             with open(path, "r", encoding="utf-8") as f:
                 return json.load(f)
         return []
+
+
+def _parse_capacities(init_data):
+    """
+    InitGameData.json 中可选的 "ActorCapacities": {"Storage": 200, "WorkStation": 80, ...}，
+    与蓝图里各设施 UInventoryComponent 的 TotalSpace 保持一致（游戏序列化的状态中不含容量）。
+    """
+    raw = init_data.get("ActorCapacities") if isinstance(init_data, dict) else None
+    capacities = {}
+    for name, value in (raw or {}).items():
+        try:
+            capacities[str(name)] = int(value)
+        except (TypeError, ValueError):
+            continue
+    return capacities
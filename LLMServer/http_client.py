@@ -0,0 +1,125 @@
+'''
+模拟器 / 消融脚本共用的 HTTP 客户端
+- 复用 requests.Session 的连接池（keep-alive），避免每一步都重新建立 TCP 连接
+- 只对连接阶段的失败重试：GetInstruction 会消费动作队列，不能在服务器已收到请求后重发
+- 记录每个请求的耗时：往返总时间、服务器处理时间（响应头 X-Server-Time-Ms）、
+  网络/连接时间（往返 - 服务器）与响应解码时间；均值按全部请求累计，p95 取最近 timing_window 个请求
+
+RimSpace_llm_for_test 下的脚本把 LLMServer 加入 sys.path 后导入本模块，不另存副本。
+'''
+
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Deque, Dict, List, Optional
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:  # pragma: no cover - runtime check
+    requests = None
+
+SERVER_TIME_HEADER = "X-Server-Time-Ms"
+
+
+@dataclass
+class RequestTiming:
+    roundtrip_ms: float
+    server_ms: float
+    network_ms: float
+    decode_ms: float
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+_TIMING_FIELDS = tuple(f.name for f in fields(RequestTiming))
+
+
+class PooledHttpClient:
+    def __init__(self, pool_size: int = 4, connect_retries: int = 3, backoff: float = 0.2,
+                 timing_window: int = 10000):
+        if requests is None:
+            raise RuntimeError("requests is not installed. Run: pip install requests")
+        retry = Retry(
+            total=connect_retries,
+            connect=connect_retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=backoff,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+        # 最近的请求耗时（有界，长时间运行不会无限增长）与全部请求的累计值
+        self.timings: Deque[RequestTiming] = deque(maxlen=max(1, timing_window))
+        self.request_count = 0
+        self._totals: Dict[str, float] = dict.fromkeys(_TIMING_FIELDS, 0.0)
+
+    def post_json(self, url: str, payload, timeout: Optional[float] = None) -> Dict:
+        """payload 可以是 dict，也可以是已编码的 JSON 字节；返回解码后的响应"""
+        body = {"data": payload} if isinstance(payload, bytes) else {"json": payload}
+        t0 = time.perf_counter()
+        response = self.session.post(url, timeout=timeout, **body)
+        t1 = time.perf_counter()
+        response.raise_for_status()
+        result = response.json()
+        t2 = time.perf_counter()
+
+        roundtrip_ms = (t1 - t0) * 1000.0
+        try:
+            server_ms = float(response.headers.get(SERVER_TIME_HEADER, 0.0))
+        except ValueError:
+            server_ms = 0.0
+        timing = RequestTiming(
+            roundtrip_ms=roundtrip_ms,
+            server_ms=server_ms,
+            network_ms=max(0.0, roundtrip_ms - server_ms),
+            decode_ms=(t2 - t1) * 1000.0,
+        )
+        self.timings.append(timing)
+        self.request_count += 1
+        for field in _TIMING_FIELDS:
+            self._totals[field] += getattr(timing, field)
+        return result
+
+    def post(self, url: str, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def summary(self) -> Dict[str, float]:
+        """各阶段耗时的均值（全部请求）与 p95（最近 timing_window 个请求），单位毫秒"""
+        count = self.request_count
+        result: Dict[str, float] = {"requests": float(count)}
+        for field in _TIMING_FIELDS:
+            result[f"{field}_mean"] = self._totals[field] / count if count else 0.0
+            result[f"{field}_p95"] = _percentile([getattr(t, field) for t in self.timings], 0.95)
+        return result
+
+    def format_summary(self) -> str:
+        """供模拟脚本结束时打印的一行摘要；没有请求时返回空字符串"""
+        stats = self.summary()
+        if not stats["requests"]:
+            return ""
+        return (
+            "  HTTP (mean/p95 ms): "
+            f"roundtrip={stats['roundtrip_ms_mean']:.1f}/{stats['roundtrip_ms_p95']:.1f} "
+            f"server={stats['server_ms_mean']:.1f}/{stats['server_ms_p95']:.1f} "
+            f"network={stats['network_ms_mean']:.1f}/{stats['network_ms_p95']:.1f} "
+            f"decode={stats['decode_ms_mean']:.2f}/{stats['decode_ms_p95']:.2f}"
+        )
+
+    def close(self) -> None:
+        self.session.close()
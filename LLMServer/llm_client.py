@@ -1,21 +1,52 @@
 # llm_client.py
 import json
-from openai import OpenAI
-import requests # 假设使用标准 requests 调用，或者你可以用 openai 库
+import os
+import threading
+import time
 from config import LLM_API_KEY, LLM_MODEL, LLM_URL
 
+# 离线压测用的 LLM 桩：RIMSPACE_LLM_STUB=1 时不访问模型，固定返回 STUB_RESPONSE，
+# RIMSPACE_LLM_STUB_LATENCY_MS 模拟模型延迟，RIMSPACE_LLM_STUB_RESPONSE 可替换返回内容
+STUB_RESPONSE = '{"thought": "[LLM Stub]", "command": "Wait", "target_name": "", "minutes": 1}'
+
+
+def _llm_stub_enabled() -> bool:
+    flag = os.environ.get("RIMSPACE_LLM_STUB", "0").strip().lower()
+    return flag in {"1", "true", "yes", "on"}
+
+
 class LLMClient:
     def __init__(self):
         self.api_key = LLM_API_KEY
         self.model = LLM_MODEL
         self.url = LLM_URL
-        
+        self._client = None
+        # 预取线程池与请求线程可能同时触发首次创建
+        self._client_lock = threading.Lock()
+
+    def _get_client(self):
+        """首次调用时才导入 openai SDK 并创建客户端，避免拖慢服务器启动"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        base_url= self.url,
+                        api_key= self.api_key
+                    )
+        return self._client
+
     def query(self, system_prompt, user_context):
         """向 LLM 发送请求，获取响应"""
-        client = OpenAI(
-            base_url= self.url,
-            api_key= self.api_key
-        )
+        if _llm_stub_enabled():
+            try:
+                latency_ms = float(os.environ.get("RIMSPACE_LLM_STUB_LATENCY_MS", "0"))
+            except ValueError:
+                latency_ms = 0.0
+            if latency_ms > 0:
+                time.sleep(latency_ms / 1000.0)
+            return os.environ.get("RIMSPACE_LLM_STUB_RESPONSE") or STUB_RESPONSE
+        client = self._get_client()
         response = client.chat.completions.create(
             model=self.model,
             messages=[
@@ -36,4 +67,4 @@ class LLMClient:
         except Exception as e:
             print(f"[LLM Error] 解析失败: {e}")
             return {"thought": "Error parsing", "command": "Wait", "target": ""}
-        
+
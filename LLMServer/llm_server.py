@@ -1,22 +1,60 @@
 """
 LLM服务器 - 精简版，用于重构
 只保留基本的Flask路由和数据结构
+
+启动方式:
+- 开发: `python llm_server.py`（RIMSPACE_SERVER_DEBUG 默认为 1，会启用 Flask reloader，
+  即额外再启动一个解释器进程）
+- 生产/消融: `llm_server_prod.bat` 或 `RIMSPACE_SERVER_DEBUG=0 python llm_server.py`，
+  不启用 reloader，单进程直接监听
+- 多 worker: `RIMSPACE_STATE_BACKEND=sqlite RIMSPACE_STATE_RESET=1 gunicorn --preload -w 4 -b 127.0.0.1:5001 llm_server:app`，
+  黑板与动作队列通过 state_backend 在 worker 之间共享（Windows 下可用 waitress 的多线程模式，默认 memory 后端即可）；
+  Agent 对象、预取的 LLM 决策与集中分配的本轮结果仍按 worker 各自保存（启动日志会列出），见 state_backend.py
+- 启动耗时分析: `python llm_server.py --startup-profile` 打印各阶段耗时后退出；
+  设置 RIMSPACE_STARTUP_PROFILE=1 则在正常启动前打印同样的报告
 """
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import time
+
+_STARTUP_T0 = time.perf_counter()
+_startup_phases = []
+
+
+def _mark_startup_phase(name: str, since: float) -> float:
+    now = time.perf_counter()
+    _startup_phases.append((name, now - since))
+    return now
+
+
+_phase_t = _mark_startup_phase("interpreter -> llm_server", _STARTUP_T0)
+
 import json
+import logging
+import os
+import sys
+import threading
 from datetime import datetime
 from typing import Dict, Optional
+_phase_t = _mark_startup_phase("import stdlib", _phase_t)
+
+from flask import Flask, Response, g, request, jsonify
+from flask_cors import CORS
+_phase_t = _mark_startup_phase("import flask", _phase_t)
+
 from agent_manager import RimSpaceAgent
-from blackboard import Blackboard, BlackboardTask, Goal
-from rimspace_enum import EInteractionType, ECultivatePhase
+from blackboard import Blackboard
+from blackboard_render import BlackboardRenderer
 from planner import Planner
 from config import MEAL_MIN_STOCK
-from game_data_manager import GameDataManager
 from perceiver import perceive_environment_tasks
-import os
-import itemid_to_name
-import sys
+from state_backend import PER_WORKER_STATE, create_state_backend
+from blackboard_journal import attach_journal_from_env
+from task_assignment import TaskAssigner, task_assignment_enabled
+from plan_stream import PLAN_RESPONSE_MODE, is_plan_mode
+from phase_timer import PHASES_HEADER, begin_request, end_request, format_phases_header, phase
+import server_metrics
+import server_logging
+import request_profiler
+_phase_t = _mark_startup_phase("import agent modules", _phase_t)
 
 
 def _ablation_mode() -> str:
@@ -26,6 +64,12 @@ def _ablation_mode() -> str:
 def _is_no_blackboard_mode() -> bool:
     return _ablation_mode() == "no_blackboard"
 
+
+def _metrics_log_enabled() -> bool:
+    # 每个 GetInstruction 请求额外写一行 [Metrics] JSON（阶段耗时与决策来源）到服务器日志
+    flag = os.environ.get("RIMSPACE_METRICS_LOG", "0").strip().lower()
+    return flag in {"1", "true", "yes", "on"}
+
 app = Flask(__name__)
 CORS(app)
 
@@ -42,6 +86,16 @@ else:
         LOG_DIR,
         f"Server_{datetime.now().strftime('%y%m%d%H-%M-%S')}.log",
     )
+# 控制台与服务器日志文件都由后台线程写出，见 server_logging.py
+server_logging.configure(_server_log_path)
+_request_summary = server_logging.RequestSummary()
+if not server_logging.console_enabled(logging.DEBUG):
+    # werkzeug 的逐请求访问日志同样只在 DEBUG 级别输出
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+# RIMSPACE_PROFILE_EVERY=N 时的采样剖析输出目录（见 request_profiler.py）
+_profile_dir = request_profiler.profile_dir_for(_server_log_path)
+_phase_t = _mark_startup_phase("app + log setup", _phase_t)
 
 # 游戏状态缓存
 game_state_cache: Dict = {}
@@ -49,30 +103,100 @@ game_state_cache: Dict = {}
 # 黑板任务管理
 Blackboard_Instance = Blackboard()
 
+# 黑板与动作队列的共享状态后端（默认进程内；多 worker 部署时使用 sqlite）
+State_Backend = create_state_backend(LOG_DIR)
+if State_Backend.name != "memory":
+    server_logging.server_log(
+        f"[Server] State backend: {State_Backend.name}; shared: blackboard, agent queues/feedback/desires; "
+        f"per worker: {', '.join(PER_WORKER_STATE)}",
+        logging.INFO,
+    )
+
+# 进程内后端可选启用黑板预写日志，重启后回放恢复（sqlite 后端本身已持久化）
+Blackboard_Journal = None
+if State_Backend.name == "memory":
+    Blackboard_Journal = attach_journal_from_env(Blackboard_Instance, LOG_DIR)
+
 # no_blackboard 模式下：保持仅感知层任务输入，但每回合刷新任务
 NoBlackboard_Seeded = False
 
-# 全局Planner实例用于依赖分解
-Global_Planner = Planner(Blackboard_Instance)
 
-# 一些可能会删除的测试代码
-def _server_log(message: str) -> None:
-    """Append message to server log file (blackboard/decision only)."""
-    try:
-        with open(_server_log_path, "a", encoding="utf-8") as handle:
-            handle.write(message + "\n")
-    except Exception:
-        pass
+class ServerSession:
+    """
+    一个独立的模拟世界：黑板、Planner、角色与状态后端都不与其他会话共享。
+    请求中的 "SessionID" 选择会话；缺省为默认会话（即原有的全局状态）。
+    不同会话使用各自的状态锁，可以被并发处理。
+    """
 
+    def __init__(self, session_id: str, blackboard: Blackboard, state_backend):
+        self.session_id = session_id
+        self.blackboard = blackboard
+        self.state_backend = state_backend
+        self.agents: Dict[str, RimSpaceAgent] = {}
+        # Planner 首次请求时才创建，配方目录随之延迟加载
+        self._planner: Optional[Planner] = None
+        # 可选的集中任务分配（RIMSPACE_TASK_ASSIGNMENT=1），与 Planner 一同延迟创建
+        self._task_assigner: Optional[TaskAssigner] = None
+        # 黑板日志的上次输出状态（diff 模式只输出变化）
+        self.blackboard_renderer = BlackboardRenderer()
+
+    @property
+    def log_prefix(self) -> str:
+        # 默认会话保持原有日志格式，日志解析脚本不受影响
+        return f"[Session {self.session_id}] " if self.session_id else ""
+
+    def get_planner(self) -> Planner:
+        if self._planner is None:
+            self._planner = Planner(self.blackboard)
+        return self._planner
+
+    def get_task_assigner(self) -> Optional[TaskAssigner]:
+        if self._task_assigner is None and task_assignment_enabled():
+            self._task_assigner = TaskAssigner(self.get_planner())
+        return self._task_assigner
+
+
+_default_session = ServerSession("", Blackboard_Instance, State_Backend)
+_sessions: Dict[str, ServerSession] = {"": _default_session}
+_sessions_lock = threading.Lock()
+_phase_t = _mark_startup_phase("state init", _phase_t)
+
+
+def _get_session(session_id) -> ServerSession:
+    session_id = str(session_id or "").strip()
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            session = ServerSession(session_id, Blackboard(), create_state_backend(LOG_DIR, session_id))
+            _sessions[session_id] = session
+        return session
+
+
+def _get_global_planner() -> Planner:
+    return _default_session.get_planner()
+
+
+def _get_task_assigner() -> Optional[TaskAssigner]:
+    return _default_session.get_task_assigner()
+
+
+def _print_startup_profile(include_catalog: bool = True) -> None:
+    """打印启动各阶段耗时（可选地把延迟加载的配方目录也计入）"""
+    phases = list(_startup_phases)
+    if include_catalog:
+        t0 = time.perf_counter()
+        _get_global_planner()
+        phases.append(("catalog load (deferred)", time.perf_counter() - t0))
+    print("[Startup] phase timings:")
+    for name, seconds in phases:
+        print(f"[Startup]   {name:<28s} {seconds * 1000:8.1f} ms")
+    total = sum(seconds for _, seconds in phases)
+    print(f"[Startup]   {'total':<28s} {total * 1000:8.1f} ms")
 
-def _safe_console_print(message: str) -> None:
-    """Print text safely on gbk/legacy consoles by replacing unsupported chars."""
-    try:
-        print(message)
-    except UnicodeEncodeError:
-        enc = sys.stdout.encoding or "utf-8"
-        safe = message.encode(enc, errors="replace").decode(enc, errors="replace")
-        print(safe)
+# 一些可能会删除的测试代码
+def _server_log(message: str, level: int = logging.DEBUG) -> None:
+    """写入服务器日志文件（黑板 / 决策）；控制台按 RIMSPACE_LOG_LEVEL 过滤，默认不输出逐行明细"""
+    server_logging.server_log(message, level)
 
 
 # perceive_environment_tasks 已移动到 perceiver.py
@@ -114,66 +238,12 @@ def get_blackboard() -> list:
     return Blackboard_Instance
 
 
-def _print_blackboard_tasks(environment=None) -> None:
-    """打印黑板任务到控制台，包括Goal完成情况和依赖关系"""
-    tasks = Blackboard_Instance.tasks
-    if not tasks:
-        line = "[Blackboard] 任务列表: (empty)"
-        _safe_console_print(line)
-        _server_log(line)
-    else:
-        header = "[Blackboard] 任务列表:"
-        _safe_console_print(header)
-        _server_log(header)
-        
-        # 包装 environment 以符合 Goal.is_satisfied 的期望格式
-        wrapped_env = None
-        if environment:
-            wrapped_env = {"Environment": environment} if "Environment" not in environment else environment
-        
-        # 构建task_id到任务的映射
-        # task_map = {t.task_id: t for t in tasks}
-        
-        for idx, task in enumerate(tasks, start=1):
-            desc = task.description if hasattr(task, "description") else str(task)
-            skill = task.required_skill if hasattr(task, "required_skill") and task.required_skill else "None"
-            progress_status = ""
-            if hasattr(task, "progress_counter") and getattr(task, "progress_counter", None):
-                counter = getattr(task, "progress_counter")
-                target = getattr(task, "progress_target", None)
-                current = Blackboard_Instance.progress_counters.get(counter, 0)
-                if target is not None:
-                    progress_status = f" [Progress: {current}/{int(target)}]"
-            
-            # 追加Goal完成情况
-            # goal_status = ""
-            # if hasattr(task, "goal") and task.goal and wrapped_env:
-            #     current = _get_goal_current_value(task.goal, environment)
-            #     target = task.goal.value if hasattr(task.goal, 'value') else "?"
-            #     if current is not None:
-            #         goal_status = f" [Goal: {current}/{target}]"
-            
-            # 追加前置条件信息
-            prep_status = ""
-            if hasattr(task, "preconditions") and task.preconditions and wrapped_env:
-                unmet_conditions = []
-                for cond in task.preconditions:
-                    if not cond.is_satisfied(wrapped_env):
-                        # 格式：Actor.Property[Key] operator value
-                        cond_str = f"{cond.target_actor}.{cond.property_type}[{cond.key}] {cond.operator} {cond.value}"
-                        unmet_conditions.append(cond_str)
-                
-                if unmet_conditions:
-                    prep_status = f" [Preconditions Unmet: {', '.join(unmet_conditions)}]"
-                else:
-                    prep_status = " [All Preconditions Met]"
-            elif hasattr(task, "preconditions") and task.preconditions:
-                prep_status = f" [Preconditions: {len(task.preconditions)} items]"
-            
-            # print(f"    {idx}. [{skill}] {desc}{goal_status}{prep_status}")
-            line = f"    {idx}. [{skill}] {desc}{progress_status}{prep_status}"
-            _safe_console_print(line)
-            _server_log(line)
+def _print_blackboard_tasks(environment=None, session: Optional["ServerSession"] = None) -> None:
+    """输出黑板任务（RIMSPACE_BB_LOG_MODE：diff 只输出变化 / full 完整列表 / off 关闭）"""
+    session = session or _default_session
+    prefix = session.log_prefix
+    for line in session.blackboard_renderer.render(session.blackboard, environment):
+        _server_log(f"{prefix}{line}")
 
 
 # ========== 数据加载辅助函数 ==========
@@ -205,11 +275,66 @@ def load_task_data() -> list:
         return []   
 
 # ========== Agents ==============
-agents = {}
+# 默认会话的角色表（其他会话的角色保存在各自的 ServerSession 中）
+agents = _default_session.agents
 
 
 
 # ========== Flask路由 ==========
+@app.before_request
+def _start_request_timer():
+    g.request_t0 = time.perf_counter()
+    begin_request()
+    if request.path == "/GetInstruction":
+        g.profile_sample = request_profiler.start_if_sampled()
+
+
+@app.after_request
+def _add_server_time_header(response):
+    """服务器处理耗时写入响应头，客户端据此区分服务器时间与网络时间"""
+    sample = getattr(g, "profile_sample", None)
+    if sample is not None:
+        g.profile_sample = None
+        request_profiler.finish(sample, _profile_dir, getattr(g, "character_name", ""))
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    elapsed = None
+    t0 = getattr(g, "request_t0", None)
+    if t0 is not None:
+        elapsed = time.perf_counter() - t0
+        response.headers["X-Server-Time-Ms"] = f"{elapsed * 1000.0:.3f}"
+        server_metrics.observe("rimspace_request_seconds", elapsed, route=route)
+    server_metrics.inc("rimspace_requests_total", route=route, status=response.status_code)
+    phases = end_request()
+    if phases:
+        response.headers[PHASES_HEADER] = format_phases_header(phases)
+        for name, seconds in phases.items():
+            server_metrics.observe("rimspace_phase_seconds", seconds, phase=name)
+    if route == "/GetInstruction" and elapsed is not None:
+        _request_summary.note(
+            elapsed,
+            source=getattr(g, "decision_source", ""),
+            ok=response.status_code < 400,
+            task_count=getattr(g, "task_count", None),
+        )
+    if route == "/GetInstruction" and _metrics_log_enabled():
+        record = {
+            "agent": getattr(g, "character_name", ""),
+            "session": getattr(g, "session_id", ""),
+            "source": getattr(g, "decision_source", ""),
+            "status": response.status_code,
+            "total_ms": round(elapsed * 1000.0, 3) if elapsed is not None else None,
+            "phases_ms": {name: round(seconds * 1000.0, 3) for name, seconds in (phases or {}).items()},
+        }
+        _server_log(f"[Metrics] {json.dumps(record, ensure_ascii=False)}")
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 文本格式的运行指标，见 server_metrics.py"""
+    return Response(server_metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
@@ -270,6 +395,10 @@ def get_instruction():
         },
         "RemainingSteps": 剩余步骤数
     }
+
+    请求带 "SessionID" 时使用该会话独立的黑板与角色（多个模拟世界共用一个服务器）。
+    请求带 "ResponseMode": "plan" 时，返回值额外包含 "Plan"（完整计划，每步附带前置条件），
+    客户端执行完毕或某步失败时在下一次请求中带上 "PlanStatus" 回调，详见 plan_stream.py
     """
     try:
         data = request.get_json()
@@ -290,35 +419,78 @@ def get_instruction():
         # 从列表中查找当前角色的数据
         current_char_data = next((c for c in characters_data if c.get("CharacterName") == character_name), {})
         
-        # ==========================================
-        # 消融模式控制：
-        # - full: 正常使用黑板（更新 + 感知）
-        # - no_blackboard: 仅使用感知层任务输入，不引入额外共享分解任务
-        global NoBlackboard_Seeded
-        if _is_no_blackboard_mode():
-            # no_blackboard: 每回合刷新感知任务，确保种植/收获等动态任务会随环境更新
-            Blackboard_Instance.update(data)
-            perceive_environment_tasks(environment, Blackboard_Instance, Global_Planner, MEAL_MIN_STOCK)
-            NoBlackboard_Seeded = True
-            _print_blackboard_tasks(environment)
-        else:
-            Blackboard_Instance.update(data)
-            perceive_environment_tasks(environment, Blackboard_Instance, Global_Planner, MEAL_MIN_STOCK)
-            _print_blackboard_tasks(environment)
-        # ==========================================
+        session = _get_session(data.get("SessionID"))
+        g.character_name = character_name
+        g.session_id = session.session_id
+        blackboard = session.blackboard
+        state_backend = session.state_backend
+        agents = session.agents
+
+        # 黑板与动作队列的读写都在状态后端事务内完成；LLM 调用放在事务之外，
+        # 多 worker 部署时不会因为等待模型而长时间持有共享状态锁
+        with state_backend.transaction(blackboard) as tx:
+            # ==========================================
+            # 消融模式控制：
+            # - full: 正常使用黑板（更新 + 感知）
+            # - no_blackboard: 仅使用感知层任务输入，不引入额外共享分解任务
+            global NoBlackboard_Seeded
+            if _is_no_blackboard_mode():
+                # no_blackboard: 每回合刷新感知任务，确保种植/收获等动态任务会随环境更新
+                with phase("update"):
+                    blackboard.update(data)
+                with phase("perceive"):
+                    perceive_environment_tasks(environment, blackboard, session.get_planner(), MEAL_MIN_STOCK)
+                NoBlackboard_Seeded = True
+                _print_blackboard_tasks(environment, session)
+            else:
+                with phase("update"):
+                    blackboard.update(data)
+                with phase("perceive"):
+                    perceive_environment_tasks(environment, blackboard, session.get_planner(), MEAL_MIN_STOCK)
+                _print_blackboard_tasks(environment, session)
+            # ==========================================
+            
+            # print(f"\n[GetInstruction] 角色: {character_name}, 时间: {game_time}")
         
-        # print(f"\n[GetInstruction] 角色: {character_name}, 时间: {game_time}")
-    
 
-        if character_name not in agents:
-            agents[character_name] = RimSpaceAgent(character_name, character_name.lower(), Blackboard_Instance)
-        agent = agents[character_name]
-        decision = agent.make_decision(
-            current_char_data,
-            environment
-        )
-        line = f"[{character_name} 决策] {decision}"
-        print(line)
+            if character_name not in agents:
+                agents[character_name] = RimSpaceAgent(character_name, character_name.lower(), blackboard)
+            agent = agents[character_name]
+            tx.sync_agent(agent)
+            plan_mode = is_plan_mode(data)
+            if plan_mode:
+                agent.report_plan_status(data.get("PlanStatus"))
+            assigned = None
+            assigner = session.get_task_assigner()
+            if assigner is not None and not agent.action_queue:
+                busy = {name for name, a in agents.items() if a.action_queue}
+                assigned = assigner.decision_for(
+                    character_name, blackboard, characters_data, environment, busy,
+                    game_time=data.get("GameTime")
+                )
+            pending = agent.prepare_decision(
+                current_char_data,
+                environment,
+                assigned_decision=assigned
+            )
+
+        g.decision_source = pending.source
+        server_metrics.inc("rimspace_decisions_total", source=pending.source)
+        if pending.command is not None:
+            decision = pending.command
+        else:
+            with phase("llm"):
+                response_str = pending.query(agent.llm)
+            with state_backend.transaction(blackboard) as tx:
+                tx.sync_agent(agent)
+                decision = agent.complete_decision(current_char_data, environment, response_str)
+        if plan_mode and decision.get("CommandType"):
+            with state_backend.transaction(blackboard) as tx:
+                tx.sync_agent(agent)
+                plan = agent.take_plan(decision, current_char_data, environment)
+            decision = dict(plan[0], Plan=plan, ResponseMode=PLAN_RESPONSE_MODE)
+        g.task_count = len(blackboard.tasks)
+        line = f"{session.log_prefix}[{character_name} 决策] {decision}"
         _server_log(line)
         return jsonify(decision), 200
         # 目前返回简单的Wait指令
@@ -335,15 +507,28 @@ def get_instruction():
         import traceback
         # print(f"[错误] {e}")
         tb = traceback.format_exc()
-        traceback.print_exc()
-        _server_log(f"[GetInstruction ERROR] {type(e).__name__}: {e}")
-        _server_log(tb)
+        _server_log(f"[GetInstruction ERROR] {type(e).__name__}: {e}", logging.ERROR)
+        _server_log(tb, logging.ERROR)
         return jsonify({
             "status": "error",
             "message": str(e)
         }), 500
 
 
+@app.route('/EndSession', methods=['POST'])
+def end_session():
+    """
+    结束一个会话并释放其黑板与角色（默认会话不能结束）
+    请求格式: {"SessionID": "会话ID"}
+    """
+    session_id = str((request.get_json(silent=True) or {}).get("SessionID") or "").strip()
+    if not session_id:
+        return jsonify({"status": "error", "message": "Missing SessionID"}), 400
+    with _sessions_lock:
+        removed = _sessions.pop(session_id, None)
+    return jsonify({"status": "success", "ended": removed is not None}), 200
+
+
 # ========== 辅助函数 ==========
 def create_wait_command(character_name: str, reasoning: str = "", wait_time: int = 0) -> Dict:
     """创建Wait指令"""
@@ -411,9 +596,17 @@ if __name__ == '__main__':
     # print("=" * 60)
     # print()
     
+    if "--startup-profile" in sys.argv[1:]:
+        _print_startup_profile()
+        sys.exit(0)
+    if os.environ.get("RIMSPACE_STARTUP_PROFILE", "0").strip().lower() in {"1", "true", "yes", "on"}:
+        _print_startup_profile()
+
     print(f"[Server] Ablation mode: {_ablation_mode()}")
     print(f"[Server] Blackboard basic perceive: {os.environ.get('RIMSPACE_BB_BASIC_TASKS', '0')}")
     print(f"[Server] Blackboard disable filter: {os.environ.get('RIMSPACE_BB_DISABLE_FILTER', '0')}")
+    if request_profiler.profile_every():
+        print(f"[Server] Profiling every {request_profiler.profile_every()} GetInstruction -> {_profile_dir}")
     debug_flag = os.environ.get("RIMSPACE_SERVER_DEBUG", "1").strip().lower() in {"1", "true", "yes", "on"}
 
     # 启动Flask服务器
@@ -0,0 +1,11 @@
+@echo off
+setlocal
+
+rem Production/ablation launch: no debug, no reloader (single interpreter process)
+pushd "%~dp0"
+call conda activate rimspace
+set RIMSPACE_SERVER_DEBUG=0
+python llm_server.py
+
+popd
+endlocal
@@ -0,0 +1,78 @@
+'''
+LLMServer 请求分阶段计时
+在一次请求内用 `with phase("perceive"):` 标记各阶段，请求结束时得到每个阶段的耗时（秒）。
+阶段可以嵌套，统计的是独占时间：子阶段的耗时不会重复计入父阶段，
+因此各阶段之和不超过请求总耗时。
+
+计时状态按线程保存；没有调用 begin_request() 的线程中 phase() 不做任何事，
+单元测试或脚本直接调用 Agent / Planner 时没有额外开销。
+
+阶段名称：
+- update:   黑板 update（进度累计、完成任务移除）
+- perceive: 感知层发布任务
+- tasks:    可执行任务筛选（技能、前置条件、认领）
+- prompt:   构建 Prompt
+- llm:      等待 LLM 响应
+- plan:     Planner 生成动作序列
+'''
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PHASES_HEADER = "X-Server-Phases"
+
+_local = threading.local()
+
+
+def begin_request() -> None:
+    _local.phases = {}
+    _local.stack = []
+
+
+def end_request() -> Optional[Dict[str, float]]:
+    """结束当前请求的计时，返回 {阶段: 秒}；当前线程没有进行中的计时时返回 None"""
+    phases = getattr(_local, "phases", None)
+    _local.phases = None
+    _local.stack = None
+    return phases
+
+
+@contextmanager
+def phase(name: str):
+    phases = getattr(_local, "phases", None)
+    if phases is None:
+        yield
+        return
+    stack = _local.stack
+    # [开始时间, 子阶段累计耗时]
+    frame = [time.perf_counter(), 0.0]
+    stack.append(frame)
+    try:
+        yield
+    finally:
+        stack.pop()
+        elapsed = time.perf_counter() - frame[0]
+        phases[name] = phases.get(name, 0.0) + elapsed - frame[1]
+        if stack:
+            stack[-1][1] += elapsed
+
+
+def format_phases_header(phases: Dict[str, float]) -> str:
+    """{阶段: 秒} -> "update=0.512;perceive=1.204"（毫秒）"""
+    return ";".join(f"{name}={seconds * 1000.0:.3f}" for name, seconds in phases.items())
+
+
+def parse_phases_header(value: str) -> Dict[str, float]:
+    """format_phases_header 的逆过程，返回 {阶段: 毫秒}"""
+    result: Dict[str, float] = {}
+    for part in (value or "").split(";"):
+        name, sep, ms = part.partition("=")
+        if not sep:
+            continue
+        try:
+            result[name.strip()] = float(ms)
+        except ValueError:
+            continue
+    return result
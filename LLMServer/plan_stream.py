@@ -0,0 +1,117 @@
+'''
+LLMServer 整段计划下发模块
+默认每次 /GetInstruction 只返回一条指令；客户端在请求中带上 "ResponseMode": "plan" 时，
+服务器一次返回完整计划（"Plan" 字段），每一步附带可在客户端本地检查的前置条件，
+客户端只在某一步前置条件不满足或整个计划执行完毕时再回调服务器（"PlanStatus" 字段）。
+
+前置条件格式（"Preconditions" 列表，全部满足才执行该步）：
+- {"Type": "AtLocation", "Target": 设施名}
+- {"Type": "ActorHasItem", "Actor": 设施名, "ItemID": 物品ID, "Count": 数量}
+- {"Type": "CarryingItem", "ItemID": 物品ID, "Count": 数量}
+
+回调格式：
+- {"Status": "Completed"}
+- {"Status": "Failed", "FailedStep": 步骤下标, "CommandType": 指令类型, "Reason": 原因}
+'''
+
+import copy
+from typing import Dict, List, Optional, Tuple
+
+PLAN_RESPONSE_MODE = "plan"
+
+
+def is_plan_mode(request_data) -> bool:
+    mode = request_data.get("ResponseMode", "") if isinstance(request_data, dict) else ""
+    return str(mode).strip().lower() == PLAN_RESPONSE_MODE
+
+
+def _actor_inventory(environment_data, actor_name) -> Optional[Dict]:
+    for actor in environment_data.get("Actors", []):
+        if isinstance(actor, dict) and actor.get("ActorName") == actor_name:
+            inventory = actor.setdefault("Inventory", {})
+            return inventory if isinstance(inventory, dict) else None
+    return None
+
+
+def step_preconditions(command: Dict, location) -> List[Dict]:
+    """根据执行该步时角色所在位置，给出该步的前置条件"""
+    cmd_type = command.get("CommandType")
+    if cmd_type not in {"Take", "Put", "Use"}:
+        return []
+    conditions = [{"Type": "AtLocation", "Target": location}]
+    item_id = int(command.get("ParamID", 0))
+    count = int(command.get("Count", 0))
+    if cmd_type == "Take" and count > 0:
+        conditions.append({"Type": "ActorHasItem", "Actor": location, "ItemID": item_id, "Count": count})
+    elif cmd_type == "Put" and count > 0:
+        conditions.append({"Type": "CarryingItem", "ItemID": item_id, "Count": count})
+    return conditions
+
+
+def check_preconditions(preconditions: List[Dict], char_data: Dict, environment_data: Dict) -> Optional[str]:
+    """检查前置条件，全部满足返回 None，否则返回第一条不满足的原因"""
+    for cond in preconditions or []:
+        cond_type = cond.get("Type")
+        if cond_type == "AtLocation":
+            if char_data.get("CurrentLocation") != cond.get("Target"):
+                return f"Not at {cond.get('Target')} (currently at {char_data.get('CurrentLocation')})."
+        elif cond_type == "ActorHasItem":
+            inventory = _actor_inventory(environment_data, cond.get("Actor")) or {}
+            have = inventory.get(str(cond.get("ItemID")), 0)
+            if have < cond.get("Count", 0):
+                return f"{cond.get('Actor')} has {have} of item {cond.get('ItemID')}, needs {cond.get('Count')}."
+        elif cond_type == "CarryingItem":
+            carried = char_data.get("Inventory", {})
+            have = carried.get(str(cond.get("ItemID")), 0) if isinstance(carried, dict) else 0
+            if have < cond.get("Count", 0):
+                return f"Carrying {have} of item {cond.get('ItemID')}, needs {cond.get('Count')}."
+    return None
+
+
+def apply_step(command: Dict, char_data: Dict, environment_data: Dict) -> None:
+    """在本地状态上推演一步指令的效果（位置与库存），原地修改"""
+    cmd_type = command.get("CommandType")
+    if cmd_type == "Move":
+        if command.get("TargetName"):
+            char_data["CurrentLocation"] = command["TargetName"]
+        return
+    if cmd_type not in {"Take", "Put"}:
+        return
+    stock = _actor_inventory(environment_data, char_data.get("CurrentLocation"))
+    if stock is None:
+        return
+    carried = char_data.setdefault("Inventory", {})
+    key = str(command.get("ParamID"))
+    src, dst = (stock, carried) if cmd_type == "Take" else (carried, stock)
+    moved = min(int(command.get("Count", 0)), src.get(key, 0))
+    src[key] = src.get(key, 0) - moved
+    dst[key] = dst.get(key, 0) + moved
+
+
+def project_state(char_data: Dict, environment_data: Dict, commands: List[Dict]) -> Tuple[Dict, Dict]:
+    """按指令序列推演，得到执行完后的预计状态（不修改传入的数据）"""
+    char = copy.deepcopy(char_data)
+    env = copy.deepcopy(environment_data)
+    for command in commands:
+        apply_step(command, char, env)
+    return char, env
+
+
+def build_plan(commands: List[Dict], char_data: Dict, environment_data: Dict) -> List[Dict]:
+    """
+    为指令序列附加前置条件，并在当前状态上逐步推演校验。
+    推演中第一条前置条件不满足的步骤及其后续步骤不会下发，客户端执行到此处时回调服务器重新决策。
+    """
+    char = copy.deepcopy(char_data)
+    env = copy.deepcopy(environment_data)
+    plan = []
+    for command in commands:
+        step = dict(command)
+        step["Preconditions"] = step_preconditions(step, char.get("CurrentLocation"))
+        if plan and check_preconditions(step["Preconditions"], char, env) is not None:
+            break
+        apply_step(step, char, env)
+        plan.append(step)
+    for index, step in enumerate(plan):
+        step["RemainingSteps"] = len(plan) - index - 1
+    return plan
@@ -4,14 +4,32 @@ import uuid
 from typing import List, Dict, Any, Optional, Tuple
 from blackboard import Goal, BlackboardTask
 from game_data_manager import GameDataManager
+from travel_graph import TravelGraph
 
 # === 基础指令构造函数 ===
 def cmd_move(target): return {"CommandType": "Move", "TargetName": target, "ParamID": 0, "Count": 0}
-def cmd_take(item_id): return {"CommandType": "Take", "TargetName": "", "ParamID": int(item_id), "Count": 1}
-def cmd_put(item_id): return {"CommandType": "Put", "TargetName": "", "ParamID": int(item_id), "Count": 1}
+def cmd_take(item_id, count=1): return {"CommandType": "Take", "TargetName": "", "ParamID": int(item_id), "Count": int(count)}
+def cmd_put(item_id, count=1): return {"CommandType": "Put", "TargetName": "", "ParamID": int(item_id), "Count": int(count)}
 def cmd_use(param_id): return {"CommandType": "Use", "TargetName": "", "ParamID": int(param_id), "Count": 0}
 def cmd_wait(minutes): return {"CommandType": "Wait", "TargetName": "", "ParamID": int(minutes), "Count": 0}
 
+MEAL_ITEM_ID = 2003
+
+# 角色背包容量（空间单位），与 UInventoryComponent 默认的 TotalSpace 一致
+DEFAULT_CARRY_CAPACITY = 50
+
+
+def _carry_capacity(params) -> int:
+    """优先使用决策参数中的 carry_capacity，其次是环境变量 RIMSPACE_CARRY_CAPACITY"""
+    raw = params.get("carry_capacity") if params else None
+    if raw in (None, ""):
+        raw = os.environ.get("RIMSPACE_CARRY_CAPACITY", DEFAULT_CARRY_CAPACITY)
+    try:
+        return max(1, int(raw))
+    except (TypeError, ValueError):
+        return DEFAULT_CARRY_CAPACITY
+
+
 class PlanResult:
     """规划结果封装，包含动作序列或失败反馈"""
     def __init__(self, success: bool, plan: List[Dict] = None, feedback: str = ""):
@@ -22,9 +40,10 @@ class PlanResult:
 
 
 class Planner:
-    def __init__(self, blackboard_instance):
+    def __init__(self, blackboard_instance, game_data: Optional[GameDataManager] = None):
+        """game_data 缺省为全局单例（Data/ 下的 Item.json / Task.json），也可以传入 GameDataManager.from_catalog(...)"""
         self.blackboard = blackboard_instance
-        self.game_data = GameDataManager()
+        self.game_data = game_data if game_data is not None else GameDataManager()
 
         # 转发属性以便兼容
         self.items = self.game_data.items
@@ -33,6 +52,7 @@ class Planner:
         self.task_map = self.game_data.task_map
         self.item_name_to_id = self.game_data.item_name_to_id
         self.product_to_recipe = self.game_data.product_to_recipe
+        self.recipe_graph = self.game_data.recipe_graph
     
     def get_total_item_count(self, item_id, environment) -> int:
         """""计算环境中某种物品的总量 (Storage + 各种容器)"""
@@ -48,35 +68,46 @@ class Planner:
         return total
 
     def _accumulate_item_requirements(self, item_id: str, amount_needed: int, requirement_map: Dict[str, int]):
-        """递归累积某物品及其下游原料的总需求。"""
-        key = str(item_id)
-        requirement_map[key] = requirement_map.get(key, 0) + int(amount_needed)
-
-        recipe = self.product_to_recipe.get(key)
-        if not recipe:
-            return
-
-        for ing in recipe.get("Ingredients", []):
-            sub_id = str(ing["ItemID"])
-            sub_total = int(ing["Count"]) * int(amount_needed)
-            self._accumulate_item_requirements(sub_id, sub_total, requirement_map)
+        """累积某物品及其下游原料的总需求（按配方图的拓扑顺序展开，环上的配方不展开）。"""
+        for key, amount in self.recipe_graph.requirements(item_id, amount_needed).items():
+            requirement_map[key] = requirement_map.get(key, 0) + amount
     
-    def find_actor_with_item(self, item_id, min_count, environment, exclude_actor=None) -> str:
-        """寻找拥有指定数量物品的最佳容器"""
+    def get_travel_graph(self, environment) -> TravelGraph:
+        return TravelGraph.from_environment(environment, getattr(self.game_data, "travel_graph", None))
+
+    def find_actor_with_item(self, item_id, min_count, environment, exclude_actor=None, near=None) -> str:
+        """
+        寻找拥有指定数量物品的最佳容器。
+        给出 near 且有路径代价时选择离 near 最近的容器，否则选择库存最多的容器。
+        """
         str_id = str(item_id)
         actors = environment.get("Actors", [])
 
-        best_actor = None
-        best_count = -1
+        candidates = []
         for actor in actors:
             if exclude_actor and actor.get("ActorName") == exclude_actor:
                 continue
             inv = actor.get("Inventory", {})
             if isinstance(inv, dict):
                 count = inv.get(str_id, 0)
-                if isinstance(count, int) and count >= min_count and count > best_count:
-                    best_count = count
-                    best_actor = actor.get("ActorName")
+                if isinstance(count, int) and count >= min_count:
+                    candidates.append((actor.get("ActorName"), count))
+        if not candidates:
+            return None
+
+        if near:
+            graph = self.get_travel_graph(environment)
+            costs = [graph.cost(near, name) for name, _ in candidates] if graph else []
+            if costs and all(c is not None for c in costs):
+                ranked = sorted(zip(costs, candidates), key=lambda pair: (pair[0], -pair[1][1]))
+                return ranked[0][1][0]
+
+        best_actor = None
+        best_count = -1
+        for name, count in candidates:
+            if count > best_count:
+                best_count = count
+                best_actor = name
         return best_actor
     
     def find_actor_by_type(self, type_suffix, environment) -> str:
@@ -103,6 +134,112 @@ class Planner:
                 return count if isinstance(count, int) else 0
         return 0
     
+    def _space_cost(self, item_id) -> int:
+        try:
+            return max(1, int(self.item_map.get(str(item_id), {}).get("SpaceCost", 1)))
+        except (TypeError, ValueError):
+            return 1
+
+    def _used_space(self, inventory) -> int:
+        items = inventory if isinstance(inventory, dict) else {}
+        return sum(
+            count * self._space_cost(item_id)
+            for item_id, count in items.items()
+            if isinstance(count, int) and count > 0
+        )
+
+    def free_carry_capacity(self, char_data) -> Optional[int]:
+        """
+        角色背包的剩余空间（按 SpaceCost 计算）。
+        角色数据既没有容量字段也没有携带物品时返回 None，规划时使用默认容量。
+        """
+        capacity = char_data.get("CarryCapacity", char_data.get("TotalSpace"))
+        used = self._used_space(char_data.get("Inventory", {}))
+        if capacity is None and not used:
+            return None
+        return max(1, _carry_capacity({"carry_capacity": capacity}) - used)
+
+    def free_actor_space(self, actor_name, environment) -> Optional[int]:
+        """
+        设施的剩余空间（按 SpaceCost 计算）。容量依次取环境数据中的 TotalSpace、
+        InitGameData.json 的 ActorCapacities（见 GameDataManager.actor_capacity）、UInventoryComponent 的默认容量；
+        已用空间超过容量时视为已满。设施未找到时返回 None，表示不限制。
+        """
+        for actor in environment.get("Actors", []):
+            if actor.get("ActorName") != actor_name:
+                continue
+            used = self._used_space(actor.get("Inventory", {}))
+            capacity = actor.get("TotalSpace")
+            if capacity is None:
+                capacity = self.game_data.actor_capacity(actor_name)
+            try:
+                capacity = int(capacity)
+            except (TypeError, ValueError):
+                capacity = DEFAULT_CARRY_CAPACITY
+            return max(0, capacity - used)
+        return None
+
+    def _plan_trips(self, pickups, destination, current_loc, capacity, graph=None,
+                    dest_space: Optional[int] = None) -> Tuple[List[Dict], str]:
+        """
+        把若干 (source, item_id, count) 搬运需求编排为按容量分批的行程，所有物品送往 destination。
+        每趟从当前位置出发依次经过若干来源拿取物品（同一来源的多种物品在同一站拿取），
+        装满或取完后前往 destination 放下。有路径代价时各站顺序由 TravelGraph.order_stops 决定。
+        dest_space 为 destination 的剩余空间（None 表示不限制），放满后其余需求不再编排。
+        :return: (指令序列, 行程结束后的位置)
+        """
+        remaining: Dict[str, Dict[str, int]] = {}
+        for source, item_id, count in pickups:
+            if count <= 0 or source == destination:
+                continue
+            items = remaining.setdefault(source, {})
+            items[str(item_id)] = items.get(str(item_id), 0) + int(count)
+
+        plan = []
+        while remaining and (dest_space is None or dest_space > 0):
+            sources = list(remaining)
+            if graph:
+                sources = graph.order_stops(current_loc, sources, end=destination)
+
+            load: Dict[str, int] = {}
+            free = capacity if dest_space is None else min(capacity, dest_space)
+            for source in sources:
+                taken = []
+                for item_id, left in remaining[source].items():
+                    cost = self._space_cost(item_id)
+                    n = min(left, free // cost)
+                    if n <= 0 and not load and not taken and (dest_space is None or dest_space >= cost):
+                        # 单件超过背包容量时仍然一次搬一件，交由游戏侧判定
+                        n = 1
+                    if n <= 0:
+                        continue
+                    taken.append((item_id, n))
+                    free -= n * cost
+                if not taken:
+                    continue
+                if dest_space is not None:
+                    dest_space -= sum(n * self._space_cost(item_id) for item_id, n in taken)
+                if current_loc != source:
+                    plan.append(cmd_move(source))
+                    current_loc = source
+                for item_id, n in taken:
+                    plan.append(cmd_take(item_id, n))
+                    load[item_id] = load.get(item_id, 0) + n
+                    remaining[source][item_id] -= n
+                remaining[source] = {k: v for k, v in remaining[source].items() if v > 0}
+                if not remaining[source]:
+                    del remaining[source]
+                if free <= 0:
+                    break
+            if not load:
+                break
+
+            plan.append(cmd_move(destination))
+            current_loc = destination
+            for item_id, n in load.items():
+                plan.append(cmd_put(item_id, n))
+        return plan, current_loc
+
     # === 核心入口 ===
     def generate_plan(self, agent_name, high_level_action, params, environment):
         """
@@ -116,11 +253,15 @@ class Planner:
             return PlanResult(False, [cmd_wait(2)], feedback=f"未知的高层指令: {high_level_action}")
         
     # === 各类高层指令的规划实现 ===
+    def find_food_source(self, env, near=None) -> Optional[str]:
+        """_plan_eat 取餐的容器（只从存储中取餐，不使用角色身上携带的食物）；没有可用食物时返回 None"""
+        return self.find_actor_with_item(MEAL_ITEM_ID, 1, env, near=near)
+
     def _plan_eat(self, agent_name, params, env) -> PlanResult:
         # 寻找食物（Meal -> 2003)
-        food_id = 2003
+        food_id = MEAL_ITEM_ID
         current_loc = params.get("current_location")
-        source = self.find_actor_with_item(food_id, 1, env)
+        source = self.find_food_source(env, near=current_loc)
         if not source:
             # 游戏中没有食物，触发系统任务
             # 补充3个食物，根据游戏内设定，刚好满足殖民地所有人的进餐需求
@@ -167,17 +308,30 @@ class Planner:
         item_id = params.get("item_id")
         if not source or not destination or not item_id:
             return PlanResult(False, [cmd_wait(2)], "Incomplete parameters for transport.")
-        current_loc = params.get("current_location")
-        plan = []
-        if current_loc != source:
-            plan.append(cmd_move(source))
-            current_loc = source
-        plan.append(cmd_take(item_id))
-        if destination != current_loc:
-            plan.append(cmd_move(destination))
-            current_loc = destination
-        plan.append(cmd_put(item_id))
-        return PlanResult(True, plan, "Transporting 1 item.")
+        try:
+            count = max(1, int(params.get("count") or 1))
+        except (TypeError, ValueError):
+            count = 1
+        # 不超过来源当前库存（库存未知或为 0 时仍尝试搬运 1 件）
+        source_stock = self.get_actor_item_count(source, item_id, env)
+        if source_stock > 0:
+            count = min(count, source_stock)
+        else:
+            count = 1
+        if source == destination:
+            return PlanResult(False, [cmd_wait(2)], "Source and destination are the same.")
+        # 同时不超过目标设施的剩余空间，否则游戏侧会拒绝 Put
+        dest_space = self.free_actor_space(destination, env)
+        if dest_space is not None:
+            fit = dest_space // self._space_cost(item_id)
+            if fit <= 0:
+                return PlanResult(False, [cmd_wait(2)], f"Destination {destination} is full.")
+            count = min(count, fit)
+        plan, _ = self._plan_trips(
+            [(source, item_id, count)], destination, params.get("current_location"),
+            _carry_capacity(params), self.get_travel_graph(env), dest_space,
+        )
+        return PlanResult(True, plan, f"Transporting {count} item(s).")
     
     def _plan_wait(self, agent_name, params, env) -> PlanResult:
         minutes = params.get("minutes", 10)
@@ -200,8 +354,8 @@ class Planner:
         if not target_facility:
             return PlanResult(False, [cmd_wait(2)], f"No facility of type {facility_type} found.")
         
-        plan = []
         missing_resources = []  # 收集所有缺失的原料
+        pickups = []  # (source, item_id, count)，原料齐全后统一编排搬运行程
         current_loc = params.get("current_location")
         
         for ing in recipe.get("Ingredients", []):
@@ -224,27 +378,12 @@ class Planner:
                 self._trigger_system_supply(ing_id, needed_count, target_facility, env)
             else:
                 # 库存充足，生成搬运指令
-                source = self.find_actor_with_item(ing_id, needed_count, env)
+                source = self.find_actor_with_item(ing_id, needed_count, env, near=target_facility)
                 if not source:
                     # 虽然总数够，但在某些不可达的地方？或者逻辑死角
                     return PlanResult(False, [cmd_wait(5)], f"Could not locate {ing_id} in containers.")
                 
-                # 生成搬运指令：一次搬运一个物品
-                if source != target_facility:
-                    for item_idx in range(needed_count):
-                        # 每次搬运一个物品
-                        if current_loc != source:
-                            plan.append(cmd_move(source))
-                            current_loc = source
-                        plan.append(cmd_take(ing_id))
-                        if current_loc != target_facility:
-                            plan.append(cmd_move(target_facility))
-                            current_loc = target_facility
-                        plan.append(cmd_put(ing_id))
-                        # 如果还有更多物品需要搬运，返回source
-                        if item_idx < needed_count - 1:
-                            plan.append(cmd_move(source))
-                            current_loc = source
+                pickups.append((source, ing_id, needed_count))
 
         # 如果有任何缺失的原料，返回失败并等待
         if missing_resources:
@@ -252,6 +391,17 @@ class Planner:
             feedback = f"Resources Missing: {resource_names}. System supply tasks initiated. Please Wait."
             return PlanResult(False, [cmd_wait(10)], feedback)
 
+        # 目标设施放不下全部原料时，搬运一部分也无法开工
+        dest_space = self.free_actor_space(target_facility, env)
+        needed_space = sum(count * self._space_cost(ing_id) for _, ing_id, count in pickups)
+        if dest_space is not None and needed_space > dest_space:
+            return PlanResult(False, [cmd_wait(5)], f"Not enough space in {target_facility} for the ingredients.")
+
+        # 按背包容量分批搬运，同一来源的不同原料合并为一趟
+        plan, current_loc = self._plan_trips(
+            pickups, target_facility, current_loc, _carry_capacity(params), self.get_travel_graph(env),
+        )
+
         # 2. 开始制作
         if current_loc != target_facility:
             plan.append(cmd_move(target_facility))
@@ -265,10 +415,45 @@ class Planner:
         """
         向黑板发布系统级补货任务
         【修改】：移除了 parent_task_id 参数和所有的依赖强绑定逻辑
+        缺货的原料按配方图的拓扑顺序（产品在前、原料在后）逐层派发，不递归；
+        共享的中间件汇总各上游的需求后只派发一次，环上的配方只派发自身、不再展开原料。
+        :return: item_id 对应的任务 ID（没有派发时为 None）
         """
         if environment is None:
             return None
-            
+
+        root = str(item_id)
+        needs: Dict[str, int] = {root: amount_needed}
+        facilities: Dict[str, str] = {root: target_facility_name}
+        # requirements 的键即 root 可达的全部原料；实际派发量取决于各层的库存，按拓扑顺序传播
+        reachable = self.recipe_graph.requirements(root, amount_needed)
+        order = [node for node in self.recipe_graph.order if node in reachable] or [root]
+
+        root_task_id = None
+        for node in order:
+            amount = needs.get(node)
+            if not amount:
+                continue
+            node_item_id = item_id if node == root else node
+            task_id, produce = self._post_supply_task(node_item_id, amount, facilities[node], environment)
+            if node == root:
+                root_task_id = task_id
+            if not produce or self.recipe_graph.is_cyclic(node):
+                continue
+            recipe = self.product_to_recipe.get(node) or {}
+            for ing in recipe.get("Ingredients", []):
+                ing_id = str(ing["ItemID"])
+                ing_count = ing["Count"] * amount
+                if self.get_total_item_count(ing_id, environment) < ing_count:
+                    needs[ing_id] = needs.get(ing_id, 0) + ing_count
+                    facilities.setdefault(ing_id, self.product_to_recipe.get(ing_id, {}).get("RequiredFacility", "WorkStation"))
+        return root_task_id
+
+    def _post_supply_task(self, item_id, amount_needed, target_facility_name, environment) -> Tuple[Optional[str], bool]:
+        """
+        为单个物品发布生产或搬运任务（不展开原料）。
+        :return: (任务 ID, 是否新发布了生产任务)；只有新发布的生产任务需要继续为原料补货
+        """
         item_info = self.item_map.get(str(item_id), {})
         item_name = item_info.get("ItemName", f"Item_{item_id}")
         
@@ -282,21 +467,22 @@ class Planner:
         for t in existing_tasks:
             if task_signature_produce in t.description or task_signature_transport in t.description:
                 # print(f"[_trigger_system_supply] 任务已存在，跳过: {t.description}")
-                return t.task_id 
+                return t.task_id, False
 
         # 2. 检查设施库存
         target_stock = self.get_actor_item_count(target_facility_name, item_id, environment)
         # print(f"[_trigger_system_supply] 设施库存: {target_stock}/{amount_needed}")
         if target_stock >= amount_needed:
             # print(f"[_trigger_system_supply] 设施库存充足，无需补货")
-            return None
+            return None, False
 
         # 3. 检查全局库存
         total_stock = self.get_total_item_count(item_id, environment)
         # print(f"[_trigger_system_supply] 全局库存: {total_stock}/{amount_needed}")
         new_task = None
+        produce = total_stock < amount_needed
 
-        if total_stock < amount_needed:
+        if produce:
             # === 分支 A: 生产任务 ===
             # print(f"[_trigger_system_supply] 全局库存不足，创建生产任务")
             recipe = self.product_to_recipe.get(str(item_id))
@@ -328,13 +514,6 @@ class Planner:
                         operator=">=", 
                         value=ing_count
                     ))
-                    
-                    # 顺便递归派发一下原材料的生产/搬运任务
-                    ing_stock = self.get_total_item_count(ing_id, environment)
-                    if ing_stock < ing_count:
-                        ingredient_target = self.product_to_recipe.get(ing_id, {}).get("RequiredFacility", "WorkStation")
-                        # print(f"[_trigger_system_supply] 递归补货原材料: {ing_id} x{ing_count}")
-                        self._trigger_system_supply(ing_id, ing_count, ingredient_target, environment)
 
             new_task = BlackboardTask(
                 description=full_desc,
@@ -347,7 +526,7 @@ class Planner:
         else:
             # === 分支 B: 搬运任务 ===
             # print(f"[_trigger_system_supply] 全局库存充足，创建搬运任务")
-            source_actor = self.find_actor_with_item(item_id, 1, environment, exclude_actor=target_facility_name) or "Storage"
+            source_actor = self.find_actor_with_item(item_id, 1, environment, exclude_actor=target_facility_name, near=target_facility_name) or "Storage"
             full_desc = f"{task_signature_transport} (From {source_actor} to {target_facility_name})"
             
             # 搬运的目标是：指定设施库存足够
@@ -376,7 +555,7 @@ class Planner:
         if new_task:
             self.blackboard.post_task(new_task)
             # print(f"[_trigger_system_supply] 任务已发布到黑板: {new_task.task_id}")
-        return new_task.task_id if new_task else None
+        return (new_task.task_id, produce) if new_task else (None, False)
 
     # === planner.py ===
 
@@ -496,13 +675,35 @@ class Planner:
     def _build_supply_chain(self, item_id, amount_needed, target_facility, environment, requirement_map=None):
         """
         全自动声明式供应链：同时发布搬运和生产任务，由系统状态自动解锁
+        按深度优先顺序迭代展开（任务发布顺序与逐层递归相同）；环上的配方不向下展开。
+        给出 requirement_map 时各物品的需求量与路径无关，共享的中间件只展开一次。
         """
-        item_id = str(item_id)
-        if requirement_map and item_id in requirement_map:
-            amount_needed = requirement_map[item_id]
+        wrapped_env = {"Environment": environment} if "Environment" not in environment else environment
+        expanded = set()
+        # 栈元素：("expand", 物品, 需求量, 目标设施) 或 ("post", 生产任务)；生产任务在其原料展开之后发布
+        stack = [("expand", str(item_id), amount_needed, target_facility)]
+        while stack:
+            entry = stack.pop()
+            if entry[0] == "post":
+                self.blackboard.post_task(entry[1])
+                continue
+            _, item_id, amount_needed, target_facility = entry
+            if requirement_map and item_id in requirement_map:
+                amount_needed = requirement_map[item_id]
+                if (item_id, target_facility) in expanded:
+                    continue
+                expanded.add((item_id, target_facility))
+            task_produce, children = self._supply_chain_step(item_id, amount_needed, target_facility, environment, wrapped_env)
+            if task_produce is not None:
+                stack.append(("post", task_produce))
+            for sub_id, total_sub_count, produce_facility in reversed(children):
+                stack.append(("expand", sub_id, total_sub_count, produce_facility))
 
+    def _supply_chain_step(self, item_id, amount_needed, target_facility, environment, wrapped_env):
+        """
+        供应链中的一个节点：立即发布搬运任务，返回 (待发布的生产任务, 需继续展开的原料列表)
+        """
         item_name = self.item_map.get(str(item_id), {}).get("ItemName", f"Item_{item_id}")
-        wrapped_env = {"Environment": environment} if "Environment" not in environment else environment
         transport_counter = f"deliver:{item_id}:{target_facility}"
         produce_counter = f"produce:{item_id}"
         transport_done = self.blackboard.progress_counters.get(transport_counter, 0) >= int(amount_needed)
@@ -519,7 +720,7 @@ class Planner:
         # 任务 1：搬运任务 
         # ==========================================
         if (not transport_done) and (not goal_facility_has_item.is_satisfied(wrapped_env)):
-            source_actor = self.find_actor_with_item(item_id, 1, environment, exclude_actor=target_facility) or "Storage"
+            source_actor = self.find_actor_with_item(item_id, 1, environment, exclude_actor=target_facility, near=target_facility) or "Storage"
             task_transport = BlackboardTask(
                 description=f"System Request: Transport {item_name} (From {source_actor} To {target_facility})",
                 goal=goal_facility_has_item, 
@@ -541,6 +742,7 @@ class Planner:
         # ==========================================
         # 任务 2：生产任务 
         # ==========================================
+        children = []
         if (not produce_done) and (not cond_global_has_item.is_satisfied(wrapped_env)):
             recipe = self.product_to_recipe.get(str(item_id))
             skill_name = None
@@ -550,6 +752,7 @@ class Planner:
             if recipe:
                 skill_name = next(iter(recipe.get("RequiredSkill", {}))) if recipe.get("RequiredSkill") else None
                 produce_facility = recipe.get("RequiredFacility", "WorkStation")
+                expand = not self.recipe_graph.is_cyclic(item_id)
                 
                 for sub_ing in recipe.get("Ingredients", []):
                     sub_id = str(sub_ing["ItemID"])
@@ -562,8 +765,9 @@ class Planner:
                     produce_preconds.append(
                         Goal(target_actor="Global", property_type="Inventory", key=sub_id, operator=">=", value=single_sub_count)
                     )
-                    # 递归供应链时，必须继续索要总需求
-                    self._build_supply_chain(sub_id, total_sub_count, produce_facility, environment, requirement_map)
+                    # 继续展开供应链时，必须继续索要总需求
+                    if expand:
+                        children.append((sub_id, total_sub_count, produce_facility))
                     
             task_produce = BlackboardTask(
                 description=f"System Request: Produce {item_name}",
@@ -583,4 +787,5 @@ class Planner:
                     task_produce.progress_actor = str(produce_facility)
             elif str(item_name).lower() in {"cotton", "corn"}:
                 task_produce.progress_actor_prefix = "CultivateChamber"
-            self.blackboard.post_task(task_produce)
\ No newline at end of file
+            return task_produce, children
+        return None, children
@@ -0,0 +1,192 @@
+'''
+配方图编译
+在加载 Task.json / Item.json 时一次性构建 "产品 -> 原料" 图，并做静态检查：
+- 环：配方直接或间接需要自身（如 A 需要 B、B 需要 A），环上的配方不再向下展开，避免递归无限进行
+- 拓扑深度：原料（无配料的配方）深度为 0，其余为 1 + 最深原料的深度
+- 无法生产：被用作原料却没有对应配方的物品
+- 不可达：依赖链中含有无法生产的物品或环，从种植原料出发永远做不出来的产品
+- 未知物品：配方中引用、但 Item.json 中不存在的物品 ID
+
+Planner 的需求展开使用预先计算的拓扑顺序迭代完成（requirements），不再依赖无界递归。
+'''
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class RecipeGraph:
+    def __init__(self):
+        # 产品 ID -> [(原料 ID, 单次用量)]；ID 一律为字符串
+        self.ingredients: Dict[str, List[Tuple[str, int]]] = {}
+        self.items: Set[str] = set()
+        self.depth: Dict[str, int] = {}
+        # 产品在前、原料在后的拓扑顺序（环上的配方不展开，不影响顺序的正确性）
+        self.order: List[str] = []
+        self.cycles: List[List[str]] = []
+        self.cyclic: Set[str] = set()
+        self.unproducible: Set[str] = set()
+        self.unreachable: Set[str] = set()
+        self.unknown_items: Set[str] = set()
+
+    @classmethod
+    def compile(cls, items: Iterable[Dict], tasks: Iterable[Dict]) -> "RecipeGraph":
+        graph = cls()
+        graph.items = {str(i["ItemID"]) for i in items}
+        for task in tasks:
+            product = str(task["ProductID"])
+            graph.ingredients[product] = [
+                (str(ing["ItemID"]), int(ing.get("Count", 1))) for ing in task.get("Ingredients", [])
+            ]
+
+        referenced = set(graph.ingredients)
+        for edges in graph.ingredients.values():
+            referenced.update(sub for sub, _ in edges)
+        graph.unknown_items = {i for i in referenced if i not in graph.items}
+        graph.unproducible = {i for i in referenced if i not in graph.ingredients}
+
+        graph.cycles = graph._find_cycles()
+        graph.cyclic = {item for cycle in graph.cycles for item in cycle}
+        graph._compute_order_and_depth()
+        graph._compute_unreachable()
+        return graph
+
+    # ========== 编译 ==========
+    def _edges(self, item_id: str) -> List[Tuple[str, int]]:
+        """用于展开的原料边：环上的配方视为叶子"""
+        if item_id in self.cyclic:
+            return []
+        return self.ingredients.get(item_id, [])
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Tarjan 强连通分量（迭代实现）；大小大于 1 或含自环的分量即为一个环"""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        cycles: List[List[str]] = []
+        counter = 0
+
+        for root in self.ingredients:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, edge_i = work.pop()
+                if edge_i == 0:
+                    index[node] = lowlink[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                edges = self.ingredients.get(node, [])
+                recurse = False
+                while edge_i < len(edges):
+                    sub = edges[edge_i][0]
+                    edge_i += 1
+                    if sub not in index:
+                        work.append((node, edge_i))
+                        work.append((sub, 0))
+                        recurse = True
+                        break
+                    if sub in on_stack:
+                        lowlink[node] = min(lowlink[node], index[sub])
+                if recurse:
+                    continue
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    self_loop = any(sub == node for sub, _ in self.ingredients.get(node, []))
+                    if len(component) > 1 or self_loop:
+                        cycles.append(sorted(component))
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+        return cycles
+
+    def _compute_order_and_depth(self) -> None:
+        """环已断开后，按后序求深度，逆后序即为产品在前的拓扑顺序"""
+        post: List[str] = []
+        visited: Set[str] = set()
+        nodes = list(self.ingredients) + sorted(self.unproducible)
+        for root in nodes:
+            if root in visited:
+                continue
+            visited.add(root)
+            work = [(root, iter(self._edges(root)))]
+            while work:
+                node, edges = work[-1]
+                for sub, _ in edges:
+                    if sub not in visited:
+                        visited.add(sub)
+                        work.append((sub, iter(self._edges(sub))))
+                        break
+                else:
+                    work.pop()
+                    subs = self._edges(node)
+                    self.depth[node] = 1 + max(self.depth[s] for s, _ in subs) if subs else 0
+                    post.append(node)
+        self.order = post[::-1]
+
+    def _compute_unreachable(self) -> None:
+        # 原料先于产品处理（后序），依赖了不可达原料的产品同样不可达
+        blocked = set(self.unproducible) | self.cyclic
+        for item in reversed(self.order):
+            if item in blocked:
+                continue
+            if any(sub in blocked for sub, _ in self.ingredients.get(item, [])):
+                blocked.add(item)
+        self.unreachable = {i for i in blocked if i in self.ingredients}
+
+    # ========== 查询 ==========
+    def is_cyclic(self, item_id) -> bool:
+        return str(item_id) in self.cyclic
+
+    def requirements(self, item_id, amount: int) -> Dict[str, int]:
+        """
+        item_id 需要 amount 个时，它自身及所有下游原料的总需求（含 item_id 本身）。
+        按拓扑顺序一次传播完成，共享的中间件只处理一次；环上的配方不展开。
+        """
+        root = str(item_id)
+        needs: Dict[str, int] = {root: int(amount)}
+        if root not in self.depth:
+            return needs
+        # 只遍历从 root 出发可达的部分
+        reachable = {root}
+        frontier = [root]
+        while frontier:
+            node = frontier.pop()
+            for sub, _ in self._edges(node):
+                if sub not in reachable:
+                    reachable.add(sub)
+                    frontier.append(sub)
+        for node in self.order:
+            if node not in reachable:
+                continue
+            amount_here = needs.get(node, 0)
+            if not amount_here:
+                continue
+            for sub, count in self._edges(node):
+                needs[sub] = needs.get(sub, 0) + count * amount_here
+        return needs
+
+    def problems(self, names: Optional[Dict[str, str]] = None) -> List[str]:
+        """人类可读的问题列表；配方图没有问题时为空"""
+        names = names or {}
+
+        def label(item_id: str) -> str:
+            name = names.get(item_id)
+            return f"{name}({item_id})" if name else item_id
+
+        lines = []
+        for cycle in self.cycles:
+            lines.append("recipe cycle among: " + ", ".join(label(i) for i in cycle))
+        if self.unknown_items:
+            lines.append("unknown item ids: " + ", ".join(label(i) for i in sorted(self.unknown_items)))
+        if self.unproducible:
+            lines.append("no recipe for ingredient: " + ", ".join(label(i) for i in sorted(self.unproducible)))
+        if self.unreachable:
+            lines.append("cannot be produced from raw resources: " + ", ".join(label(i) for i in sorted(self.unreachable)))
+        return lines
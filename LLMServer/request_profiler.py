@@ -0,0 +1,184 @@
+'''
+GetInstruction 请求采样剖析
+设置 RIMSPACE_PROFILE_EVERY=N（N>0）后，每 N 个 /GetInstruction 请求用 cProfile 剖析一次，
+结果写到服务器日志旁的 <日志名>_profiles/ 目录：
+- <序号>_<角色>.prof    pstats 格式，可用 snakeviz / pstats 查看
+- <序号>_<角色>.folded  折叠调用栈（flamegraph.pl / speedscope 可直接读取），单位为微秒
+
+cProfile 同一时刻只能剖析一个线程，多线程服务器上并发的采样请求会被跳过（不影响请求本身）。
+
+汇总多个请求的剖析结果：
+  python request_profiler.py ../Log/Server_xxx_profiles --top 30
+  python request_profiler.py ../Log/Server_xxx_profiles --folded merged.folded --merged merged.prof
+'''
+
+import argparse
+import cProfile
+import glob
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 折叠调用栈展开时的最大深度，防止病态调用图导致输出爆炸
+_MAX_STACK_DEPTH = 64
+
+_counter = itertools.count(1)
+_active_lock = threading.Lock()
+_active = False
+
+
+def profile_every() -> int:
+    try:
+        return max(0, int(os.environ.get("RIMSPACE_PROFILE_EVERY", "0").strip() or 0))
+    except ValueError:
+        return 0
+
+
+def profile_dir_for(server_log_path: str) -> str:
+    custom = os.environ.get("RIMSPACE_PROFILE_DIR", "").strip()
+    if custom:
+        return os.path.abspath(custom)
+    stem, _ = os.path.splitext(server_log_path)
+    return f"{stem}_profiles"
+
+
+def start_if_sampled() -> Optional[Tuple[int, cProfile.Profile]]:
+    """按采样间隔决定是否剖析当前请求；返回 (序号, Profile) 或 None"""
+    global _active
+    every = profile_every()
+    if every <= 0:
+        return None
+    seq = next(_counter)
+    if seq % every != 0:
+        return None
+    with _active_lock:
+        if _active:
+            return None
+        _active = True
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # 其他剖析工具已经在运行
+        with _active_lock:
+            _active = False
+        return None
+    return seq, profiler
+
+
+def finish(sample: Tuple[int, cProfile.Profile], out_dir: str, label: str = "") -> str:
+    """停止剖析并写出 .prof 与 .folded，返回 .prof 路径"""
+    global _active
+    seq, profiler = sample
+    try:
+        profiler.disable()
+    finally:
+        with _active_lock:
+            _active = False
+    os.makedirs(out_dir, exist_ok=True)
+    safe_label = re.sub(r"[^0-9A-Za-z_-]+", "_", label) or "request"
+    base = os.path.join(out_dir, f"{seq:06d}_{safe_label}")
+    profiler.dump_stats(base + ".prof")
+    stats = pstats.Stats(profiler)
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        f.write(format_folded(collapse_stacks(stats)))
+    return base + ".prof"
+
+
+def _func_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # 内置函数，如 <built-in method builtins.len>
+        return name.replace(";", ",")
+    return f"{os.path.basename(filename)}:{name}:{line}".replace(";", ",")
+
+
+def collapse_stacks(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    把 cProfile 的调用者-被调用者图展开为折叠调用栈 {"a;b;c": 微秒}。
+    cProfile 只记录调用边而不记录完整调用栈，因此某个函数在不同调用路径上的耗时
+    按各调用边的累计时间占比分摊，是近似结果；递归调用在展开时截断。
+    """
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in raw.items() if not entry[4]]
+
+    folded: Dict[str, float] = {}
+
+    def walk(func, path: List[str], on_path: set, fraction: float, depth: int):
+        cc, nc, tt, ct, _ = raw[func]
+        stack = path + [_func_label(func)]
+        key = ";".join(stack)
+        self_time = tt * fraction
+        if self_time > 0:
+            folded[key] = folded.get(key, 0.0) + self_time * 1e6
+        if depth >= _MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = raw[callee][3]
+            if callee in on_path or callee_ct <= 0 or edge_ct <= 0:
+                continue
+            on_path.add(callee)
+            walk(callee, stack, on_path, fraction * edge_ct / callee_ct, depth + 1)
+            on_path.discard(callee)
+
+    for root in roots:
+        walk(root, [], {root}, 1.0, 0)
+    return folded
+
+
+def format_folded(folded: Dict[str, float]) -> str:
+    lines = [f"{stack} {int(round(us))}" for stack, us in sorted(folded.items()) if us >= 0.5]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _read_folded(path: str, into: Dict[str, float]) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stack, _, value = line.rstrip("\n").rpartition(" ")
+            if stack:
+                into[stack] = into.get(stack, 0.0) + float(value)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Aggregate per-request GetInstruction profiles.")
+    parser.add_argument("profile_dir", help="Directory containing .prof/.folded files")
+    parser.add_argument("--top", type=int, default=25, help="Print the top N functions by cumulative time")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, ncalls...)")
+    parser.add_argument("--folded", default="", help="Write merged collapsed stacks (flame-graph input) to this path")
+    parser.add_argument("--merged", default="", help="Write merged pstats to this path")
+    args = parser.parse_args()
+
+    prof_files = sorted(glob.glob(os.path.join(args.profile_dir, "*.prof")))
+    if not prof_files:
+        print(f"[Profile] no .prof files in {args.profile_dir}")
+        return 1
+
+    stats = pstats.Stats(prof_files[0])
+    for path in prof_files[1:]:
+        stats.add(path)
+    print(f"[Profile] {len(prof_files)} sampled requests from {os.path.abspath(args.profile_dir)}")
+    stats.sort_stats(args.sort).print_stats(args.top)
+
+    if args.merged:
+        stats.dump_stats(args.merged)
+        print(f"[Profile] merged stats written to {args.merged}")
+    if args.folded:
+        folded: Dict[str, float] = {}
+        for path in sorted(glob.glob(os.path.join(args.profile_dir, "*.folded"))):
+            _read_folded(path, folded)
+        with open(args.folded, "w", encoding="utf-8") as f:
+            f.write(format_folded(folded))
+        print(f"[Profile] collapsed stacks written to {args.folded}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,7 @@ from typing import Dict, List, Any
 
 import requests
 
+from http_client import PooledHttpClient
 from sim_production_mission import SimWorld, build_default_world
 
 
@@ -34,6 +35,16 @@ class EpisodeMetrics:
     intent_total: int
     intent_errors: int
     intent_accuracy: float
+    # 按决策来源统计的指令数（Decision.decision_source：llm / fast_path / assignment）
+    llm_commands: int = 0
+    fast_path_commands: int = 0
+    assignment_commands: int = 0
+    # 每步 HTTP 耗时（毫秒）：往返均值/p95、服务器处理、网络与连接、响应解码
+    http_roundtrip_ms: float = 0.0
+    http_roundtrip_p95_ms: float = 0.0
+    http_server_ms: float = 0.0
+    http_network_ms: float = 0.0
+    http_decode_ms: float = 0.0
 
 
 @dataclass
@@ -67,16 +78,9 @@ class IntentIssue:
     detail: str
 
 
-def _post_json(server_url: str, payload: Dict, timeout: float) -> Dict:
+def _post_json(http: PooledHttpClient, server_url: str, payload, timeout: float) -> Dict:
     try:
-        response = requests.post(
-            server_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        return response.json()
+        return http.post_json(server_url, payload, timeout)
     except requests.exceptions.HTTPError as exc:
         status = exc.response.status_code if exc.response is not None else "unknown"
         body = exc.response.text if exc.response is not None else ""
@@ -96,6 +100,17 @@ def _get_json(url: str, timeout: float = 2.0) -> Dict:
     return response.json()
 
 
+def _http_timing_fields(http: PooledHttpClient) -> Dict[str, float]:
+    stats = http.summary()
+    return {
+        "http_roundtrip_ms": stats["roundtrip_ms_mean"],
+        "http_roundtrip_p95_ms": stats["roundtrip_ms_p95"],
+        "http_server_ms": stats["server_ms_mean"],
+        "http_network_ms": stats["network_ms_mean"],
+        "http_decode_ms": stats["decode_ms_mean"],
+    }
+
+
 def _find_char(world: SimWorld, name: str) -> Dict:
     for c in world.characters.get("Characters", []):
         if c.get("CharacterName") == name:
@@ -208,6 +223,8 @@ def _run_episode(
     coat_goal: int,
 ) -> EpisodeMetrics:
     world = SimWorld(build_default_world(meal_goal=meal_goal, coat_goal=coat_goal))
+    # 每个 episode 对应一个新启动的服务器进程，连接池随 episode 新建
+    http = PooledHttpClient(pool_size=1)
 
     rounds = 0
     total_commands = 0
@@ -218,6 +235,7 @@ def _run_episode(
         "transport_no_item_wait": 0,
         "intent_total": 0,
     }
+    source_counts = {"llm": 0, "fast_path": 0, "assignment": 0}
     issues: List[Dict[str, Any]] = []
 
     success = 0
@@ -232,9 +250,9 @@ def _run_episode(
         print(f"[{mode}] ep={episode_idx} round={rounds}/{max_rounds} ...", flush=True)
 
         for agent in agents:
-            payload = world.build_request(agent)
+            payload = world.build_request_bytes(agent)
             try:
-                decision = _post_json(server_url, payload, timeout)
+                decision = _post_json(http, server_url, payload, timeout)
             except Exception as exc:
                 print(
                     f"[{mode}] ep={episode_idx} round={rounds} agent={agent} request_failed: {exc}",
@@ -257,9 +275,17 @@ def _run_episode(
                     intent_total=counts["intent_total"],
                     intent_errors=intent_errors,
                     intent_accuracy=intent_accuracy,
+                    llm_commands=source_counts["llm"],
+                    fast_path_commands=source_counts["fast_path"],
+                    assignment_commands=source_counts["assignment"],
+                    **_http_timing_fields(http),
                 )
 
             total_commands += 1
+            decision_meta = decision.get("Decision") if isinstance(decision.get("Decision"), dict) else {}
+            source = decision_meta.get("decision_source", "llm")
+            if source in source_counts:
+                source_counts[source] += 1
             if decision.get("CommandType", "Wait") == "Wait":
                 wait_commands += 1
                 round_waits += 1
@@ -316,7 +342,12 @@ def _run_episode(
         intent_total=counts["intent_total"],
         intent_errors=intent_errors,
         intent_accuracy=intent_accuracy,
+        llm_commands=source_counts["llm"],
+        fast_path_commands=source_counts["fast_path"],
+        assignment_commands=source_counts["assignment"],
+        **_http_timing_fields(http),
     )
+    http.close()
     setattr(metrics, "intent_issues", issues)
     return metrics
 
@@ -355,7 +386,7 @@ def _wait_server_ready(base_url: str, timeout_s: float = 30.0) -> None:
                 return
         except Exception as exc:
             last_err = str(exc)
-        time.sleep(0.5)
+        time.sleep(0.05)
     raise RuntimeError(f"Server not ready after {timeout_s}s: {last_err}")
 
 
@@ -366,9 +397,12 @@ def _spawn_server(
     no_blackboard_basic_tasks: bool,
     no_blackboard_disable_filter: bool,
     server_log_path: str,
+    fast_path: str = "",
 ) -> subprocess.Popen:
     env = os.environ.copy()
     env["RIMSPACE_SERVER_DEBUG"] = "0"
+    if fast_path:
+        env["RIMSPACE_FAST_PATH"] = fast_path
     env["RIMSPACE_ABLATION_MODE"] = mode
     env["RIMSPACE_SERVER_LOG_PATH"] = server_log_path
 
@@ -449,6 +483,11 @@ def main() -> int:
         action="store_true",
         help="In no_blackboard mode, keep filter-disable switch on (mostly for debugging).",
     )
+    parser.add_argument(
+        "--fast-path",
+        default="",
+        help="Enable rule-based fast-path decisions on the server: 'all' or a subset like 'eat,idle' (default off).",
+    )
     args = parser.parse_args()
 
     modes = [m.strip().lower() for m in args.modes.split(",") if m.strip()]
@@ -478,6 +517,7 @@ def main() -> int:
                 no_blackboard_basic_tasks=args.no_bb_basic_tasks,
                 no_blackboard_disable_filter=args.no_bb_disable_filter,
                 server_log_path=server_log_path,
+                fast_path=args.fast_path,
             )
             try:
                 _wait_server_ready(args.server, timeout_s=30.0)
@@ -531,7 +571,9 @@ def main() -> int:
                 print(
                     f"[{mode}] ep={ep} success={m.success} rounds={m.rounds} "
                     f"wait={m.wait_rate:.3f} intent_acc={m.intent_accuracy:.3f} "
-                    f"skill_err={m.skill_errors} no_item={m.transport_no_item} no_item_wait={m.transport_no_item_wait}",
+                    f"skill_err={m.skill_errors} no_item={m.transport_no_item} no_item_wait={m.transport_no_item_wait} "
+                    f"llm_cmds={m.llm_commands} fast_cmds={m.fast_path_commands} "
+                    f"http_ms={m.http_roundtrip_ms:.1f} (server={m.http_server_ms:.1f} net={m.http_network_ms:.1f})",
                     flush=True,
                 )
                 if episode_issues:
@@ -0,0 +1,166 @@
+'''
+LLMServer 日志
+- 控制台输出按级别过滤：RIMSPACE_LOG_LEVEL（默认 INFO）。逐行明细（黑板任务列表、新任务、决策）为 DEBUG，
+  默认只输出按时间限流的请求汇总行（RIMSPACE_LOG_SUMMARY_SECONDS，默认 10 秒，0 表示关闭）
+- 服务器日志文件（Server_*.log）写入的内容不受控制台级别影响，与原先逐行写入的内容相同
+- 控制台与文件都由后台线程写出（QueueHandler + QueueListener），请求线程只负责把记录放进队列
+
+未调用 configure() 时（单元测试、脚本直接使用 Blackboard / Agent），DEBUG / INFO 记录直接丢弃。
+'''
+
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+logger = logging.getLogger("rimspace")
+
+_queue: Optional[queue.Queue] = None
+_listener: Optional[QueueListener] = None
+_console_level = logging.WARNING
+_configure_lock = threading.Lock()
+
+
+def _level_from_env() -> int:
+    name = os.environ.get("RIMSPACE_LOG_LEVEL", "INFO").strip().upper()
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def _summary_interval() -> float:
+    try:
+        return max(0.0, float(os.environ.get("RIMSPACE_LOG_SUMMARY_SECONDS", "10")))
+    except ValueError:
+        return 10.0
+
+
+class _SafeConsoleHandler(logging.StreamHandler):
+    """gbk 等旧式控制台无法编码的字符替换为 ?，不抛出异常"""
+
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+            try:
+                self.stream.write(msg + self.terminator)
+            except UnicodeEncodeError:
+                enc = getattr(self.stream, "encoding", None) or "utf-8"
+                self.stream.write(msg.encode(enc, errors="replace").decode(enc, errors="replace") + self.terminator)
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class _ServerLogFilter(logging.Filter):
+    def filter(self, record):
+        return getattr(record, "server_log", False)
+
+
+def configure(server_log_path: Optional[str] = None) -> None:
+    """启动后台写日志线程；重复调用无副作用"""
+    global _queue, _listener, _console_level
+    with _configure_lock:
+        if _listener is not None:
+            return
+        _console_level = _level_from_env()
+
+        console = _SafeConsoleHandler(sys.stdout)
+        console.setLevel(_console_level)
+        console.setFormatter(logging.Formatter("%(message)s"))
+        handlers = [console]
+        if server_log_path:
+            file_handler = logging.FileHandler(server_log_path, mode="a", encoding="utf-8", delay=True)
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(logging.Formatter("%(message)s"))
+            file_handler.addFilter(_ServerLogFilter())
+            handlers.append(file_handler)
+
+        _queue = queue.Queue(-1)
+        logger.addHandler(QueueHandler(_queue))
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """写完队列中剩余的记录并停止后台线程"""
+    global _listener
+    with _configure_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def flush() -> None:
+    """等待队列中已有的记录全部写出"""
+    if _queue is not None and _listener is not None:
+        _queue.join()
+
+
+def console_enabled(level: int) -> bool:
+    return _listener is not None and level >= _console_level
+
+
+def log(message: str, level: int = logging.DEBUG) -> None:
+    """只输出到控制台（按级别过滤）"""
+    if level >= logging.WARNING or console_enabled(level):
+        logger.log(level, message)
+
+
+def server_log(message: str, level: int = logging.DEBUG) -> None:
+    """写入服务器日志文件（不受级别影响），同时按级别输出到控制台"""
+    logger.log(level, message, extra={"server_log": True})
+
+
+class RequestSummary:
+    """
+    按时间窗口汇总请求：每个窗口结束后输出一行 INFO，
+    替代默认级别下被关闭的逐行输出，用于确认服务器仍在正常运转。
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = _summary_interval() if interval is None else interval
+        self._lock = threading.Lock()
+        self._reset(time.monotonic())
+
+    def _reset(self, now: float) -> None:
+        self.window_start = now
+        self.requests = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.sources: Dict[str, int] = {}
+        self.task_count = 0
+
+    def note(self, elapsed_s: float, source: str = "", ok: bool = True, task_count: Optional[int] = None) -> Optional[str]:
+        """记录一次请求；窗口到期时返回（并输出）汇总行"""
+        if self.interval <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.errors += 0 if ok else 1
+            self.total_s += elapsed_s
+            self.max_s = max(self.max_s, elapsed_s)
+            if source:
+                self.sources[source] = self.sources.get(source, 0) + 1
+            if task_count is not None:
+                self.task_count = task_count
+            window = now - self.window_start
+            if window < self.interval:
+                return None
+            sources = " ".join(f"{name}={count}" for name, count in sorted(self.sources.items())) or "-"
+            line = (
+                f"[Summary] {self.requests} requests in {window:.1f}s ({self.requests / window:.1f}/s), "
+                f"mean {self.total_s * 1000.0 / self.requests:.1f} ms, max {self.max_s * 1000.0:.1f} ms, "
+                f"errors {self.errors}, sources {sources}, blackboard tasks {self.task_count}"
+            )
+            self._reset(now)
+        log(line, logging.INFO)
+        return line
@@ -0,0 +1,112 @@
+'''
+LLMServer 运行指标（计数器 + 直方图），通过 /metrics 以 Prometheus 文本格式导出
+- 所有指标保存在进程内，记录一次只是加锁后更新字典，生产环境可以常开
+- 直方图桶在 HISTOGRAMS 中固定声明；计数器的标签在记录时给出
+- 多 worker（多进程）部署时每个进程各自统计，由 Prometheus 按实例汇总
+
+主要指标：
+- rimspace_requests_total{route,status}      各接口请求数
+- rimspace_request_seconds{route}             请求总耗时
+- rimspace_phase_seconds{phase}               各阶段耗时（阶段划分见 phase_timer.py）
+- rimspace_decisions_total{source}            决策来源：queue / assignment / fast_path / prefetch / llm
+- rimspace_llm_calls_total{kind}              LLM 调用次数：sync（请求内）/ prefetch（后台预取）
+- rimspace_prefetch_total{result}             预取结果：hit / stale
+- rimspace_tasks_posted_total{result}         黑板任务发布：new / refreshed（重复目标沿用原任务）
+- rimspace_prompt_chars                       Prompt 大小（system + user 字符数）
+'''
+
+import threading
+from typing import Dict, List, Tuple
+
+_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_PROMPT_CHAR_BUCKETS = (1000, 2000, 4000, 6000, 8000, 12000, 16000, 24000, 32000, 64000)
+
+# 名称 -> (类型, 说明, 直方图桶)
+_METRICS: Dict[str, Tuple[str, str, tuple]] = {
+    "rimspace_requests_total": ("counter", "HTTP requests handled, by route and status code.", ()),
+    "rimspace_request_seconds": ("histogram", "Server-side request latency in seconds.", _SECONDS_BUCKETS),
+    "rimspace_phase_seconds": ("histogram", "Exclusive time per GetInstruction phase in seconds.", _SECONDS_BUCKETS),
+    "rimspace_decisions_total": ("counter", "Commands returned, by decision source.", ()),
+    "rimspace_llm_calls_total": ("counter", "LLM queries issued, by kind.", ()),
+    "rimspace_prefetch_total": ("counter", "Prefetched LLM results consumed or discarded.", ()),
+    "rimspace_tasks_posted_total": ("counter", "Blackboard task posts, new or refreshing an existing goal.", ()),
+    "rimspace_prompt_chars": ("histogram", "Prompt size (system + user) in characters.", _PROMPT_CHAR_BUCKETS),
+}
+
+_lock = threading.Lock()
+# 计数器: (名称, 标签) -> 值；直方图: (名称, 标签) -> [各桶计数..., +Inf 计数, 总和]
+_counters: Dict[Tuple[str, tuple], float] = {}
+_histograms: Dict[Tuple[str, tuple], List[float]] = {}
+
+
+def _label_key(labels: Dict[str, str]) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, amount: float = 1.0, **labels) -> None:
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+
+
+def observe(name: str, value: float, **labels) -> None:
+    buckets = _METRICS[name][2]
+    key = (name, _label_key(labels))
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0.0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(buckets)] += 1
+        series[-1] += value
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels: tuple, extra: Tuple[str, str] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_prometheus() -> str:
+    """导出为 Prometheus 文本格式（text/plain; version=0.0.4）"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    lines: List[str] = []
+    for name, (kind, help_text, buckets) in _METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            continue
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0.0
+            for bound, count in zip(buckets, series):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', repr(float(bound))))} {_format_value(cumulative)}")
+            cumulative += series[len(buckets)]
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
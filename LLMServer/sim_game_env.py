@@ -5,10 +5,9 @@ import sys
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
-try:
-    import requests
-except ImportError:  # pragma: no cover - runtime check
-    requests = None
+from http_client import PooledHttpClient
+
+_http_client: Optional[PooledHttpClient] = None
 
 
 def _fmt_time(day: int, hour: int, minute: int) -> str:
@@ -268,14 +267,10 @@ def build_default_world() -> Dict:
 
 
 def _send_request(server_url: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
-    if requests is None:
-        raise RuntimeError("requests is not installed. Run: pip install requests")
-    kwargs = {"json": payload, "headers": {"Content-Type": "application/json"}}
-    if timeout is not None:
-        kwargs["timeout"] = timeout
-    response = requests.post(server_url, **kwargs)
-    response.raise_for_status()
-    return response.json()
+    global _http_client
+    if _http_client is None:
+        _http_client = PooledHttpClient()
+    return _http_client.post_json(server_url, payload, timeout)
 
 
 def main() -> int:
@@ -3,14 +3,19 @@ import copy
 import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 try:
-    import requests
-except ImportError:  # pragma: no cover - runtime check
-    requests = None
+    import orjson
+except ImportError:  # pragma: no cover - optional fast encoder
+    orjson = None
+
+from http_client import PooledHttpClient
+from plan_stream import PLAN_RESPONSE_MODE, check_preconditions
 
 
 LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "Log")
@@ -54,6 +59,29 @@ def _remove_item(inv: Dict[str, int], item_id: int, count: int) -> bool:
     return True
 
 
+def dumps_bytes(obj) -> bytes:
+    """序列化为 UTF-8 JSON 字节；安装了 orjson 时使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_request(target_agent: str, game_time: str, environment: bytes, characters: bytes,
+                   deltas: List[Dict], extra: Optional[Dict] = None) -> bytes:
+    """拼接 GetInstruction 请求体；environment / characters 为已编码的字节，可跨请求复用"""
+    parts = [
+        b'{"RequestType":"GetInstruction","TargetAgent":', dumps_bytes(target_agent),
+        b',"GameTime":', dumps_bytes(game_time),
+        b',"Environment":', environment,
+        b',"Characters":', characters,
+        b',"InventoryDeltas":', dumps_bytes(deltas),
+    ]
+    for key, value in (extra or {}).items():
+        parts.extend((b",", dumps_bytes(str(key)), b":", dumps_bytes(value)))
+    parts.append(b"}")
+    return b"".join(parts)
+
+
 def _load_task_product_map() -> Dict[str, int]:
     data_dir = os.path.join(os.path.dirname(__file__), "..", "Data")
     task_path = os.path.join(data_dir, "Task.json")
@@ -111,6 +139,22 @@ class SimWorld:
         self.time = SimTime()
         self.environment = data.get("Environment", {})
         self.characters = data.get("Characters", {})
+        # 自上一次请求以来 Actor 库存的变化，随下一次请求发给服务器（黑板据此累计进度）
+        self.inventory_deltas: List[Dict] = []
+        # 状态版本号：对应部分发生变化时递增；版本未变时复用已编码的字节
+        # （Move / Wait 只改变角色，同一轮内各角色的请求可以共用同一份 Environment）
+        self._env_version = 0
+        self._char_version = 0
+        self._encoded_env = None
+        self._encoded_chars = None
+
+    def mark_dirty(self) -> None:
+        """外部直接修改 environment / characters 后调用，使已编码的请求体失效"""
+        self._env_version += 1
+        self._char_version += 1
+
+    def _record_delta(self, actor: Dict, item_id: int, delta: int) -> None:
+        self.inventory_deltas.append({"ActorName": actor.get("ActorName", ""), "ItemID": int(item_id), "Delta": int(delta)})
 
     def has_pending_tasks(self) -> bool:
         """检查是否还有待执行的任务（TaskList 非空）"""
@@ -121,14 +165,28 @@ class SimWorld:
         return False
 
     def build_request(self, target_agent: str) -> Dict:
+        deltas, self.inventory_deltas = self.inventory_deltas, []
         return {
             "RequestType": "GetInstruction",
             "TargetAgent": target_agent,
             "GameTime": self.time.formatted(),
             "Environment": copy.deepcopy(self.environment),
             "Characters": copy.deepcopy(self.characters),
+            "InventoryDeltas": deltas,
         }
 
+    def build_request_bytes(self, target_agent: str, extra: Optional[Dict] = None) -> bytes:
+        """
+        直接从当前状态编码请求体（不做 deepcopy）；状态未变化时，同一轮内各角色复用同一份 Environment 字节。
+        :param extra: 附加的顶层字段（如 ResponseMode / PlanStatus）
+        """
+        if self._encoded_env is None or self._encoded_env[0] != self._env_version:
+            self._encoded_env = (self._env_version, dumps_bytes(self.environment))
+        if self._encoded_chars is None or self._encoded_chars[0] != self._char_version:
+            self._encoded_chars = (self._char_version, dumps_bytes(self.characters))
+        deltas, self.inventory_deltas = self.inventory_deltas, []
+        return encode_request(target_agent, self.time.formatted(), self._encoded_env[1], self._encoded_chars[1], deltas, extra)
+
     def _find_actor(self, name: str) -> Optional[Dict]:
         for actor in self.environment.get("Actors", []):
             if actor.get("ActorName") == name:
@@ -147,6 +205,9 @@ class SimWorld:
             return
 
         cmd_type = command.get("CommandType", "Wait")
+        self._char_version += 1
+        if cmd_type in {"Take", "Put", "Use"}:
+            self._env_version += 1
         target_name = command.get("TargetName", "")
         param_id = int(command.get("ParamID", 0))
         count = int(command.get("Count", 0))
@@ -172,6 +233,7 @@ class SimWorld:
             inv_char = char.setdefault("Inventory", {})
             if _remove_item(inv_actor, param_id, count):
                 _add_item(inv_char, param_id, count)
+                self._record_delta(actor, param_id, -count)
             char["ActionState"] = "ECharacterActionState::Idle"
             self.time.advance_minutes(1)
             return
@@ -181,6 +243,7 @@ class SimWorld:
             inv_char = char.setdefault("Inventory", {})
             if _remove_item(inv_char, param_id, count):
                 _add_item(inv_actor, param_id, count)
+                self._record_delta(actor, param_id, count)
             char["ActionState"] = "ECharacterActionState::Idle"
             self.time.advance_minutes(1)
             return
@@ -199,6 +262,7 @@ class SimWorld:
                     if product_id is not None:
                         inv_actor = actor.setdefault("Inventory", {})
                         _add_item(inv_actor, product_id, 3)
+                        self._record_delta(actor, product_id, 3)
                     cultivate_info["CurrentPhase"] = "ECultivatePhase::ECP_WaitingToPlant"
                     cultivate_info["CurrentCultivateType"] = "ECultivateType::ECT_None"
                     cultivate_info["GrowthProgress"] = 0
@@ -226,9 +290,11 @@ class SimWorld:
                             ing_count = int(ing.get("Count", 0))
                             if ing_count > 0:
                                 _remove_item(inv_actor, ing_id, ing_count)
+                                self._record_delta(actor, ing_id, -ing_count)
                         product_id = TASK_PRODUCT_MAP.get(task_key)
                         if product_id is not None:
                             _add_item(inv_actor, product_id, 1)
+                            self._record_delta(actor, product_id, 1)
                         # 制作完成后，只有当任务列表中有该任务时才减少
                         if isinstance(task_list, dict) and remaining_tasks > 0:
                             remaining_tasks = max(0, remaining_tasks - 1)
@@ -271,6 +337,7 @@ class SimWorld:
     def tick_environment(self, minutes: int = 1) -> None:
         if minutes <= 0:
             return
+        self._env_version += 1
         for _ in range(minutes):
             self.time.advance_minutes(1)
             for actor in self.environment.get("Actors", []):
@@ -285,6 +352,7 @@ class SimWorld:
 
     def degrade_character_stats(self, degradation: int = 10) -> None:
         """每轮结束后，所有角色的 Hunger 和 Energy 降低"""
+        self._char_version += 1
         for char in self.characters.get("Characters", []):
             stats = char.get("CharacterStats", {})
             stats["Hunger"] = max(0, stats.get("Hunger", 0) - degradation)
@@ -448,15 +516,79 @@ def build_default_world(meal_goal: int = 1, coat_goal: int = 1) -> Dict:
     }
 
 
-def _send_request(server_url: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
-    if requests is None:
-        raise RuntimeError("requests is not installed. Run: pip install requests")
-    kwargs = {"json": payload, "headers": {"Content-Type": "application/json"}}
-    if timeout is not None:
-        kwargs["timeout"] = timeout
-    response = requests.post(server_url, **kwargs)
-    response.raise_for_status()
-    return response.json()
+_http_client: Optional[PooledHttpClient] = None
+
+
+def _get_http_client() -> PooledHttpClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = PooledHttpClient()
+    return _http_client
+
+
+def _send_request(server_url: str, payload, timeout: Optional[float] = None, http: Optional[PooledHttpClient] = None) -> Dict:
+    """
+    payload 可以是 dict，也可以是 build_request_bytes 编码好的字节
+    :param http: 复用连接的客户端（缺省时使用模块共享的客户端）
+    """
+    return (http or _get_http_client()).post_json(server_url, payload, timeout)
+
+
+def _print_http_timings(http: PooledHttpClient) -> None:
+    line = http.format_summary()
+    if line:
+        print(line, flush=True)
+
+
+def _run_world(world, session_id: str, agent_list: List[str], args, http) -> Dict:
+    """在独立会话中推进一个世界，直到 TaskList 清空或达到轮数上限"""
+    rounds = 0
+    requests_sent = 0
+    extra = {"SessionID": session_id}
+    while rounds < args.rounds and world.has_pending_tasks():
+        rounds += 1
+        for agent in agent_list:
+            decision = _send_request(args.server, world.build_request_bytes(agent, extra), args.timeout, http)
+            requests_sent += 1
+            world.apply_command(agent, decision)
+        world.degrade_character_stats(args.degradation)
+        world.tick_environment(12)
+    return {"session": session_id, "rounds": rounds, "requests": requests_sent, "done": not world.has_pending_tasks()}
+
+
+def run_worlds(args, agent_list: List[str]) -> int:
+    """--worlds N：N 个世界各用一个 SessionID，在共享连接池上并发推进"""
+    run_id = datetime.now().strftime("%y%m%d%H%M%S")
+    make_world = SimWorld
+    if args.vectorized:
+        from sim_vector_world import VectorSimWorld
+        make_world = VectorSimWorld
+    worlds = [(f"sim-{run_id}-{i}", make_world(build_default_world())) for i in range(args.worlds)]
+    end_session_url = args.server.rsplit("/", 1)[0] + "/EndSession"
+
+    print(f"  Worlds: {args.worlds} (max {args.rounds} rounds each)", flush=True)
+    http = PooledHttpClient(pool_size=args.worlds)
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.worlds) as pool:
+            futures = [pool.submit(_run_world, world, sid, agent_list, args, http) for sid, world in worlds]
+            results = [f.result() for f in futures]
+    finally:
+        for sid, _ in worlds:
+            try:
+                http.post(end_session_url, json={"SessionID": sid}, timeout=args.timeout)
+            except Exception:
+                pass
+        http.close()
+    elapsed = time.perf_counter() - t0
+
+    for result in results:
+        status = "done" if result["done"] else "unfinished"
+        print(f"  [{result['session']}] rounds={result['rounds']} requests={result['requests']} {status}", flush=True)
+    total_requests = sum(r["requests"] for r in results)
+    print(f"  Total Requests: {total_requests} in {elapsed:.2f}s ({total_requests / max(elapsed, 1e-9):.1f} req/s)", flush=True)
+    _print_http_timings(http)
+    return 0 if all(r["done"] for r in results) else 1
 
 
 def main() -> int:
@@ -471,10 +603,20 @@ def main() -> int:
         parser.add_argument("--degradation", type=int, default=10, help="Hunger/Energy degradation per round")
         parser.add_argument("--interactive", action="store_true", help="Wait for 'n' input after each round")
         parser.add_argument("--task", action="store_true", help="Auto-run until TaskList is empty (no interaction needed)")
+        parser.add_argument("--vectorized", action="store_true", help="Use the NumPy-backed world (requires numpy)")
+        parser.add_argument("--worlds", type=int, default=1, help="Advance N independent worlds concurrently (one server session each, implies --task)")
+        parser.add_argument("--plan-mode", action="store_true", help="Request whole plans and execute them locally until a step fails or the plan completes")
+        parser.add_argument("--quiet", action="store_true", help="Print one summary line per round instead of per-agent lines (the game log is unchanged)")
         args = parser.parse_args()
-
-        world = SimWorld(build_default_world())
         agent_list = [a.strip() for a in args.agents.split(",") if a.strip()]
+        if args.worlds > 1:
+            return run_worlds(args, agent_list)
+
+        if args.vectorized:
+            from sim_vector_world import VectorSimWorld
+            world = VectorSimWorld(build_default_world())
+        else:
+            world = SimWorld(build_default_world())
 
         print("=" * 70, flush=True)
         print("  Production Mission: Make 1 Clothes (ID: 3001)", flush=True)
@@ -490,6 +632,10 @@ def main() -> int:
 
         round_num = 1
         auto_advance = 0
+        request_count = 0
+        # --plan-mode：各角色尚未执行的计划步骤 [(步骤下标, 指令)] 与下一次请求要回调的执行结果
+        local_plans: Dict[str, List] = {}
+        plan_status: Dict[str, Dict] = {}
         while True:
             # 在 --task 模式下，如果没有待执行的任务，停止模拟
             if args.task:
@@ -502,45 +648,82 @@ def main() -> int:
                         task_list = actor.get("TaskList", {})
                         if isinstance(task_list, dict) and task_list:
                             pending_info.append(f"{actor.get('ActorName')}: {task_list}")
-                    if pending_info:
+                    if pending_info and not args.quiet:
                         print(f"[Task Check] Pending tasks: {', '.join(pending_info)}", flush=True)
             
             round_line = f"[===== ROUND {round_num} =====]"
             time_line = f"Time: {world.time.formatted()}"
-            print(f"\n{round_line}", flush=True)
-            print(time_line, flush=True)
+            if not args.quiet:
+                print(f"\n{round_line}", flush=True)
+                print(time_line, flush=True)
             _game_log(round_line)
             _game_log(time_line)
+            round_actions = []
             
             # 每轮中的每个 agent 请求一次
             for agent in agent_list:
-                payload = world.build_request(agent)
-                print(f"  [{agent}] Requesting...", flush=True)
-                try:
-                    decision = _send_request(args.server, payload, args.timeout)
-                except Exception as exc:
-                    print(f"  [{agent}] Request failed: {exc}", flush=True)
-                    return 1
+                decision = None
+                if local_plans.get(agent):
+                    step_index, step = local_plans[agent].pop(0)
+                    reason = check_preconditions(step.get("Preconditions"), world._find_character(agent) or {}, world.environment)
+                    if reason is None:
+                        decision = step
+                    else:
+                        local_plans[agent] = []
+                        plan_status[agent] = {
+                            "Status": "Failed",
+                            "FailedStep": step_index,
+                            "CommandType": step.get("CommandType"),
+                            "Reason": reason,
+                        }
+                        print(f"  [{agent}] Plan step {step_index} failed: {reason}", flush=True)
+
+                if decision is None:
+                    extra = None
+                    if args.plan_mode:
+                        extra = {"ResponseMode": PLAN_RESPONSE_MODE}
+                        if agent in plan_status:
+                            extra["PlanStatus"] = plan_status.pop(agent)
+                    payload = world.build_request_bytes(agent, extra)
+                    if not args.quiet:
+                        print(f"  [{agent}] Requesting...", flush=True)
+                    try:
+                        decision = _send_request(args.server, payload, args.timeout)
+                    except Exception as exc:
+                        print(f"  [{agent}] Request failed: {exc}", flush=True)
+                        return 1
+                    request_count += 1
+                    if args.plan_mode and decision.get("Plan"):
+                        steps = decision["Plan"]
+                        local_plans[agent] = list(enumerate(steps))[1:]
+                        plan_status[agent] = {"Status": "Completed"}
+                        decision = steps[0]
                 world.apply_command(agent, decision)
                 cmd_type = decision.get("CommandType", "Wait")
                 target = decision.get("TargetName", "")
                 line = f"  [{agent}] -> {cmd_type} {target}"
-                print(line, flush=True)
+                if not args.quiet:
+                    print(line, flush=True)
                 _game_log(line)
+                round_actions.append(f"{agent}: {cmd_type} {target}".rstrip())
 
             # 每轮结束后，降低所有角色的 Hunger 和 Energy
             world.degrade_character_stats(args.degradation)
             # 每轮结束后，作物生长推进
             world.tick_environment(12)
             
-            # 输出当前角色状态
-            print(f"\n  [Character Stats after round {round_num}]:", flush=True)
+            # 输出当前角色状态（--quiet 时只写游戏日志，控制台每轮一行）
+            if args.quiet:
+                print(f"[Round {round_num}] {time_line} | {' | '.join(round_actions)}", flush=True)
+            else:
+                print(f"\n  [Character Stats after round {round_num}]:", flush=True)
             for char in world.characters.get("Characters", []):
                 name = char.get("CharacterName")
                 hunger = char.get("CharacterStats", {}).get("Hunger", 0)
                 energy = char.get("CharacterStats", {}).get("Energy", 0)
                 line = f"    {name}: Hunger={hunger:.1f}, Energy={energy:.1f}"
-                print(line, flush=True)
+                if not args.quiet:
+                    print(line, flush=True)
                 _game_log(line)
 
             if args.print_inventory:
@@ -608,6 +791,8 @@ def main() -> int:
             print("  Simulation Stopped by User", flush=True)
             print(f"  Final Time: {world.time.formatted()}", flush=True)
             print(f"  Total Rounds: {round_num - 1}", flush=True)
+        print(f"  Total Requests: {request_count}", flush=True)
+        _print_http_timings(_get_http_client())
         print("=" * 70, flush=True)
         return 0
     
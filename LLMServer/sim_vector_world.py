@@ -0,0 +1,335 @@
+'''
+基于数组的 SimWorld（用于大规模无界面模拟）
+与 sim_production_mission.SimWorld 接口和规则一致，但状态保存在 NumPy 数组中：
+- 库存：Actor × 物品、角色 × 物品 的整数矩阵
+- 培养舱：生长阶段、生长进度、最大进度
+- 角色：Hunger / Energy 及其上限
+
+作物生长与属性衰减按闭式一次性推进（不再逐分钟循环所有 Actor），
+名称查找为字典索引；字典形式的 environment / characters 只在序列化请求时按需生成。
+
+需要 numpy（pip install numpy），未安装时构造 VectorSimWorld 会报错，SimWorld 不受影响。
+'''
+
+import copy
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - runtime check
+    np = None
+
+from sim_production_mission import (
+    CULTIVATE_PRODUCT_MAP,
+    TASK_INGREDIENTS_MAP,
+    TASK_PRODUCT_MAP,
+    SimTime,
+    dumps_bytes,
+    encode_request,
+)
+
+_PHASE_NONE = -1
+_PHASE_WAITING = 0
+_PHASE_GROWING = 1
+_PHASE_READY = 2
+_PHASE_NAMES = {
+    "ECultivatePhase::ECP_WaitingToPlant": _PHASE_WAITING,
+    "ECultivatePhase::ECP_Growing": _PHASE_GROWING,
+    "ECultivatePhase::ECP_ReadyToHarvest": _PHASE_READY,
+}
+_PHASE_BY_CODE = {code: name for name, code in _PHASE_NAMES.items()}
+_ARRAY_ACTOR_KEYS = {"Inventory", "CultivateInfo", "TaskList"}
+_ARRAY_CHAR_KEYS = {"Inventory", "CharacterStats"}
+
+
+class VectorSimWorld:
+    def __init__(self, data: Dict):
+        if np is None:
+            raise RuntimeError("numpy is not installed. Run: pip install numpy")
+        self.time = SimTime()
+        self.inventory_deltas: List[Dict] = []
+        self._env_version = 0
+        self._char_version = 0
+        self._encoded_env = None
+        self._encoded_chars = None
+
+        environment = data.get("Environment", {})
+        characters = data.get("Characters", {})
+        actors = environment.get("Actors", [])
+        chars = characters.get("Characters", [])
+        self._env_extra = {k: copy.deepcopy(v) for k, v in environment.items() if k != "Actors"}
+        self._chars_extra = {k: copy.deepcopy(v) for k, v in characters.items() if k != "Characters"}
+
+        # 物品列：按出现顺序分配，新物品出现时扩展矩阵
+        self._item_cols: Dict[str, int] = {}
+        for entity in list(actors) + list(chars):
+            for item_id in (entity.get("Inventory") or {}):
+                self._item_col(item_id, grow=False)
+        for products in (TASK_PRODUCT_MAP.values(), CULTIVATE_PRODUCT_MAP.values()):
+            for item_id in products:
+                self._item_col(item_id, grow=False)
+        n_items = max(1, len(self._item_cols))
+
+        # ---- Actor ----
+        self._actor_index = {a.get("ActorName"): i for i, a in enumerate(actors)}
+        self._actor_meta = [{k: copy.deepcopy(v) for k, v in a.items() if k not in _ARRAY_ACTOR_KEYS} for a in actors]
+        self._actor_has_inventory = ["Inventory" in a for a in actors]
+        self._task_lists = [copy.deepcopy(a["TaskList"]) if "TaskList" in a else None for a in actors]
+        self.actor_inventory = np.zeros((len(actors), n_items), dtype=np.int64)
+        self.phase = np.full(len(actors), _PHASE_NONE, dtype=np.int8)
+        self.growth = np.zeros(len(actors), dtype=np.int64)
+        self.growth_max = np.full(len(actors), 24, dtype=np.int64)
+        self._cultivate_meta: List[Optional[Dict]] = []
+        for i, actor in enumerate(actors):
+            for item_id, count in (actor.get("Inventory") or {}).items():
+                self.actor_inventory[i, self._item_cols[str(item_id)]] = int(count)
+            info = actor.get("CultivateInfo")
+            if isinstance(info, dict):
+                self.phase[i] = _PHASE_NAMES.get(info.get("CurrentPhase"), _PHASE_NONE)
+                self.growth[i] = int(info.get("GrowthProgress", 0))
+                self.growth_max[i] = int(info.get("GrowthMaxProgress", 24))
+                self._cultivate_meta.append({k: v for k, v in info.items() if k not in {"CurrentPhase", "GrowthProgress", "GrowthMaxProgress"}})
+            else:
+                self._cultivate_meta.append(None)
+
+        # ---- 角色 ----
+        self._char_index = {c.get("CharacterName"): i for i, c in enumerate(chars)}
+        self._char_meta = [{k: copy.deepcopy(v) for k, v in c.items() if k not in _ARRAY_CHAR_KEYS} for c in chars]
+        self.char_inventory = np.zeros((len(chars), n_items), dtype=np.int64)
+        stats = [c.get("CharacterStats", {}) for c in chars]
+        self.hunger = np.array([float(s.get("Hunger", 0)) for s in stats], dtype=np.float64)
+        self.max_hunger = np.array([float(s.get("MaxHunger", 100)) for s in stats], dtype=np.float64)
+        self.energy = np.array([float(s.get("Energy", 0)) for s in stats], dtype=np.float64)
+        self.max_energy = np.array([float(s.get("MaxEnergy", 100)) for s in stats], dtype=np.float64)
+        self._stats_extra = [{k: v for k, v in s.items() if k not in {"Hunger", "MaxHunger", "Energy", "MaxEnergy"}} for s in stats]
+        for i, char in enumerate(chars):
+            for item_id, count in (char.get("Inventory") or {}).items():
+                self.char_inventory[i, self._item_cols[str(item_id)]] = int(count)
+
+    # ========== 物品列 ==========
+    def _item_col(self, item_id, grow: bool = True) -> int:
+        key = str(item_id)
+        col = self._item_cols.get(key)
+        if col is None:
+            col = len(self._item_cols)
+            self._item_cols[key] = col
+            if grow and col >= self.actor_inventory.shape[1]:
+                self.actor_inventory = np.pad(self.actor_inventory, ((0, 0), (0, 1)))
+                self.char_inventory = np.pad(self.char_inventory, ((0, 0), (0, 1)))
+        return col
+
+    def _row_to_dict(self, row) -> Dict[str, int]:
+        return {item_id: int(row[col]) for item_id, col in self._item_cols.items() if row[col] > 0}
+
+    def _record_delta(self, actor_idx: int, item_id: int, delta: int) -> None:
+        name = self._actor_meta[actor_idx].get("ActorName", "")
+        self.inventory_deltas.append({"ActorName": name, "ItemID": int(item_id), "Delta": int(delta)})
+
+    # ========== 字典视图（仅用于序列化） ==========
+    def _actor_view(self, i: int) -> Dict:
+        actor = dict(self._actor_meta[i])
+        if self._actor_has_inventory[i] or self.actor_inventory[i].any():
+            actor["Inventory"] = self._row_to_dict(self.actor_inventory[i])
+        if self._cultivate_meta[i] is not None:
+            info = dict(self._cultivate_meta[i])
+            info["CurrentPhase"] = _PHASE_BY_CODE.get(int(self.phase[i]), "ECultivatePhase::ECP_None")
+            info["GrowthProgress"] = int(self.growth[i])
+            info["GrowthMaxProgress"] = int(self.growth_max[i])
+            actor["CultivateInfo"] = info
+        if self._task_lists[i] is not None:
+            actor["TaskList"] = dict(self._task_lists[i])
+        return actor
+
+    def _char_view(self, i: int) -> Dict:
+        char = dict(self._char_meta[i])
+        char["Inventory"] = self._row_to_dict(self.char_inventory[i])
+        stats = dict(self._stats_extra[i])
+        stats.update({
+            "Hunger": float(self.hunger[i]),
+            "MaxHunger": float(self.max_hunger[i]),
+            "Energy": float(self.energy[i]),
+            "MaxEnergy": float(self.max_energy[i]),
+        })
+        char["CharacterStats"] = stats
+        return char
+
+    @property
+    def environment(self) -> Dict:
+        view = copy.deepcopy(self._env_extra)
+        view["Actors"] = [self._actor_view(i) for i in range(len(self._actor_meta))]
+        return view
+
+    @property
+    def characters(self) -> Dict:
+        view = copy.deepcopy(self._chars_extra)
+        view["Characters"] = [self._char_view(i) for i in range(len(self._char_meta))]
+        return view
+
+    def _find_actor(self, name: str) -> Optional[Dict]:
+        i = self._actor_index.get(name)
+        return self._actor_view(i) if i is not None else None
+
+    def _find_character(self, name: str) -> Optional[Dict]:
+        i = self._char_index.get(name)
+        return self._char_view(i) if i is not None else None
+
+    # ========== 与 SimWorld 相同的接口 ==========
+    def has_pending_tasks(self) -> bool:
+        return any(task_list for task_list in self._task_lists if isinstance(task_list, dict))
+
+    def build_request(self, target_agent: str) -> Dict:
+        deltas, self.inventory_deltas = self.inventory_deltas, []
+        return {
+            "RequestType": "GetInstruction",
+            "TargetAgent": target_agent,
+            "GameTime": self.time.formatted(),
+            "Environment": self.environment,
+            "Characters": self.characters,
+            "InventoryDeltas": deltas,
+        }
+
+    def build_request_bytes(self, target_agent: str, extra: Optional[Dict] = None) -> bytes:
+        if self._encoded_env is None or self._encoded_env[0] != self._env_version:
+            self._encoded_env = (self._env_version, dumps_bytes(self.environment))
+        if self._encoded_chars is None or self._encoded_chars[0] != self._char_version:
+            self._encoded_chars = (self._char_version, dumps_bytes(self.characters))
+        deltas, self.inventory_deltas = self.inventory_deltas, []
+        return encode_request(target_agent, self.time.formatted(), self._encoded_env[1], self._encoded_chars[1], deltas, extra)
+
+    def apply_command(self, character_name: str, command: Dict) -> None:
+        ci = self._char_index.get(character_name)
+        if ci is None:
+            return
+        char = self._char_meta[ci]
+
+        cmd_type = command.get("CommandType", "Wait")
+        self._char_version += 1
+        if cmd_type in {"Take", "Put", "Use"}:
+            self._env_version += 1
+        target_name = command.get("TargetName", "")
+        param_id = int(command.get("ParamID", 0))
+        count = int(command.get("Count", 0))
+
+        if cmd_type == "Move":
+            if target_name:
+                char["CurrentLocation"] = target_name
+            char["ActionState"] = "ECharacterActionState::Idle"
+            self.time.advance_minutes(1)
+            return
+
+        ai = None
+        if cmd_type in {"Take", "Put", "Use"}:
+            current_location = char.get("CurrentLocation", "None")
+            ai = self._actor_index.get(current_location) if current_location else None
+            if ai is None:
+                print(f"[ERROR] {character_name} 在位置 {current_location} 未找到 Actor，命令 {cmd_type} 执行失败", flush=True)
+                char["ActionState"] = "ECharacterActionState::Idle"
+                self.time.advance_minutes(1)
+                return
+
+        if cmd_type in {"Take", "Put"}:
+            col = self._item_col(param_id)
+            src, dst = (self.actor_inventory, self.char_inventory) if cmd_type == "Take" else (self.char_inventory, self.actor_inventory)
+            src_row, dst_row = (ai, ci) if cmd_type == "Take" else (ci, ai)
+            if count > 0 and src[src_row, col] >= count:
+                src[src_row, col] -= count
+                dst[dst_row, col] += count
+                self._actor_has_inventory[ai] = True
+                self._record_delta(ai, param_id, -count if cmd_type == "Take" else count)
+            char["ActionState"] = "ECharacterActionState::Idle"
+            self.time.advance_minutes(1)
+            return
+
+        if cmd_type == "Use":
+            self._apply_use(character_name, ci, ai, param_id)
+            char["ActionState"] = "ECharacterActionState::Idle"
+            self.time.advance_minutes(1)
+            return
+
+        if cmd_type == "Wait":
+            self.time.advance_minutes(max(0, param_id))
+            char["ActionState"] = "ECharacterActionState::Idle"
+            return
+
+        char["ActionState"] = "ECharacterActionState::Idle"
+        self.time.advance_minutes(1)
+
+    def _apply_use(self, character_name: str, ci: int, ai: int, param_id: int) -> None:
+        actor_type = self._actor_meta[ai].get("ActorType", "")
+        if "CultivateChamber" in actor_type:
+            info = self._cultivate_meta[ai]
+            if info is None:
+                return
+            if self.phase[ai] == _PHASE_WAITING:
+                self.phase[ai] = _PHASE_GROWING
+                info["CurrentCultivateType"] = info.get("TargetCultivateType", "ECultivateType::ECT_None")
+            elif self.phase[ai] == _PHASE_READY:
+                product_id = CULTIVATE_PRODUCT_MAP.get(info.get("CurrentCultivateType", "ECultivateType::ECT_None"))
+                if product_id is not None:
+                    self.actor_inventory[ai, self._item_col(product_id)] += 3
+                    self._actor_has_inventory[ai] = True
+                    self._record_delta(ai, product_id, 3)
+                self.phase[ai] = _PHASE_WAITING
+                info["CurrentCultivateType"] = "ECultivateType::ECT_None"
+                self.growth[ai] = 0
+        elif "WorkStation" in actor_type or "Stove" in actor_type:
+            self._apply_craft(ai, str(param_id))
+        elif "Table" in actor_type:
+            col = self._item_cols.get("2003")
+            if col is not None and self.char_inventory[ci, col] > 0:
+                self.char_inventory[ci, col] -= 1
+                self.hunger[ci] = min(self.max_hunger[ci], self.hunger[ci] + 80)
+        elif "Bed" in actor_type:
+            old_energy = self.energy[ci]
+            self.energy[ci] = min(self.max_energy[ci], old_energy + 50)
+            print(f"[Sleep] {character_name} 睡眠恢复: {old_energy:.1f} -> {self.energy[ci]:.1f} (最多恢复50点)", flush=True)
+        else:
+            location = self._char_meta[ci].get("CurrentLocation")
+            print(f"[WARNING] {character_name} 在 {location} 使用命令，但该位置的ActorType '{actor_type}' 不支持 Use 操作", flush=True)
+
+    def _apply_craft(self, ai: int, task_key: str) -> None:
+        if task_key not in TASK_PRODUCT_MAP:
+            return
+        ingredients = [
+            (int(ing.get("ItemID", 0)), int(ing.get("Count", 0)))
+            for ing in TASK_INGREDIENTS_MAP.get(task_key, [])
+            if int(ing.get("Count", 0)) > 0
+        ]
+        cols = [self._item_col(item_id) for item_id, _ in ingredients]
+        if any(self.actor_inventory[ai, col] < need for col, (_, need) in zip(cols, ingredients)):
+            return
+        for col, (item_id, need) in zip(cols, ingredients):
+            self.actor_inventory[ai, col] -= need
+            self._record_delta(ai, item_id, -need)
+        product_id = TASK_PRODUCT_MAP.get(task_key)
+        if product_id is not None:
+            self.actor_inventory[ai, self._item_col(product_id)] += 1
+            self._actor_has_inventory[ai] = True
+            self._record_delta(ai, product_id, 1)
+        task_list = self._task_lists[ai]
+        if isinstance(task_list, dict) and int(task_list.get(task_key, 0)) > 0:
+            remaining = int(task_list[task_key]) - 1
+            if remaining <= 0:
+                task_list.pop(task_key, None)
+            else:
+                task_list[task_key] = remaining
+
+    def tick_environment(self, minutes: int = 1) -> None:
+        """作物生长按闭式推进：与逐分钟 +1 并在达到最大进度时转为可收获的结果一致"""
+        if minutes <= 0:
+            return
+        self.time.advance_minutes(minutes)
+        self._env_version += 1
+        growing = self.phase == _PHASE_GROWING
+        if not growing.any():
+            return
+        grown = self.growth + minutes
+        ready = growing & (grown >= self.growth_max)
+        self.growth = np.where(ready, np.maximum(self.growth_max, self.growth + 1), np.where(growing, grown, self.growth))
+        self.phase[ready] = _PHASE_READY
+
+    def degrade_character_stats(self, degradation: int = 10) -> None:
+        """每轮结束后，所有角色的 Hunger 和 Energy 降低"""
+        self._char_version += 1
+        np.maximum(self.hunger - degradation, 0, out=self.hunger)
+        np.maximum(self.energy - degradation, 0, out=self.energy)
@@ -28,8 +28,41 @@ def should_include(line, filters):
     return any(tag in line for tag in filters)
 
 def is_blackboard_list_item(line):
+    # 完整列表 "    N. [skill] ..." 与 diff 输出 "    N. [+] [skill] ..." 共用此格式
     return re.match(r"^\s+\d+\.\s+", line) is not None
 
+def split_lines(lines, filters):
+    """按 [GetInstruction] 标记把日志行分配给角色，返回 {角色: [行, ...]}"""
+    role_re = re.compile(r"\[GetInstruction\]\s*角色:\s*([^,，\s]+)")
+    role_buffers = defaultdict(list)
+    current_role = None
+    in_blackboard_block = False
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\n")
+
+        role_match = role_re.search(line)
+        if role_match:
+            current_role = role_match.group(1)
+            in_blackboard_block = False
+
+        if should_include(line, filters):
+            if current_role is None:
+                role_buffers["Global"].append(line)
+            else:
+                role_buffers[current_role].append(line)
+            in_blackboard_block = "[Blackboard]" in line
+            continue
+
+        if in_blackboard_block and is_blackboard_list_item(line):
+            if current_role is None:
+                role_buffers["Global"].append(line)
+            else:
+                role_buffers[current_role].append(line)
+        else:
+            in_blackboard_block = False
+    return role_buffers
+
 def main():
     args = parse_args()
     input_path = os.path.abspath(args.input)
@@ -39,35 +72,8 @@ def main():
 
     filters = [f.strip() for f in args.filters.split(",") if f.strip()]
 
-    role_re = re.compile(r"\[GetInstruction\]\s*角色:\s*([^,，\s]+)")
-    role_buffers = defaultdict(list)
-    current_role = None
-    in_blackboard_block = False
-
     with open(input_path, "r", encoding="utf-8") as f:
-        for raw_line in f:
-            line = raw_line.rstrip("\n")
-
-            role_match = role_re.search(line)
-            if role_match:
-                current_role = role_match.group(1)
-                in_blackboard_block = False
-
-            if should_include(line, filters):
-                if current_role is None:
-                    role_buffers["Global"].append(line)
-                else:
-                    role_buffers[current_role].append(line)
-                in_blackboard_block = "[Blackboard]" in line
-                continue
-
-            if in_blackboard_block and is_blackboard_list_item(line):
-                if current_role is None:
-                    role_buffers["Global"].append(line)
-                else:
-                    role_buffers[current_role].append(line)
-            else:
-                in_blackboard_block = False
+        role_buffers = split_lines(f, filters)
 
     os.makedirs(output_dir, exist_ok=True)
     for role, lines in role_buffers.items():
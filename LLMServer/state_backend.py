@@ -0,0 +1,165 @@
+'''
+LLMServer 状态后端模块
+把黑板与各角色的动作队列放到可插拔的后端之后，使服务器可以运行在多 worker 的 WSGI 服务器下。
+
+- memory（默认）：状态留在进程内，用一把锁串行化对黑板的读写
+- sqlite：状态存放在本地 SQLite 文件中，多个 worker 进程共享；
+  每个事务使用 BEGIN IMMEDIATE 获取写锁，保证任务一致性。
+  共享的只有黑板与各角色的 export_state（动作队列、Planner 反馈、上一次决策、欲望值）；
+  以下状态仍留在各 worker 进程内（PER_WORKER_STATE）：Agent 对象本身、预取中的 LLM 决策、
+  事务外等待 LLM 返回的决策、集中任务分配的本轮结果、黑板日志的 diff 基准。
+  同一角色的相邻请求落到不同 worker 时，预取结果与本轮分配不会被复用，由该 worker 重新计算。
+
+通过环境变量选择：
+- RIMSPACE_STATE_BACKEND=memory|sqlite
+- RIMSPACE_STATE_PATH=<sqlite 文件路径>（默认 Log/server_state.sqlite3）
+- RIMSPACE_STATE_RESET=1 在后端创建时清空旧状态（配合 gunicorn --preload 只在 master 中执行一次）
+'''
+
+import os
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+# 序列化格式版本（记录在 SQLite 的 user_version 中）。Goal / BlackboardTask 等被序列化的类
+# 结构发生不兼容变化时加 1，旧格式的状态在后端创建时清空，而不是在请求中反序列化失败
+STATE_FORMAT_VERSION = 2
+
+
+def _state_backend_name() -> str:
+    return os.environ.get("RIMSPACE_STATE_BACKEND", "memory").strip().lower()
+
+
+# sqlite 后端下不在 worker 之间共享的状态，启动日志中列出
+PER_WORKER_STATE = (
+    "agents", "prefetched LLM decisions", "in-flight LLM decisions",
+    "task assignment round", "blackboard log diff",
+)
+
+
+def _reset_on_start() -> bool:
+    flag = os.environ.get("RIMSPACE_STATE_RESET", "0").strip().lower()
+    return flag in {"1", "true", "yes", "on"}
+
+
+class _InProcessTransaction:
+    def sync_agent(self, agent) -> None:
+        # 进程内后端中 agent 对象本身就是唯一的状态来源
+        return None
+
+
+class InProcessStateBackend:
+    """默认后端：状态保存在当前进程，仅用锁保证线程安全"""
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self, blackboard):
+        with self._lock:
+            yield _InProcessTransaction()
+
+
+class _SQLiteTransaction:
+    def __init__(self, conn):
+        self._conn = conn
+        self.agents = []
+
+    def sync_agent(self, agent) -> None:
+        """把共享存储中的动作队列等状态载入 agent，事务提交时会写回"""
+        row = self._conn.execute(
+            "SELECT payload FROM agent_state WHERE name = ?", (agent.name,)
+        ).fetchone()
+        if row is not None:
+            agent.load_state(pickle.loads(row[0]))
+        self.agents.append(agent)
+
+
+class SQLiteStateBackend:
+    """多进程共享后端：黑板与动作队列序列化后存放在 SQLite 中"""
+    name = "sqlite"
+
+    def __init__(self, path: str, reset: bool = False):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        # 已载入当前进程的黑板版本，版本未变化时跳过反序列化
+        self._loaded_version = -1
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS blackboard_state ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL, payload BLOB NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_state (name TEXT PRIMARY KEY, payload BLOB NOT NULL)"
+        )
+        stale = conn.execute("PRAGMA user_version").fetchone()[0] != STATE_FORMAT_VERSION
+        if reset or stale:
+            conn.execute("DELETE FROM blackboard_state")
+            conn.execute("DELETE FROM agent_state")
+            conn.execute(f"PRAGMA user_version = {STATE_FORMAT_VERSION}")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程/跨 fork 共享，按 (pid, 线程) 各自建立
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self, blackboard):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version, payload FROM blackboard_state WHERE id = 0").fetchone()
+            version = row[0] if row else 0
+            if row is not None and version != self._loaded_version:
+                blackboard.load_state(pickle.loads(row[1]))
+            tx = _SQLiteTransaction(conn)
+            yield tx
+
+            version += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO blackboard_state (id, version, payload) VALUES (0, ?, ?)",
+                (version, pickle.dumps(blackboard.export_state(), protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+            for agent in tx.agents:
+                conn.execute(
+                    "INSERT OR REPLACE INTO agent_state (name, payload) VALUES (?, ?)",
+                    (agent.name, pickle.dumps(agent.export_state(), protocol=pickle.HIGHEST_PROTOCOL)),
+                )
+            conn.execute("COMMIT")
+            self._loaded_version = version
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # 回滚后本进程内的黑板可能已被部分修改，强制下次重新载入
+            self._loaded_version = -1
+            raise
+
+
+def create_state_backend(default_dir: str, session_id: str = ""):
+    """
+    按环境变量创建状态后端
+    :param session_id: 非空时为该会话创建独立的后端（sqlite 使用 <文件名>.<session_id>.sqlite3，
+                       多个 worker 可能先后创建同一会话，因此不清空旧状态，会话 ID 应在每次运行中唯一）
+    """
+    name = _state_backend_name()
+    if name == "sqlite":
+        path = os.environ.get("RIMSPACE_STATE_PATH", "").strip() or os.path.join(default_dir, "server_state.sqlite3")
+        if session_id:
+            stem, ext = os.path.splitext(path)
+            safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in session_id)
+            return SQLiteStateBackend(f"{stem}.{safe_id}{ext}")
+        return SQLiteStateBackend(path, reset=_reset_on_start())
+    if name not in {"", "memory"}:
+        raise ValueError(f"Unknown RIMSPACE_STATE_BACKEND: {name}")
+    return InProcessStateBackend()
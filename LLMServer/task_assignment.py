@@ -0,0 +1,239 @@
+'''
+LLMServer 集中任务分配模块
+每一轮对 (空闲角色, 可执行任务) 做一次全局最小代价匹配（匈牙利算法），
+被分配到任务的角色直接按任务生成决策交给 Planner，不再调用 LLM；
+没有分配结果的角色（饥饿/疲劳、没有可转化为指令的任务）仍由 LLM 决策。
+
+通过环境变量启用：RIMSPACE_TASK_ASSIGNMENT=1
+'''
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from rimspace_enum import ECultivatePhase
+
+# 代价权重：优先级每高 1 级相当于节省的归一化路程
+PRIORITY_WEIGHT = 1.0
+DISTANCE_WEIGHT = 2.0
+# 欲望值超过该阈值的角色需要先照顾自己（吃饭/睡觉），交给 LLM 判断
+DESIRE_CRITICAL = 70
+_INFEASIBLE = float("inf")
+
+
+def task_assignment_enabled() -> bool:
+    flag = os.environ.get("RIMSPACE_TASK_ASSIGNMENT", "0").strip().lower()
+    return flag in {"1", "true", "yes", "on"}
+
+
+def solve_assignment(cost: List[List[float]]) -> List[Tuple[int, int]]:
+    """
+    匈牙利算法求最小代价匹配，支持矩形矩阵；代价为 inf 的配对不会出现在结果中。
+    :return: [(行, 列), ...]
+    """
+    if not cost or not cost[0]:
+        return []
+    rows, cols = len(cost), len(cost[0])
+    transposed = rows > cols
+    if transposed:
+        cost = [list(col) for col in zip(*cost)]
+        rows, cols = cols, rows
+
+    finite = [c for row in cost for c in row if c != _INFEASIBLE]
+    # 不可行配对用足够大的代价代替：任何少用一个不可行配对的方案都更优
+    big = (max(abs(c) for c in finite) + 1.0) * (rows + cols + 1) if finite else 1.0
+    a = [[c if c != _INFEASIBLE else big for c in row] for row in cost]
+
+    # 势能法 O(n^2 m)，下标从 1 开始
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (cols + 1)
+    match = [0] * (cols + 1)
+    way = [0] * (cols + 1)
+    for i in range(1, rows + 1):
+        match[0] = i
+        j0 = 0
+        minv = [float("inf")] * (cols + 1)
+        used = [False] * (cols + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            delta = float("inf")
+            j1 = 0
+            for j in range(1, cols + 1):
+                if used[j]:
+                    continue
+                cur = a[i0 - 1][j - 1] - u[i0] - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(cols + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    pairs = []
+    for j in range(1, cols + 1):
+        i = match[j]
+        if i and cost[i - 1][j - 1] != _INFEASIBLE:
+            pairs.append((j - 1, i - 1) if transposed else (i - 1, j - 1))
+    return sorted(pairs)
+
+
+def decision_for_task(task, planner) -> Optional[Dict]:
+    """
+    把黑板任务转换为与 LLM 输出同格式的决策 JSON；无法唯一确定指令的任务返回 None。
+    """
+    goal = task.goal
+    thought = f"[Task Assignment] {task.description}"
+
+    item_id = task.item_id
+    destination = task.destination
+    source = task.source
+    if item_id is not None and destination and source and source != "perceiver":
+        return {
+            "command": "Transport",
+            "target_name": source,
+            "aux_name": destination,
+            "item_id": item_id,
+            "count": 1 if task.count is None else task.count,
+            "thought": thought,
+        }
+
+    if goal.property_type == "CultivateInfo" and goal.key == "CurrentPhase":
+        if goal.value == ECultivatePhase.Growing.value:
+            return {"command": "Plant", "target_name": goal.target_actor, "thought": thought}
+        if goal.value == ECultivatePhase.WaitingToPlant.value:
+            return {"command": "Harvest", "target_name": goal.target_actor, "thought": thought}
+        return None
+
+    if goal.property_type == "TaskList":
+        product_id = planner.task_map.get(str(goal.key), {}).get("ProductID", goal.key)
+    elif goal.property_type == "Inventory" and goal.target_actor == "Global":
+        product_id = goal.key
+    else:
+        return None
+
+    recipe = planner.product_to_recipe.get(str(product_id))
+    # 作物的“生产”需要先选定培养舱，属于需要判断的情况，交给 LLM
+    if not recipe or str(recipe.get("RequiredFacility", "")).startswith("CultivateChamber"):
+        return None
+    product_name = planner.item_map.get(str(product_id), {}).get("ItemName")
+    if not product_name:
+        return None
+    return {"command": "Craft", "target_name": product_name, "thought": thought}
+
+
+def _task_site(decision: Dict, planner, environment) -> Optional[str]:
+    command = decision.get("command")
+    if command in {"Transport", "Plant", "Harvest"}:
+        return decision.get("target_name")
+    recipe = planner.product_to_recipe.get(str(planner.item_name_to_id.get(decision.get("target_name"))))
+    if recipe:
+        return planner.find_actor_by_type(recipe.get("RequiredFacility"), environment)
+    return None
+
+
+def _is_critical(char_data) -> bool:
+    stats = char_data.get("CharacterStats", {})
+    hunger = max(0, 100 - stats.get("Hunger", 100))
+    exhaustion = max(0, 100 - stats.get("Energy", 100))
+    return hunger > DESIRE_CRITICAL or exhaustion > DESIRE_CRITICAL
+
+
+class TaskAssigner:
+    """
+    每一轮只求解一次分配。一轮由游戏时间与本轮开始时的空闲角色集合标识：
+    同一游戏时间内，本轮成员依次发来的请求直接取用已求解的结果（成员领到任务后空闲集合缩小，但轮次不变）；
+    不在本轮成员中的角色发来请求时，以当时的空闲角色开启新一轮。没有游戏时间时每次请求单独求解。
+    """
+
+    def __init__(self, planner):
+        self.planner = planner
+        self._round_time: Optional[str] = None
+        self._round_members: frozenset = frozenset()
+        self._assignment: Dict[str, Tuple[str, Dict]] = {}
+
+    def decision_for(self, agent_name: str, blackboard, characters: List[Dict], environment: Dict,
+                     busy_agents=(), game_time: Optional[str] = None) -> Optional[Dict]:
+        """
+        返回分配给 agent_name 的决策（副本），没有分配时返回 None。
+        :param characters: 请求中全部角色的数据（用于一次性为所有空闲角色求解）
+        :param busy_agents: 仍在执行动作队列的角色，不参与本轮分配
+        :param game_time: 请求中的 GameTime，用于划分轮次
+        """
+        if game_time is None or game_time != self._round_time or agent_name not in self._round_members:
+            free = [
+                c for c in characters
+                if c.get("CharacterName") and (c.get("CharacterName") == agent_name or c.get("CharacterName") not in busy_agents)
+            ]
+            self._assignment = self._solve(blackboard, free, environment)
+            self._round_time = game_time
+            self._round_members = frozenset(c["CharacterName"] for c in free)
+
+        entry = self._assignment.get(agent_name)
+        if entry is None:
+            return None
+        task_id, decision = entry
+        task = next((t for t in blackboard.tasks if t.task_id == task_id), None)
+        if task is None or task.is_claimed_by_other(agent_name):
+            return None
+        return dict(decision)
+
+    def _solve(self, blackboard, free_chars: List[Dict], environment: Dict) -> Dict[str, Tuple[str, Dict]]:
+        agents = [c for c in free_chars if not _is_critical(c)]
+        if not agents:
+            return {}
+
+        options: Dict[str, Tuple[object, Dict]] = {}
+        per_agent: List[set] = []
+        for char in agents:
+            visible = set()
+            for task in blackboard.get_executable_tasks(char, environment):
+                if task.task_id not in options:
+                    decision = decision_for_task(task, self.planner)
+                    if decision is None:
+                        continue
+                    options[task.task_id] = (task, decision)
+                visible.add(task.task_id)
+            per_agent.append(visible)
+        if not options:
+            return {}
+
+        task_ids = list(options)
+        graph = self.planner.get_travel_graph(environment)
+        sites = {tid: _task_site(options[tid][1], self.planner, environment) for tid in task_ids}
+        distances = {}
+        for char in agents:
+            for tid in task_ids:
+                d = graph.cost(char.get("CurrentLocation"), sites[tid]) if graph and sites[tid] else None
+                distances[(char["CharacterName"], tid)] = d
+        known = [d for d in distances.values() if d is not None]
+        scale = max(known) if known and max(known) > 0 else 1.0
+
+        cost = []
+        for char, visible in zip(agents, per_agent):
+            row = []
+            for tid in task_ids:
+                if tid not in visible:
+                    row.append(_INFEASIBLE)
+                    continue
+                task = options[tid][0]
+                d = distances[(char["CharacterName"], tid)]
+                row.append(DISTANCE_WEIGHT * (d / scale if d is not None else 0.5) - PRIORITY_WEIGHT * task.priority)
+            cost.append(row)
+
+        return {
+            agents[i]["CharacterName"]: (task_ids[j], options[task_ids[j]][1])
+            for i, j in solve_assignment(cost)
+        }
@@ -0,0 +1,23 @@
+"""
+单元测试用的最小 config 模块
+config.py 含本地 API Key，不随仓库提交；导入 planner / agent_manager 的测试先 import 本模块。
+已存在真实 config 时不做任何替换。
+"""
+import os
+import sys
+import types
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    _data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "Data")
+    config = types.ModuleType("config")
+    config.ITEM_DATA_PATH = os.path.join(_data_dir, "Item.json")
+    config.TASK_DATA_PATH = os.path.join(_data_dir, "Task.json")
+    config.LLM_API_KEY = ""
+    config.LLM_MODEL = ""
+    config.LLM_URL = ""
+    config.SYSTEM_PROMPT_TEMPLATE = "{profession}{name}{specific_profile}{world_state}"
+    config.THRESHOLDS = {}
+    config.MEAL_MIN_STOCK = 2
+    sys.modules["config"] = config
@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+
+import config_stub  # noqa: F401
+from agent_manager import RimSpaceAgent, _match_decision_task
+from blackboard import Blackboard, BlackboardTask, Goal
+
+
+def _transport(source, destination, item_id="1001"):
+    task = BlackboardTask(f"Transport {item_id}", Goal(destination, "Inventory", item_id, ">=", 1))
+    task.item_id, task.source, task.destination, task.count = item_id, source, destination, 1
+    return task
+
+
+class TestMatchDecisionTask(unittest.TestCase):
+    def setUp(self):
+        self.to_workstation = _transport("Storage_1", "WorkStation_1")
+        self.to_stove = _transport("Storage_1", "Stove_1")
+        self.tasks = [self.to_workstation, self.to_stove]
+
+    def test_exact_transport_match(self):
+        decision = {"item_id": 1001, "target_name": "Storage_1", "aux_name": "Stove_1"}
+        self.assertIs(_match_decision_task("Transport", decision, self.tasks), self.to_stove)
+
+    def test_no_fallback_to_other_transport(self):
+        decision = {"item_id": 1001, "target_name": "Storage_2", "aux_name": "Stove_1"}
+        self.assertIsNone(_match_decision_task("Transport", decision, self.tasks))
+
+
+class TestFastPathEat(unittest.TestCase):
+    def setUp(self):
+        self.agent = RimSpaceAgent("Farmer", "Farmer", Blackboard())
+        self.agent.desires["hunger"] = 90
+
+    def _decide(self, carried, stored):
+        char = {"CharacterName": "Farmer", "CurrentLocation": "Storage_1", "Inventory": carried}
+        env = {"Actors": [{"ActorName": "Storage_1", "Inventory": stored}]}
+        with mock.patch.dict("os.environ", {"RIMSPACE_FAST_PATH": "eat"}):
+            return self.agent._fast_path_decision(char, env)
+
+    def test_eat_when_food_is_stored(self):
+        self.assertEqual(self._decide({}, {"2003": 1})["command"], "Eat")
+
+    def test_carried_food_alone_goes_to_llm(self):
+        # _plan_eat 只从存储中取餐，身上的食物无法规划出 Eat
+        self.assertIsNone(self._decide({"2003": 1}, {}))
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_prefetch_does_not_touch_live_desires(self):
+        agent = RimSpaceAgent("Farmer", "Farmer", Blackboard())
+        agent.desires.update({"hunger": 90, "exhaustion": 5, "duty": 0})
+        live = agent.desires
+        char = {"CharacterName": "Farmer", "CurrentLocation": "Storage_1", "Inventory": {},
+                "CharacterStats": {"Hunger": 60, "Energy": 100}}
+        env = {"Actors": [{"ActorName": "Storage_1", "Inventory": {}}]}
+        executor = mock.Mock()
+        with mock.patch("agent_manager._get_prefetch_executor", return_value=executor), \
+                mock.patch.object(agent, "update_state") as update_state:
+            agent._start_prefetch(char, env, [{"CommandType": "Wait", "ParamID": 1}])
+        update_state.assert_not_called()
+        self.assertIs(agent.desires, live)
+        self.assertEqual(live, {"hunger": 90, "exhaustion": 5, "duty": 0})
+        # Prompt 使用预计状态的欲望值
+        _, _, user_context = executor.submit.call_args.args
+        self.assertIn("Hunger: 40/100", user_context)
+
+
+class TestLLMClientInit(unittest.TestCase):
+    def test_concurrent_first_use_creates_one_client(self):
+        import sys
+        import threading
+        import time
+        from llm_client import LLMClient
+
+        created = []
+
+        def slow_client(**kwargs):
+            time.sleep(0.01)
+            created.append(kwargs)
+            return object()
+
+        client = LLMClient()
+        fake_openai = mock.Mock(OpenAI=slow_client)
+        with mock.patch.dict(sys.modules, {"openai": fake_openai}):
+            threads = [threading.Thread(target=client._get_client) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(created), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
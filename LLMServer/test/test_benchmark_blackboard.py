@@ -0,0 +1,14 @@
+import unittest
+from benchmark_blackboard import run_size
+
+
+class TestBlackboardBenchmark(unittest.TestCase):
+    def test_reports_every_operation(self):
+        rows = run_size(size=8, world_scale=1, cycles=1, measure_memory=True, seed=1)
+        self.assertEqual([r["op"] for r in rows], ["post_task_new", "post_task_duplicate", "update", "get_executable_tasks"])
+        self.assertTrue(all(r["ms_per_op"] >= 0 for r in rows))
+        self.assertGreater(rows[0]["bytes_per_task"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
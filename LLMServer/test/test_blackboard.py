@@ -1,5 +1,6 @@
+import pickle
 import unittest
-from blackboard import Goal
+from blackboard import Blackboard, BlackboardTask, Goal, TaskStatus, parse_game_minutes
 
 class TestGoalIsSatisfied(unittest.TestCase):
     def setUp(self):
@@ -40,5 +41,210 @@ class TestGoalIsSatisfied(unittest.TestCase):
         goal = Goal("CultivateChamber_1", "Inventory", "9999", "==", {"count": 10})
         self.assertFalse(goal.is_satisfied(self.game_state))
 
+    def test_nested_key(self):
+        self.assertTrue(Goal("CultivateChamber", "Inventory", "1001.count", ">=", 10).is_satisfied(self.game_state))
+        self.assertFalse(Goal("CultivateChamber", "Inventory", "1001.count.x", ">", 0).is_satisfied(self.game_state))
+
+    def test_global_inventory_with_exclude(self):
+        state = {"Environment": {"Actors": [
+            {"ActorName": "Storage_1", "Inventory": {"1001": 2}},
+            {"ActorName": "WorkStation", "Inventory": {"1001": 3}},
+            {"ActorName": "Farmer", "Type": "Character", "Inventory": {"1001": 9}},
+        ]}}
+        self.assertTrue(Goal("Global", "Inventory", 1001, "==", 5).is_satisfied(state))
+        self.assertTrue(Goal("Global", "Inventory", "1001", "==", 2, exclude_actor="WorkStation").is_satisfied(state))
+
+    def test_non_numeric_only_supports_equality(self):
+        goal = Goal("CultivateChamber_1", "CultivateInfo", "CurrentPhase", ">=", "ECultivatePhase::ECP_WaitingToPlant")
+        self.assertFalse(goal.is_satisfied(self.game_state))
+        self.assertFalse(Goal("WorkStation", "TaskList", "2001", "~", 5).is_satisfied(self.game_state))
+
+
+def _produce_task(item_id, target, actor_prefix="CultivateChamber"):
+    task = BlackboardTask(f"System Request: Produce {item_id}", Goal("Global", "Inventory", item_id, ">=", 100))
+    task.progress_counter = f"produce:{item_id}"
+    task.progress_target = target
+    task.progress_kind = "produce"
+    task.progress_item_id = item_id
+    task.progress_actor_prefix = actor_prefix
+    return task
+
+
+def _inventory_state(chamber_cotton=0, deltas=None):
+    state = {"Environment": {"Actors": [{"ActorName": "CultivateChamber_1", "Inventory": {"1001": chamber_cotton}}]}}
+    if deltas is not None:
+        state["InventoryDeltas"] = deltas
+    return state
+
+
+class TestBlackboardProgress(unittest.TestCase):
+    def test_client_deltas_drive_progress(self):
+        board = Blackboard()
+        board.post_task(_produce_task("1001", target=6))
+        board.update(_inventory_state(deltas=[
+            {"ActorName": "CultivateChamber_1", "ItemID": 1001, "Delta": 3},
+            {"ActorName": "Storage", "ItemID": 1001, "Delta": 3},
+            {"ActorName": "CultivateChamber_1", "ItemID": 1001, "Delta": -3},
+        ]))
+        self.assertEqual(board.progress_counters, {"produce:1001": 3})
+        # 带增量的请求同样刷新库存基线
+        self.assertEqual(board.last_inventory, {"CultivateChamber_1": {"1001": 0}})
+
+        board.update(_inventory_state(deltas=[{"ActorName": "CultivateChamber_2", "ItemID": 1001, "Delta": 3}]))
+        self.assertEqual(board.tasks, [])
+
+    def test_inventory_diff_fallback(self):
+        board = Blackboard()
+        board.post_task(_produce_task("1001", target=6))
+        board.update(_inventory_state(chamber_cotton=0))
+        board.update(_inventory_state(chamber_cotton=3))
+        self.assertEqual(board.progress_counters, {"produce:1001": 3})
+
+    def test_alternating_deltas_match_inventory_diff(self):
+        # 每一步：采集舱棉花、仓库棉花、Farmer 背包棉花
+        steps = [(0, 0, 0), (3, 0, 0), (5, 0, 0), (2, 0, 3), (2, 3, 0), (6, 3, 0)]
+
+        def state(step, with_deltas):
+            chamber, storage, carried = steps[step]
+            snapshot = {
+                "Environment": {"Actors": [
+                    {"ActorName": "CultivateChamber_1", "Inventory": {"1001": chamber}},
+                    {"ActorName": "Storage", "Inventory": {"1001": storage}},
+                ]},
+                "Characters": {"Characters": [{"CharacterName": "Farmer", "Inventory": {"1001": carried}}]},
+            }
+            if with_deltas:
+                prev = steps[step - 1]
+                names = ("CultivateChamber_1", "Storage", "Farmer")
+                snapshot["InventoryDeltas"] = [
+                    {"ActorName": name, "ItemID": 1001, "Delta": curr - old}
+                    for name, curr, old in zip(names, steps[step], prev) if curr != old
+                ]
+            return snapshot
+
+        def board_with_tasks():
+            board = Blackboard()
+            board.post_task(_produce_task("1001", target=100))
+            stocked = BlackboardTask("Stock Cotton", Goal("Global", "Inventory", "1001", ">=", 200))
+            stocked.progress_counter, stocked.progress_target, stocked.progress_item_id = "any:1001", 100, "1001"
+            board.post_task(stocked)
+            return board
+
+        mixed, diffed = board_with_tasks(), board_with_tasks()
+        for step in range(len(steps)):
+            mixed.update(state(step, with_deltas=step % 2 == 1))
+            diffed.update(state(step, with_deltas=False))
+            self.assertEqual(mixed.progress_counters, diffed.progress_counters)
+        self.assertEqual(mixed.progress_counters, {"produce:1001": 9, "any:1001": 12})
+
+    def test_removed_task_stops_counting(self):
+        board = Blackboard()
+        board.post_task(_produce_task("1001", target=3))
+        delta = [{"ActorName": "CultivateChamber_1", "ItemID": 1001, "Delta": 3}]
+        board.update(_inventory_state(deltas=delta))
+        self.assertEqual(board.tasks, [])
+        board.update(_inventory_state(deltas=delta))
+        self.assertEqual(board.progress_counters, {"produce:1001": 3})
+
+
+class TestBlackboardClaims(unittest.TestCase):
+    def setUp(self):
+        self.board = Blackboard()
+        self.task = self.board.post_task(BlackboardTask("Transport Cotton", Goal("WorkStation", "Inventory", "1001", ">=", 1)))
+        self.board.update({"GameTime": "Day 1  08:00", "Environment": {"Actors": []}})
+
+    def _visible(self, name):
+        return self.board.get_executable_tasks({"CharacterName": name}, {"Actors": []})
+
+    def test_claimed_task_hidden_from_others(self):
+        self.assertTrue(self.board.claim_task(self.task, "Farmer"))
+        self.assertEqual(self._visible("Farmer"), [self.task])
+        self.assertEqual(self._visible("Chef"), [])
+        self.assertFalse(self.board.claim_task(self.task, "Chef"))
+
+    def test_release_on_failure(self):
+        self.board.claim_task(self.task, "Farmer")
+        self.board.release_claims("Farmer", failed=True)
+        self.assertEqual(self.task.status, TaskStatus.FAILED)
+        self.assertEqual(self._visible("Chef"), [self.task])
+
+    def test_unparseable_game_time(self):
+        # 从未得到过游戏时间：拒绝认领，避免产生永不过期的租约
+        board = Blackboard()
+        task = board.post_task(BlackboardTask("Transport Corn", Goal("WorkStation", "Inventory", "1002", ">=", 1)))
+        board.update({"GameTime": "unknown", "Environment": {"Actors": []}})
+        self.assertFalse(board.claim_task(task, "Farmer"))
+        self.assertIsNone(task.claimed_by)
+
+        # 已有游戏时间时，无法解析的 GameTime 沿用最近一次的时间计算租约
+        self.board.update({"GameTime": "???", "Environment": {"Actors": []}})
+        self.assertTrue(self.board.claim_task(self.task, "Farmer"))
+        self.assertEqual(self.task.lease_expires_at, parse_game_minutes("Day 1  09:00"))
+
+    def test_lease_expires_in_game_minutes(self):
+        self.board.claim_task(self.task, "Farmer")
+        self.assertEqual(self.task.lease_expires_at, parse_game_minutes("Day 1  09:00"))
+        self.board.update({"GameTime": "Day 1  08:59", "Environment": {"Actors": []}})
+        self.assertEqual(self._visible("Chef"), [])
+        self.board.update({"GameTime": "Day 1  09:00", "Environment": {"Actors": []}})
+        self.assertEqual(self._visible("Chef"), [self.task])
+        self.assertEqual(self.task.status, TaskStatus.PENDING)
+
+
+class TestCompactRepresentation(unittest.TestCase):
+    def test_goal_interned_and_immutable(self):
+        a = Goal("Global", "Inventory", "1001", ">=", 3)
+        self.assertIs(a, Goal("Global", "Inventory", "1001", ">=", 3))
+        self.assertIsNot(a, Goal("Global", "Inventory", "1001", ">=", 3, exclude_actor="WorkStation"))
+        with self.assertRaises(AttributeError):
+            a.value = 4
+        self.assertIs(pickle.loads(pickle.dumps(a)), a)
+
+    def test_interning_keeps_value_types_distinct(self):
+        as_int = Goal("Storage", "Flags", "Open", "==", 1)
+        as_bool = Goal("Storage", "Flags", "Open", "==", True)
+        as_float = Goal("Storage", "Flags", "Open", "==", 1.0)
+        self.assertIs(type(as_bool.value), bool)
+        self.assertIs(type(as_float.value), float)
+        self.assertIsNot(as_int, as_bool)
+        self.assertEqual(as_bool.to_state()["value"], True)
+        self.assertIs(Goal("Storage", "Flags", "Open", "==", True), as_bool)
+        self.assertIs(type(Goal("Storage", "Inventory", 1, ">=", 1).key), int)
+        self.assertIs(type(Goal("Storage", "Inventory", True, ">=", 1).key), bool)
+
+    def test_unhashable_goal_value_not_interned(self):
+        a = Goal("Storage", "Inventory", "1001", "==", {"count": 1})
+        self.assertIsNot(a, Goal("Storage", "Inventory", "1001", "==", {"count": 1}))
+
+    def test_task_has_typed_fields_and_no_dict(self):
+        task = BlackboardTask("Transport Cotton", Goal("WorkStation", "Inventory", "1001", ">=", 1))
+        self.assertFalse(hasattr(task, "__dict__"))
+        self.assertIsNone(task.item_id)
+        with self.assertRaises(AttributeError):
+            task.unknown_field = 1
+
+    def test_task_pickle_round_trip(self):
+        task = BlackboardTask("Transport Cotton", Goal("WorkStation", "Inventory", "1001", ">=", 1))
+        task.item_id, task.count = "1001", 2
+        restored = pickle.loads(pickle.dumps(task, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual((restored.task_id, restored.item_id, restored.count), (task.task_id, "1001", 2))
+        self.assertIs(restored.goal, task.goal)
+
+    def test_duplicate_post_keeps_fields_the_new_task_leaves_unset(self):
+        board = Blackboard()
+        goal = Goal("WorkStation", "Inventory", "1001", ">=", 1)
+        first = BlackboardTask("Transport Cotton", goal)
+        first.item_id, first.source, first.count = "1001", "Storage_1", 3
+        board.post_task(first)
+
+        again = BlackboardTask("Transport Cotton again", goal)
+        again.source = "Storage_2"
+        kept = board.post_task(again)
+        self.assertIs(kept, first)
+        # None 表示未提供：覆盖 source，保留 item_id / count，不会被清空
+        self.assertEqual((kept.description, kept.source, kept.item_id, kept.count),
+                         ("Transport Cotton again", "Storage_2", "1001", 3))
+
+
 if __name__ == "__main__":
     unittest.main()
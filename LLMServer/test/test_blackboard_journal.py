@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from blackboard import Blackboard, BlackboardTask, Goal
+from blackboard_journal import BlackboardJournal
+
+
+def _state(chamber_cotton=0, storage_cotton=0):
+    return {
+        "Environment": {
+            "Actors": [
+                {"ActorName": "CultivateChamber_1", "Inventory": {"1001": chamber_cotton}},
+                {"ActorName": "Storage", "Inventory": {"1001": storage_cotton}},
+            ]
+        }
+    }
+
+
+def _produce_cotton_task(target):
+    task = BlackboardTask(
+        description="System Request: Produce Cotton",
+        goal=Goal("Global", "Inventory", "1001", ">=", 100),
+        priority=6,
+        required_skill="CanFarm",
+    )
+    task.progress_counter = "produce:1001"
+    task.progress_target = target
+    task.progress_kind = "produce"
+    task.progress_item_id = "1001"
+    task.progress_actor_prefix = "CultivateChamber"
+    return task
+
+
+class TestBlackboardJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _restore(self, compact_every=500):
+        board = Blackboard()
+        journal = BlackboardJournal(self.path, compact_every=compact_every)
+        journal.restore(board)
+        board.attach_journal(journal)
+        return board, journal
+
+    def test_restore_tasks_and_progress(self):
+        board, journal = self._restore()
+        task = board.post_task(_produce_cotton_task(target=6))
+        transport = BlackboardTask("System Request: Transport Cotton", Goal("WorkStation", "Inventory", "1001", ">=", 1))
+        transport.item_id = "1001"
+        transport.source = "Storage"
+        board.post_task(transport)
+        board.update(_state())
+        board.update(_state(chamber_cotton=3))
+        journal.close()
+
+        restored, _ = self._restore()
+        self.assertEqual([t.task_id for t in restored.tasks], [task.task_id, transport.task_id])
+        self.assertEqual(restored.tasks[1].source, "Storage")
+        self.assertEqual(restored.progress_counters, {"produce:1001": 3})
+
+        # 基线被恢复：相同库存不会重复计数，新增的库存继续累计
+        restored.update(_state(chamber_cotton=3))
+        self.assertEqual(restored.progress_counters["produce:1001"], 3)
+        restored.update(_state(chamber_cotton=6))
+        self.assertEqual(restored.tasks[0].task_id, transport.task_id)
+
+    def test_compaction_keeps_state(self):
+        board, journal = self._restore(compact_every=2)
+        board.post_task(_produce_cotton_task(target=10))
+        board.update(_state())
+        board.update(_state(chamber_cotton=2))
+        board.update(_state(chamber_cotton=4))
+        journal.close()
+        self.assertTrue(os.path.exists(journal.snapshot_path))
+
+        restored, _ = self._restore()
+        self.assertEqual(len(restored.tasks), 1)
+        self.assertEqual(restored.progress_counters, {"produce:1001": 4})
+
+    def test_unchanged_repost_is_not_journaled(self):
+        board, journal = self._restore()
+        board.post_task(_produce_cotton_task(target=10))
+        board.post_task(_produce_cotton_task(target=10))
+        board.post_task(_produce_cotton_task(target=10))
+        journal.close()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+        board, journal = self._restore()
+        board.post_task(_produce_cotton_task(target=12))
+        journal.close()
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+        restored, _ = self._restore()
+        self.assertEqual(restored.tasks[0].progress_target, 12)
+
+    def test_torn_tail_is_discarded(self):
+        board, journal = self._restore()
+        board.post_task(_produce_cotton_task(target=10))
+        journal.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"op": "remove", "task_')
+
+        restored, journal = self._restore()
+        self.assertEqual(len(restored.tasks), 1)
+        restored.post_task(BlackboardTask("Plant Corn", Goal("CultivateChamber_3", "CultivateInfo", "CurrentPhase", "==", "Growing")))
+        journal.close()
+
+        again, _ = self._restore()
+        self.assertEqual(len(again.tasks), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+from blackboard import Blackboard, BlackboardTask, Goal
+import blackboard_render
+from blackboard_render import BlackboardRenderer
+
+
+def _env(stock, stove_stock=0):
+    return {"Actors": [{"ActorName": "Storage_1", "ActorType": "EInteractionType::EAT_Storage",
+                        "Inventory": {"1001": stock}},
+                       {"ActorName": "Stove", "ActorType": "EInteractionType::EAT_Stove",
+                        "Inventory": {"2003": stove_stock}}]}
+
+
+def _task(desc, key, precondition=None):
+    preconditions = [precondition] if precondition else []
+    return BlackboardTask(desc, Goal("Storage_1", "Inventory", key, ">=", 99), preconditions=preconditions)
+
+
+class TestBlackboardRenderer(unittest.TestCase):
+    def setUp(self):
+        self.bb = Blackboard()
+        self.bb.tasks = [
+            _task("Farm", "1001"),
+            _task("Cook", "2001", Goal("Storage_1", "Inventory", "1001", ">=", 2)),
+        ]
+        self.renderer = BlackboardRenderer()
+
+    def _render(self, env, mode="diff"):
+        # 与服务器一致：先 update 黑板，再输出
+        self.bb.update({"Environment": env})
+        return self.renderer.render(self.bb, env, mode=mode)
+
+    def test_first_render_is_full_list(self):
+        lines = self._render(_env(0))
+        self.assertEqual(lines[0], "[Blackboard] 任务列表:")
+        self.assertEqual(lines[1], "    1. [None] Farm")
+        self.assertIn("[Preconditions Unmet: Storage_1.Inventory[1001] >= 2]", lines[2])
+
+    def test_unchanged_blackboard_emits_nothing(self):
+        self._render(_env(0))
+        self.assertEqual(self._render(_env(0)), [])
+
+    def test_diff_reports_added_removed_and_flipped(self):
+        self._render(_env(0))
+        removed = self.bb.tasks.pop(0)
+        self.bb.tasks.append(_task("Craft", "3001"))
+        lines = self._render(_env(5))
+        self.assertEqual(lines[0], "[Blackboard] 任务变化: +1 ~1 -1（共 2 项）")
+        self.assertIn("    1. [~] [None] Cook [All Preconditions Met]", lines)
+        self.assertIn("    2. [+] [None] Craft", lines)
+        self.assertIn(f"    1. [-] [None] {removed.description}", lines)
+
+    def test_preconditions_rechecked_only_when_inputs_change(self):
+        self._render(_env(0))
+        with mock.patch("blackboard_render.precondition_status", wraps=blackboard_render.precondition_status) as evaluate:
+            self.assertEqual(self._render(_env(0)), [])
+            self.assertEqual(self._render(_env(0, stove_stock=3)), [])
+        evaluate.assert_not_called()
+        lines = self._render(_env(5))
+        self.assertIn("    2. [~] [None] Cook [All Preconditions Met]", lines)
+
+    def test_changed_preconditions_are_rechecked(self):
+        self._render(_env(5))
+        self.bb.tasks[1].preconditions = [Goal("Storage_1", "Inventory", "1001", ">=", 9)]
+        self.assertIn("[Preconditions Unmet: Storage_1.Inventory[1001] >= 9]", self._render(_env(5))[1])
+
+    def test_full_mode_repeats_list(self):
+        self._render(_env(0), mode="full")
+        self.assertEqual(len(self._render(_env(0), mode="full")), 3)
+
+    def test_off_mode_skips_precondition_evaluation(self):
+        with mock.patch.object(Goal, "is_satisfied") as is_satisfied:
+            self.assertEqual(self.renderer.render(self.bb, _env(0), mode="off"), [])
+        is_satisfied.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
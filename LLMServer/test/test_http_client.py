@@ -0,0 +1,70 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import requests
+    from http_client import SERVER_TIME_HEADER, PooledHttpClient
+except ImportError:
+    requests = None
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    peers = set()
+
+    def do_POST(self):
+        _EchoHandler.peers.add(self.client_address)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        payload = json.dumps({"echo": json.loads(body)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header(SERVER_TIME_HEADER, "2.5")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(requests is None, "requests is not installed")
+class TestPooledHttpClient(unittest.TestCase):
+    def setUp(self):
+        _EchoHandler.peers = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/GetInstruction"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive_and_timings(self):
+        client = PooledHttpClient()
+        self.assertEqual(client.post_json(self.url, {"a": 1}), {"echo": {"a": 1}})
+        self.assertEqual(client.post_json(self.url, b'{"b":2}'), {"echo": {"b": 2}})
+        client.close()
+
+        # 两次请求复用同一个连接（同一个客户端端口）
+        self.assertEqual(len(_EchoHandler.peers), 1)
+        stats = client.summary()
+        self.assertEqual(stats["requests"], 2.0)
+        self.assertEqual(stats["server_ms_mean"], 2.5)
+        self.assertGreaterEqual(stats["roundtrip_ms_mean"], stats["network_ms_mean"])
+
+    def test_timings_are_bounded(self):
+        client = PooledHttpClient(timing_window=2)
+        for i in range(5):
+            client.post_json(self.url, {"i": i})
+        client.close()
+        self.assertEqual(len(client.timings), 2)
+        stats = client.summary()
+        self.assertEqual(stats["requests"], 5.0)
+        self.assertEqual(stats["server_ms_mean"], 2.5)
+        self.assertTrue(client.format_summary().startswith("  HTTP (mean/p95 ms): "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from blackboard import Blackboard, BlackboardTask, Goal
+from blackboard_render import BlackboardRenderer
+from reconstruct_game_run import _infer_goals_from_log
+from split_log_by_role import split_lines
+
+FILTERS = ["[GetInstruction]", "[决策]", "[Blackboard]"]
+
+
+def _diff_mode_log():
+    """用 diff 模式的渲染结果拼出一段服务器日志"""
+    env = {"Actors": [{"ActorName": "Storage", "Inventory": {"1001": 0}}]}
+    board = Blackboard()
+    board.post_task(BlackboardTask("Make 2× Meal at Stove", Goal("Stove", "TaskList", "2003", "<=", 0)))
+    renderer = BlackboardRenderer()
+
+    lines = ["[GetInstruction] 角色: Chef, 时间: Day 1 08:00"]
+    board.update({"Environment": env})
+    lines += renderer.render(board, env, mode="diff")
+    lines.append("[Chef 决策] {'command': 'Wait'}")
+
+    lines.append("[GetInstruction] 角色: Crafter, 时间: Day 1 08:00")
+    board.post_task(BlackboardTask("Make 4× Coat at WorkStation", Goal("WorkStation", "TaskList", "2004", "<=", 0)))
+    board.update({"Environment": env})
+    lines += renderer.render(board, env, mode="diff")
+    lines.append("[Crafter 决策] {'command': 'Wait'}")
+    return lines
+
+
+class TestLogParsers(unittest.TestCase):
+    def test_split_keeps_diff_lines_with_their_role(self):
+        roles = split_lines(_diff_mode_log(), FILTERS)
+        self.assertIn("    1. [None] Make 2× Meal at Stove", roles["Chef"])
+        self.assertEqual(roles["Crafter"][1], "[Blackboard] 任务变化: +1 ~0 -0（共 2 项）")
+        self.assertEqual(roles["Crafter"][2], "    2. [+] [None] Make 4× Coat at WorkStation")
+
+    def test_goal_inference_reads_diff_lines(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "server.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(_diff_mode_log()) + "\n")
+            self.assertEqual(_infer_goals_from_log(path), (2, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
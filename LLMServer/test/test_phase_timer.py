@@ -0,0 +1,32 @@
+import time
+import unittest
+from phase_timer import begin_request, end_request, format_phases_header, parse_phases_header, phase
+
+
+class TestPhaseTimer(unittest.TestCase):
+    def test_nested_phases_are_exclusive(self):
+        begin_request()
+        with phase("outer"):
+            time.sleep(0.01)
+            with phase("inner"):
+                time.sleep(0.02)
+        phases = end_request()
+        self.assertGreaterEqual(phases["inner"], 0.02)
+        self.assertGreaterEqual(phases["outer"], 0.01)
+        # 子阶段的耗时不计入父阶段
+        self.assertLess(phases["outer"], 0.02)
+
+    def test_inactive_without_begin(self):
+        end_request()
+        with phase("perceive"):
+            pass
+        self.assertIsNone(end_request())
+
+    def test_header_round_trip(self):
+        header = format_phases_header({"update": 0.0015, "llm": 0.25})
+        self.assertEqual(parse_phases_header(header), {"update": 1.5, "llm": 250.0})
+        self.assertEqual(parse_phases_header("garbage;x=oops"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
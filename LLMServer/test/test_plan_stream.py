@@ -0,0 +1,57 @@
+import unittest
+from plan_stream import build_plan, check_preconditions, is_plan_mode
+
+
+def _state(storage_cotton=4):
+    char = {"CharacterName": "Crafter", "CurrentLocation": "WorkStation", "Inventory": {}}
+    env = {"Actors": [
+        {"ActorName": "Storage", "Inventory": {"1001": storage_cotton}},
+        {"ActorName": "WorkStation", "Inventory": {}},
+    ]}
+    return char, env
+
+
+def _transport(count):
+    return [
+        {"CommandType": "Move", "TargetName": "Storage", "ParamID": 0, "Count": 0},
+        {"CommandType": "Take", "TargetName": "Storage", "ParamID": 1001, "Count": count},
+        {"CommandType": "Move", "TargetName": "WorkStation", "ParamID": 0, "Count": 0},
+        {"CommandType": "Put", "TargetName": "WorkStation", "ParamID": 1001, "Count": count},
+    ]
+
+
+class TestPlanStream(unittest.TestCase):
+    def test_plan_mode_flag(self):
+        self.assertTrue(is_plan_mode({"ResponseMode": "Plan"}))
+        self.assertFalse(is_plan_mode({}))
+
+    def test_preconditions_follow_projected_location(self):
+        char, env = _state()
+        plan = build_plan(_transport(3), char, env)
+        self.assertEqual([s["RemainingSteps"] for s in plan], [3, 2, 1, 0])
+        self.assertEqual(plan[0]["Preconditions"], [])
+        self.assertEqual(plan[1]["Preconditions"], [
+            {"Type": "AtLocation", "Target": "Storage"},
+            {"Type": "ActorHasItem", "Actor": "Storage", "ItemID": 1001, "Count": 3},
+        ])
+        self.assertIn({"Type": "CarryingItem", "ItemID": 1001, "Count": 3}, plan[3]["Preconditions"])
+        # 原始输入不被修改
+        self.assertEqual(env["Actors"][0]["Inventory"], {"1001": 4})
+
+    def test_plan_truncated_at_first_unsatisfiable_step(self):
+        char, env = _state(storage_cotton=1)
+        plan = build_plan(_transport(3), char, env)
+        self.assertEqual([s["CommandType"] for s in plan], ["Move"])
+
+    def test_client_side_check(self):
+        char, env = _state()
+        take = build_plan(_transport(3), char, env)[1]
+        self.assertIn("Not at Storage", check_preconditions(take["Preconditions"], char, env))
+        char["CurrentLocation"] = "Storage"
+        self.assertIsNone(check_preconditions(take["Preconditions"], char, env))
+        env["Actors"][0]["Inventory"]["1001"] = 2
+        self.assertIsNotNone(check_preconditions(take["Preconditions"], char, env))
+
+
+if __name__ == "__main__":
+    unittest.main()
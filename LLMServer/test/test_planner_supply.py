@@ -0,0 +1,63 @@
+import sys
+import unittest
+
+import config_stub  # noqa: F401
+from blackboard import Blackboard
+from game_data_manager import GameDataManager
+from planner import Planner
+
+
+def _chain(depth):
+    """物品 i 需要 1 个物品 i+1，最后一个为种植原料"""
+    items = [{"ItemID": i, "ItemName": f"Item{i}", "SpaceCost": 1} for i in range(depth)]
+    tasks = [{"TaskID": i, "ProductID": i, "RequiredFacility": "WorkStation",
+              "Ingredients": [{"ItemID": i + 1, "Count": 1}] if i + 1 < depth else []}
+             for i in range(depth)]
+    return items, tasks
+
+
+def _env():
+    return {"Actors": [{"ActorName": "WorkStation", "Inventory": {}}, {"ActorName": "Storage", "Inventory": {}}]}
+
+
+class TestSystemSupply(unittest.TestCase):
+    def test_chain_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 200
+        board = Blackboard()
+        planner = Planner(board, game_data=GameDataManager.from_catalog(*_chain(depth)))
+        task_id = planner._trigger_system_supply(0, 2, "WorkStation", _env())
+        self.assertEqual(len(board.tasks), depth)
+        self.assertEqual(board.tasks[0].task_id, task_id)
+        self.assertEqual(board.tasks[-1].goal.value, 2)
+
+    def test_shared_ingredient_posted_once_with_total_need(self):
+        items = [{"ItemID": i, "ItemName": name, "SpaceCost": 1} for i, name in enumerate(["Coat", "Cloth", "Thread", "Cotton"])]
+        tasks = [
+            {"TaskID": 0, "ProductID": 0, "RequiredFacility": "WorkStation",
+             "Ingredients": [{"ItemID": 1, "Count": 1}, {"ItemID": 2, "Count": 1}]},
+            {"TaskID": 1, "ProductID": 1, "RequiredFacility": "WorkStation", "Ingredients": [{"ItemID": 2, "Count": 2}]},
+            {"TaskID": 2, "ProductID": 2, "RequiredFacility": "WorkStation", "Ingredients": [{"ItemID": 3, "Count": 1}]},
+            {"TaskID": 3, "ProductID": 3, "RequiredFacility": "CultivateChamber", "Ingredients": []},
+        ]
+        board = Blackboard()
+        Planner(board, game_data=GameDataManager.from_catalog(items, tasks))._trigger_system_supply(0, 1, "WorkStation", _env())
+        thread = [t for t in board.tasks if "Produce Thread" in t.description]
+        self.assertEqual(len(thread), 1)
+        self.assertEqual(thread[0].goal.value, 3)
+        self.assertIn("(For CultivateChamber)", board.tasks[-1].description)
+
+    def test_cycle_is_not_expanded(self):
+        items = [{"ItemID": i, "ItemName": f"Item{i}", "SpaceCost": 1} for i in range(3)]
+        tasks = [
+            {"TaskID": 0, "ProductID": 0, "RequiredFacility": "WorkStation", "Ingredients": [{"ItemID": 1, "Count": 1}]},
+            {"TaskID": 1, "ProductID": 1, "RequiredFacility": "WorkStation", "Ingredients": [{"ItemID": 2, "Count": 1}]},
+            {"TaskID": 2, "ProductID": 2, "RequiredFacility": "WorkStation", "Ingredients": [{"ItemID": 1, "Count": 1}]},
+        ]
+        board = Blackboard()
+        Planner(board, game_data=GameDataManager.from_catalog(items, tasks))._trigger_system_supply(0, 1, "WorkStation", _env())
+        self.assertEqual([t.description.split(" (")[0] for t in board.tasks],
+                         ["System Request: Produce Item0", "System Request: Produce Item1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+import config_stub  # noqa: F401
+from blackboard import Blackboard
+from game_data_manager import GameDataManager
+from planner import Planner
+
+ITEMS = [
+    {"ItemID": 1001, "ItemName": "Cotton", "SpaceCost": 1},
+    {"ItemID": 1002, "ItemName": "Corn", "SpaceCost": 2},
+    {"ItemID": 2001, "ItemName": "Thread", "SpaceCost": 1},
+]
+TASKS = [
+    {"TaskID": 1001, "ProductID": 1001, "Ingredients": [], "RequiredFacility": "CultivateChamber"},
+    {"TaskID": 1002, "ProductID": 1002, "Ingredients": [], "RequiredFacility": "CultivateChamber"},
+    {"TaskID": 2001, "ProductID": 2001, "RequiredFacility": "WorkStation",
+     "Ingredients": [{"ItemID": 1001, "Count": 6}, {"ItemID": 1002, "Count": 3}]},
+]
+
+
+def _env(storage, workstation=None, **workstation_fields):
+    ws = {"ActorName": "WorkStation_1", "ActorType": "EInteractionType::EAT_WorkStation",
+          "Inventory": workstation or {}}
+    ws.update(workstation_fields)
+    return {"Actors": [
+        {"ActorName": "Storage_1", "ActorType": "EInteractionType::EAT_Storage", "Inventory": storage},
+        ws,
+    ]}
+
+
+def _moved(plan, command):
+    return sum(c["Count"] for c in plan if c["CommandType"] == command)
+
+
+class TestTransportPlanning(unittest.TestCase):
+    def setUp(self):
+        self.planner = Planner(Blackboard(), game_data=GameDataManager.from_catalog(ITEMS, TASKS))
+
+    def _transport(self, env, count, carry_capacity=50):
+        params = {"target_name": "Storage_1", "aux_name": "WorkStation_1", "item_id": 1001,
+                  "count": count, "current_location": "Storage_1", "carry_capacity": carry_capacity}
+        return self.planner._plan_transport("Farmer", params, env)
+
+    def test_trips_split_by_carry_capacity(self):
+        result = self._transport(_env({"1001": 12}), count=12, carry_capacity=5)
+        self.assertTrue(result.success)
+        takes = [c["Count"] for c in result.plan if c["CommandType"] == "Take"]
+        self.assertEqual(takes, [5, 5, 2])
+        self.assertEqual(_moved(result.plan, "Put"), 12)
+
+    def test_craft_merges_ingredients_from_same_source(self):
+        env = _env({"1001": 10, "1002": 10})
+        result = self.planner._plan_craft("Crafter", {"target_name": "Thread", "current_location": "Storage_1",
+                                                      "carry_capacity": 8}, env)
+        self.assertTrue(result.success)
+        takes = [(c["ParamID"], c["Count"]) for c in result.plan if c["CommandType"] == "Take"]
+        # 6 Cotton (6) + 3 Corn (6)：第一趟装 6 Cotton + 1 Corn，第二趟 2 Corn
+        self.assertEqual(takes, [(1001, 6), (1002, 1), (1002, 2)])
+        self.assertEqual(result.plan[-1]["CommandType"], "Use")
+
+    def test_count_clamped_to_source_stock(self):
+        result = self._transport(_env({"1001": 3}), count=10)
+        self.assertEqual(_moved(result.plan, "Put"), 3)
+
+    def test_count_clamped_to_destination_space(self):
+        result = self._transport(_env({"1001": 30}, {"1002": 22}), count=30)
+        self.assertTrue(result.success)
+        self.assertEqual(_moved(result.plan, "Put"), 6)
+
+        result = self._transport(_env({"1001": 30}, TotalSpace=4), count=30)
+        self.assertEqual(_moved(result.plan, "Put"), 4)
+
+    def test_full_destination_fails(self):
+        result = self._transport(_env({"1001": 30}, {"2001": 5}, TotalSpace=5), count=3)
+        self.assertFalse(result.success)
+        self.assertEqual(_moved(result.plan, "Put"), 0)
+
+    def test_overfull_facility_without_capacity_is_full(self):
+        # 已用空间超过默认容量且没有配置容量：视为已满，而不是不限制
+        result = self._transport(_env({"1001": 30}, {"2001": 60}), count=20)
+        self.assertFalse(result.success)
+        self.assertEqual(_moved(result.plan, "Put"), 0)
+
+    def test_capacity_from_game_data(self):
+        game_data = GameDataManager.from_catalog(ITEMS, TASKS, actor_capacities={"WorkStation": 70})
+        self.planner = Planner(Blackboard(), game_data=game_data)
+        result = self._transport(_env({"1001": 30}, {"2001": 60}), count=20)
+        self.assertEqual(_moved(result.plan, "Put"), 10)
+
+    def test_craft_fails_when_facility_cannot_hold_ingredients(self):
+        env = _env({"1001": 10, "1002": 10}, TotalSpace=10)
+        result = self.planner._plan_craft("Crafter", {"target_name": "Thread", "current_location": "Storage_1"}, env)
+        self.assertFalse(result.success)
+        self.assertIn("Not enough space", result.feedback)
+
+
+if __name__ == "__main__":
+    unittest.main()
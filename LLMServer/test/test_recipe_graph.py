@@ -0,0 +1,40 @@
+import unittest
+from recipe_graph import RecipeGraph
+
+
+def _recipe(product, *ingredients):
+    return {"TaskID": product, "ProductID": product, "Ingredients": [{"ItemID": i, "Count": c} for i, c in ingredients]}
+
+
+class TestRecipeGraph(unittest.TestCase):
+    def test_depth_order_and_shared_requirements(self):
+        items = [{"ItemID": i, "ItemName": f"I{i}"} for i in (1001, 2001, 2002, 3001)]
+        tasks = [
+            _recipe(1001),
+            _recipe(2001, (1001, 1)),
+            _recipe(2002, (1001, 2)),
+            _recipe(3001, (2001, 1), (2002, 3)),
+        ]
+        graph = RecipeGraph.compile(items, tasks)
+        self.assertEqual(graph.problems(), [])
+        self.assertEqual(graph.depth, {"1001": 0, "2001": 1, "2002": 1, "3001": 2})
+        self.assertLess(graph.order.index("3001"), graph.order.index("2002"))
+        self.assertLess(graph.order.index("2002"), graph.order.index("1001"))
+        # 1001 经两条路径共享：2×(1×1 + 3×2) = 14
+        self.assertEqual(graph.requirements("3001", 2), {"3001": 2, "2001": 2, "2002": 6, "1001": 14})
+
+    def test_cycles_and_missing_recipes_are_reported(self):
+        items = [{"ItemID": i, "ItemName": f"I{i}"} for i in (1, 2, 3, 4)]
+        tasks = [_recipe(1, (2, 1)), _recipe(2, (1, 1)), _recipe(3, (3, 1)), _recipe(4, (1, 2), (5, 1))]
+        graph = RecipeGraph.compile(items, tasks)
+        self.assertEqual(graph.cycles, [["1", "2"], ["3"]])
+        self.assertEqual(graph.unproducible, {"5"})
+        self.assertEqual(graph.unknown_items, {"5"})
+        self.assertEqual(graph.unreachable, {"1", "2", "3", "4"})
+        # 环上的配方不展开，需求计算必然终止
+        self.assertEqual(graph.requirements("4", 1), {"4": 1, "1": 2, "5": 1})
+        self.assertEqual(len(graph.problems()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import request_profiler
+
+
+def _leaf():
+    return sum(i * i for i in range(20000))
+
+
+def _outer():
+    return _leaf() + _leaf()
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def test_samples_every_nth_request_and_writes_profiles(self):
+        with tempfile.TemporaryDirectory() as out_dir, mock.patch.dict(os.environ, {"RIMSPACE_PROFILE_EVERY": "2"}):
+            samples = []
+            for _ in range(4):
+                sample = request_profiler.start_if_sampled()
+                if sample is not None:
+                    _outer()
+                    samples.append(request_profiler.finish(sample, out_dir, "Farmer 1"))
+            self.assertEqual(len(samples), 2)
+            self.assertTrue(all(os.path.isfile(p) for p in samples))
+            self.assertTrue(samples[0].endswith("_Farmer_1.prof"))
+
+            with open(samples[0].replace(".prof", ".folded"), encoding="utf-8") as f:
+                folded = f.read()
+            self.assertRegex(folded, r"test_request_profiler.py:_outer:\d+;test_request_profiler.py:_leaf:\d+")
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ, {"RIMSPACE_PROFILE_EVERY": "0"}):
+            self.assertIsNone(request_profiler.start_if_sampled())
+
+
+if __name__ == "__main__":
+    unittest.main()
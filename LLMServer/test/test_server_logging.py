@@ -0,0 +1,24 @@
+import unittest
+from unittest import mock
+import server_logging
+
+
+class TestRequestSummary(unittest.TestCase):
+    def test_summary_emitted_once_per_window(self):
+        summary = server_logging.RequestSummary(interval=10.0)
+        with mock.patch("server_logging.time.monotonic", side_effect=[1.0, 5.0, 12.0, 13.0]):
+            summary._reset(0.0)
+            self.assertIsNone(summary.note(0.002, source="llm", task_count=4))
+            self.assertIsNone(summary.note(0.004, source="queue"))
+            line = summary.note(0.006, source="queue", ok=False)
+            self.assertIsNone(summary.note(0.001, source="llm"))
+        self.assertIn("3 requests in 12.0s", line)
+        self.assertIn("mean 4.0 ms, max 6.0 ms", line)
+        self.assertIn("errors 1, sources llm=1 queue=2, blackboard tasks 4", line)
+
+    def test_disabled_interval(self):
+        self.assertIsNone(server_logging.RequestSummary(interval=0).note(0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import server_metrics
+from blackboard import Blackboard, BlackboardTask, Goal
+
+
+class TestServerMetrics(unittest.TestCase):
+    def setUp(self):
+        server_metrics.reset()
+
+    def tearDown(self):
+        server_metrics.reset()
+
+    def test_counter_and_histogram_render(self):
+        server_metrics.inc("rimspace_decisions_total", source="queue")
+        server_metrics.inc("rimspace_decisions_total", source="queue")
+        server_metrics.observe("rimspace_phase_seconds", 0.003, phase="perceive")
+        server_metrics.observe("rimspace_phase_seconds", 100.0, phase="perceive")
+        text = server_metrics.render_prometheus()
+
+        self.assertIn("# TYPE rimspace_decisions_total counter", text)
+        self.assertIn('rimspace_decisions_total{source="queue"} 2', text)
+        self.assertIn('rimspace_phase_seconds_bucket{phase="perceive",le="0.0025"} 0', text)
+        self.assertIn('rimspace_phase_seconds_bucket{phase="perceive",le="0.005"} 1', text)
+        self.assertIn('rimspace_phase_seconds_bucket{phase="perceive",le="+Inf"} 2', text)
+        self.assertIn('rimspace_phase_seconds_count{phase="perceive"} 2', text)
+        self.assertIn('rimspace_phase_seconds_sum{phase="perceive"} 100.003', text)
+
+    def test_blackboard_posts_are_counted(self):
+        bb = Blackboard()
+        goal = Goal("Storage", "Inventory", "1001", ">=", 5)
+        bb.post_task(BlackboardTask("Collect cotton", goal))
+        bb.post_task(BlackboardTask("Collect cotton", Goal("Storage", "Inventory", "1001", ">=", 5)))
+        text = server_metrics.render_prometheus()
+        self.assertIn('rimspace_tasks_posted_total{result="new"} 1', text)
+        self.assertIn('rimspace_tasks_posted_total{result="refreshed"} 1', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
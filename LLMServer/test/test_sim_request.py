@@ -0,0 +1,33 @@
+import json
+import unittest
+from sim_production_mission import SimWorld, build_default_world
+
+
+class TestBuildRequestBytes(unittest.TestCase):
+    def setUp(self):
+        self.world = SimWorld(build_default_world())
+
+    def test_bytes_match_dict_request(self):
+        self.world.apply_command("Farmer", {"CommandType": "Move", "TargetName": "CultivateChamber_1"})
+        self.world.apply_command("Farmer", {"CommandType": "Use"})
+        encoded = json.loads(self.world.build_request_bytes("Farmer", {"ResponseMode": "plan"}))
+        self.assertEqual(encoded["InventoryDeltas"], [])
+        self.assertEqual(encoded.pop("ResponseMode"), "plan")
+        self.assertEqual(encoded, self.world.build_request("Farmer"))
+
+    def test_environment_reused_until_it_changes(self):
+        self.world.build_request_bytes("Farmer")
+        cached_env = self.world._encoded_env[1]
+        self.world.apply_command("Farmer", {"CommandType": "Move", "TargetName": "Storage"})
+        payload = json.loads(self.world.build_request_bytes("Crafter"))
+        self.assertIs(self.world._encoded_env[1], cached_env)
+        farmer = next(c for c in payload["Characters"]["Characters"] if c["CharacterName"] == "Farmer")
+        self.assertEqual(farmer["CurrentLocation"], "Storage")
+
+        self.world.tick_environment(12)
+        self.world.build_request_bytes("Chef")
+        self.assertIsNot(self.world._encoded_env[1], cached_env)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import unittest
+from sim_production_mission import SimWorld, build_default_world
+
+try:
+    import numpy
+    from sim_vector_world import VectorSimWorld
+except ImportError:
+    numpy = None
+
+
+def _normalized(world, agent="Farmer"):
+    request = world.build_request(agent)
+    request["Environment"]["Actors"].sort(key=lambda a: a["ActorName"])
+    return json.loads(json.dumps(request, sort_keys=True))
+
+
+_SCRIPT = [
+    ("Farmer", {"CommandType": "Move", "TargetName": "CultivateChamber_1"}),
+    ("Farmer", {"CommandType": "Use", "TargetName": "CultivateChamber_1"}),
+    ("Crafter", {"CommandType": "Move", "TargetName": "Storage"}),
+    ("Crafter", {"CommandType": "Take", "ParamID": 1001, "Count": 2}),
+    ("Crafter", {"CommandType": "Take", "ParamID": 1001, "Count": 5}),
+    ("Crafter", {"CommandType": "Move", "TargetName": "WorkStation"}),
+    ("Crafter", {"CommandType": "Put", "ParamID": 1001, "Count": 2}),
+    ("Crafter", {"CommandType": "Use", "ParamID": 3001}),
+    ("Chef", {"CommandType": "Move", "TargetName": "Bed_1"}),
+    ("Chef", {"CommandType": "Use", "TargetName": "Bed_1"}),
+    ("Chef", {"CommandType": "Wait", "ParamID": 7}),
+]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestVectorSimWorld(unittest.TestCase):
+    def _worlds(self):
+        data = build_default_world(meal_goal=1, coat_goal=1)
+        for actor in data["Environment"]["Actors"]:
+            if actor["ActorName"] == "Storage":
+                actor["Inventory"] = {"1001": 3}
+        return SimWorld(json.loads(json.dumps(data))), VectorSimWorld(data)
+
+    def test_matches_dict_world(self):
+        reference, vector = self._worlds()
+        for step, (agent, command) in enumerate(_SCRIPT):
+            reference.apply_command(agent, dict(command))
+            vector.apply_command(agent, dict(command))
+            if step % 3 == 0:
+                reference.degrade_character_stats(10)
+                vector.degrade_character_stats(10)
+            reference.tick_environment(12)
+            vector.tick_environment(12)
+            self.assertEqual(_normalized(vector), _normalized(reference), f"diverged after step {step}")
+        self.assertEqual(vector.has_pending_tasks(), reference.has_pending_tasks())
+
+    def test_closed_form_growth(self):
+        reference, vector = self._worlds()
+        for world in (reference, vector):
+            world.apply_command("Farmer", {"CommandType": "Move", "TargetName": "CultivateChamber_2"})
+            world.apply_command("Farmer", {"CommandType": "Use"})
+            world.tick_environment(10)
+            world.tick_environment(100)
+        self.assertEqual(_normalized(vector), _normalized(reference))
+        self.assertEqual(vector._find_actor("CultivateChamber_2")["CultivateInfo"]["CurrentPhase"],
+                         "ECultivatePhase::ECP_ReadyToHarvest")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from blackboard import Blackboard, BlackboardTask, Goal
+from state_backend import STATE_FORMAT_VERSION, SQLiteStateBackend
+
+
+class _FakeAgent:
+    def __init__(self, name):
+        self.name = name
+        self.action_queue = []
+
+    def export_state(self):
+        return {"action_queue": self.action_queue}
+
+    def load_state(self, state):
+        self.action_queue = state.get("action_queue", [])
+
+
+class TestSQLiteStateBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "state.sqlite3")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_blackboard_shared_between_backends(self):
+        # 两个后端实例模拟两个 worker 进程，各自持有独立的黑板对象
+        worker_a = SQLiteStateBackend(self.path)
+        worker_b = SQLiteStateBackend(self.path)
+        board_a = Blackboard()
+        board_b = Blackboard()
+
+        with worker_a.transaction(board_a):
+            board_a.post_task(BlackboardTask("Plant Cotton", Goal("CultivateChamber_1", "CultivateInfo", "CurrentPhase", "==", "Growing")))
+
+        with worker_b.transaction(board_b):
+            self.assertEqual([t.description for t in board_b.tasks], ["Plant Cotton"])
+            board_b.tasks = []
+
+        with worker_a.transaction(board_a):
+            self.assertEqual(board_a.tasks, [])
+
+    def test_state_from_older_format_is_discarded(self):
+        worker = SQLiteStateBackend(self.path)
+        with worker.transaction(Blackboard()) as tx:
+            tx.sync_agent(_FakeAgent("Farmer"))
+        # 模拟旧版本写入的状态：格式版本不同，内容无法按当前类结构反序列化
+        conn = sqlite3.connect(self.path)
+        conn.execute("UPDATE blackboard_state SET payload = ?", (b"not a current pickle",))
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        conn.close()
+
+        restarted = SQLiteStateBackend(self.path)
+        board = Blackboard()
+        with restarted.transaction(board):
+            self.assertEqual(board.tasks, [])
+        conn = sqlite3.connect(self.path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], STATE_FORMAT_VERSION)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM agent_state").fetchone()[0], 0)
+        conn.close()
+
+    def test_agent_queue_shared_between_backends(self):
+        worker_a = SQLiteStateBackend(self.path)
+        worker_b = SQLiteStateBackend(self.path)
+        agent_a = _FakeAgent("Farmer")
+        agent_b = _FakeAgent("Farmer")
+
+        with worker_a.transaction(Blackboard()) as tx:
+            tx.sync_agent(agent_a)
+            agent_a.action_queue = [{"CommandType": "Move"}, {"CommandType": "Use"}]
+
+        with worker_b.transaction(Blackboard()) as tx:
+            tx.sync_agent(agent_b)
+            self.assertEqual(agent_b.action_queue.pop(0), {"CommandType": "Move"})
+
+        with worker_a.transaction(Blackboard()) as tx:
+            tx.sync_agent(agent_a)
+            self.assertEqual(agent_a.action_queue, [{"CommandType": "Use"}])
+
+    def test_reset_clears_state(self):
+        board = Blackboard()
+        with SQLiteStateBackend(self.path).transaction(board):
+            board.progress_counters["produce:1001"] = 3
+
+        fresh = Blackboard()
+        with SQLiteStateBackend(self.path, reset=True).transaction(fresh):
+            self.assertEqual(fresh.progress_counters, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
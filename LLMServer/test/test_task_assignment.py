@@ -0,0 +1,119 @@
+import unittest
+from unittest import mock
+from blackboard import Blackboard, BlackboardTask, Goal
+from task_assignment import TaskAssigner, decision_for_task, solve_assignment
+from travel_graph import TravelGraph
+
+INF = float("inf")
+
+
+class _FakePlanner:
+    """只提供 task_assignment 用到的配方索引与路径代价"""
+    def __init__(self):
+        self.item_map = {"2001": {"ItemName": "Thread"}, "1001": {"ItemName": "Cotton"}}
+        self.item_name_to_id = {"Thread": 2001, "Cotton": 1001}
+        self.task_map = {"2001": {"ProductID": 2001}}
+        self.product_to_recipe = {
+            "2001": {"RequiredFacility": "WorkStation"},
+            "1001": {"RequiredFacility": "CultivateChamber"},
+        }
+
+    def find_actor_by_type(self, type_suffix, environment):
+        return type_suffix
+
+    def get_travel_graph(self, environment):
+        return TravelGraph.from_environment(environment)
+
+
+def _harvest_task(chamber):
+    goal = Goal(chamber, "CultivateInfo", "CurrentPhase", "==", "ECultivatePhase::ECP_WaitingToPlant")
+    return BlackboardTask(f"Harvest Cotton from {chamber}", goal, required_skill="canFarm")
+
+
+def _farmer(name, location, hunger=100):
+    return {"CharacterName": name, "CurrentLocation": location, "CharacterSkills": ["canFarm"],
+            "CharacterStats": {"Hunger": hunger, "Energy": 100}}
+
+
+class TestSolveAssignment(unittest.TestCase):
+    def test_minimum_cost(self):
+        cost = [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+        self.assertEqual(solve_assignment(cost), [(0, 1), (1, 0), (2, 2)])
+
+    def test_rectangular_and_infeasible(self):
+        self.assertEqual(solve_assignment([[5, 1], [2, 9], [1, 1]]), [(0, 1), (2, 0)])
+        self.assertEqual(solve_assignment([[INF, INF], [3, INF]]), [(1, 0)])
+
+
+class TestDecisionForTask(unittest.TestCase):
+    def test_conversions(self):
+        planner = _FakePlanner()
+        self.assertEqual(decision_for_task(_harvest_task("CultivateChamber_1"), planner)["command"], "Harvest")
+
+        craft = BlackboardTask("Make 2× Thread at WorkStation", Goal("WorkStation", "TaskList", "2001", "<=", 0))
+        self.assertEqual(decision_for_task(craft, planner)["target_name"], "Thread")
+
+        produce_crop = BlackboardTask("System Request: Produce Cotton", Goal("Global", "Inventory", "1001", ">=", 3))
+        self.assertIsNone(decision_for_task(produce_crop, planner))
+
+        transport = BlackboardTask("System Request: Transport Cotton", Goal("WorkStation", "Inventory", "1001", ">=", 3))
+        transport.item_id, transport.source, transport.destination, transport.count = "1001", "Storage", "WorkStation", 3
+        decision = decision_for_task(transport, planner)
+        self.assertEqual((decision["target_name"], decision["aux_name"], decision["count"]), ("Storage", "WorkStation", 3))
+
+
+class TestTaskAssigner(unittest.TestCase):
+    def setUp(self):
+        self.board = Blackboard()
+        self.board.post_task(_harvest_task("CultivateChamber_1"))
+        self.board.post_task(_harvest_task("CultivateChamber_2"))
+        self.env = {"Actors": [
+            {"ActorName": "CultivateChamber_1", "Location": {"X": 0, "Y": 0}},
+            {"ActorName": "CultivateChamber_2", "Location": {"X": 100, "Y": 0}},
+            {"ActorName": "Storage", "Location": {"X": 95, "Y": 0}},
+            {"ActorName": "Bed_1", "Location": {"X": 5, "Y": 0}},
+        ]}
+        self.assigner = TaskAssigner(_FakePlanner())
+
+    def test_each_agent_gets_nearest_distinct_task(self):
+        chars = [_farmer("Farmer_A", "Storage"), _farmer("Farmer_B", "Bed_1")]
+        a = self.assigner.decision_for("Farmer_A", self.board, chars, self.env)
+        b = self.assigner.decision_for("Farmer_B", self.board, chars, self.env)
+        self.assertEqual(a["target_name"], "CultivateChamber_2")
+        self.assertEqual(b["target_name"], "CultivateChamber_1")
+
+    def test_one_solve_per_round(self):
+        chars = [_farmer("Farmer_A", "Storage"), _farmer("Farmer_B", "Bed_1")]
+        with mock.patch.object(self.assigner, "_solve", wraps=self.assigner._solve) as solve:
+            a = self.assigner.decision_for("Farmer_A", self.board, chars, self.env, game_time="Day 1 08:00")
+            # Farmer_A 领到任务后进入忙碌，空闲集合缩小，但仍是同一轮
+            b = self.assigner.decision_for("Farmer_B", self.board, chars, self.env, {"Farmer_A"},
+                                           game_time="Day 1 08:00")
+        self.assertEqual(solve.call_count, 1)
+        self.assertEqual((a["target_name"], b["target_name"]), ("CultivateChamber_2", "CultivateChamber_1"))
+
+    def test_new_round_when_time_advances(self):
+        chars = [_farmer("Farmer_A", "Storage"), _farmer("Farmer_B", "Bed_1")]
+        self.assertEqual(self.assigner.decision_for("Farmer_A", self.board, chars, self.env,
+                                                    game_time="Day 1 08:00")["target_name"], "CultivateChamber_2")
+        # 任务集合与角色名单不变，只是两人交换了位置
+        swapped = [_farmer("Farmer_A", "Bed_1"), _farmer("Farmer_B", "Storage")]
+        self.assertEqual(self.assigner.decision_for("Farmer_A", self.board, swapped, self.env,
+                                                    game_time="Day 1 08:01")["target_name"], "CultivateChamber_1")
+
+    def test_agent_outside_round_starts_new_round(self):
+        chars = [_farmer("Farmer_A", "Storage"), _farmer("Farmer_B", "Bed_1")]
+        with mock.patch.object(self.assigner, "_solve", wraps=self.assigner._solve) as solve:
+            self.assigner.decision_for("Farmer_A", self.board, chars, self.env, {"Farmer_B"}, game_time="Day 1 08:00")
+            b = self.assigner.decision_for("Farmer_B", self.board, chars, self.env, {"Farmer_A"},
+                                           game_time="Day 1 08:00")
+        self.assertEqual(solve.call_count, 2)
+        self.assertIsNotNone(b)
+
+    def test_hungry_agent_left_to_llm(self):
+        chars = [_farmer("Farmer_A", "Storage", hunger=10)]
+        self.assertIsNone(self.assigner.decision_for("Farmer_A", self.board, chars, self.env))
+
+
+if __name__ == "__main__":
+    unittest.main()
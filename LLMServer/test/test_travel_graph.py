@@ -0,0 +1,35 @@
+import unittest
+from travel_graph import TravelGraph
+
+
+def _env(locations, costs=None):
+    env = {"Actors": [{"ActorName": name, "Location": {"X": x, "Y": y, "Z": 0}} for name, (x, y) in locations.items()]}
+    if costs is not None:
+        env["TravelCosts"] = costs
+    return env
+
+
+class TestTravelGraph(unittest.TestCase):
+    def test_costs_from_locations_and_matrix(self):
+        graph = TravelGraph.from_environment(_env({"Storage": (0, 0), "WorkStation": (3, 4)}, {"Storage": {"Stove": 7}}))
+        self.assertEqual(graph.cost("Storage", "WorkStation"), 5.0)
+        self.assertEqual(graph.cost("Stove", "Storage"), 7.0)
+        self.assertIsNone(graph.cost("Storage", "Bed_1"))
+
+    def test_static_graph_overridden_by_request(self):
+        static = TravelGraph.from_init_data({"ActorLocations": {"Storage": {"X": 0, "Y": 0}, "Stove": {"X": 10, "Y": 0}}})
+        graph = TravelGraph.from_environment(_env({"Stove": (1, 0)}), static)
+        self.assertEqual(graph.cost("Storage", "Stove"), 1.0)
+
+    def test_order_stops_minimises_route(self):
+        graph = TravelGraph.from_environment(_env({
+            "Start": (0, 0), "A": (10, 0), "B": (1, 0), "C": (5, 0), "End": (11, 0),
+        }))
+        self.assertEqual(graph.order_stops("Start", ["A", "B", "C"], end="End"), ["B", "C", "A"])
+
+    def test_order_stops_without_costs_keeps_order(self):
+        self.assertEqual(TravelGraph().order_stops("Start", ["A", "B", "C"]), ["A", "B", "C"])
+
+
+if __name__ == "__main__":
+    unittest.main()
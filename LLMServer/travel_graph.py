@@ -0,0 +1,137 @@
+'''
+LLMServer 路径代价模块
+为 Planner 提供设施之间的移动代价，并对多站点行程做路径排序。
+
+代价来源（均为可选，缺省时 Planner 保持原有的按库存数量选择与顺序）：
+- 请求中各 Actor 的 "Location": {"X": .., "Y": .., "Z": ..}，按欧氏距离计算
+- 请求 Environment 中的 "TravelCosts": {"From": {"To": cost}}，显式代价优先于坐标
+- InitGameData.json 中的 "ActorLocations" / "TravelCosts"（与请求同格式），作为静态默认值
+'''
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+
+def _parse_location(raw) -> Optional[Tuple[float, float, float]]:
+    if not isinstance(raw, dict):
+        return None
+    try:
+        return (float(raw.get("X", 0.0)), float(raw.get("Y", 0.0)), float(raw.get("Z", 0.0)))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_costs(raw) -> Dict[Tuple[str, str], float]:
+    costs: Dict[Tuple[str, str], float] = {}
+    if not isinstance(raw, dict):
+        return costs
+    for src, row in raw.items():
+        if not isinstance(row, dict):
+            continue
+        for dst, value in row.items():
+            try:
+                costs[(str(src), str(dst))] = float(value)
+            except (TypeError, ValueError):
+                continue
+    return costs
+
+
+class TravelGraph:
+    def __init__(self, locations: Dict[str, Tuple[float, float, float]] = None,
+                 costs: Dict[Tuple[str, str], float] = None):
+        self.locations = locations or {}
+        self.costs = costs or {}
+        self._fallback_cost: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.locations) or bool(self.costs)
+
+    @classmethod
+    def from_init_data(cls, init_data) -> "TravelGraph":
+        if not isinstance(init_data, dict):
+            return cls()
+        locations = {}
+        for name, raw in (init_data.get("ActorLocations") or {}).items():
+            loc = _parse_location(raw)
+            if loc is not None:
+                locations[str(name)] = loc
+        return cls(locations, _parse_costs(init_data.get("TravelCosts")))
+
+    @classmethod
+    def from_environment(cls, environment, static: Optional["TravelGraph"] = None) -> "TravelGraph":
+        """合并请求中的坐标/代价与静态默认值，请求数据优先"""
+        locations = dict(static.locations) if static else {}
+        costs = dict(static.costs) if static else {}
+        if isinstance(environment, dict):
+            actors = environment.get("Actors", [])
+            for actor in actors if isinstance(actors, list) else []:
+                name = actor.get("ActorName") if isinstance(actor, dict) else None
+                loc = _parse_location(actor.get("Location")) if name else None
+                if loc is not None:
+                    locations[str(name)] = loc
+            costs.update(_parse_costs(environment.get("TravelCosts")))
+        return cls(locations, costs)
+
+    def cost(self, src, dst) -> Optional[float]:
+        """两点间移动代价；同一地点为 0，无法计算时返回 None"""
+        if src == dst:
+            return 0.0
+        explicit = self.costs.get((src, dst))
+        if explicit is None:
+            explicit = self.costs.get((dst, src))
+        if explicit is not None:
+            return explicit
+        a = self.locations.get(src)
+        b = self.locations.get(dst)
+        if a is None or b is None:
+            return None
+        return math.dist(a, b)
+
+    def path_cost(self, stops: List[str]) -> float:
+        return sum(self._known_cost(a, b) for a, b in zip(stops, stops[1:]))
+
+    def _known_cost(self, src, dst) -> float:
+        # 未知代价按最大已知代价估计，避免把未知路段当成捷径
+        value = self.cost(src, dst)
+        if value is not None:
+            return value
+        if self._fallback_cost is None:
+            pts = list(self.locations.values())
+            known = list(self.costs.values())
+            known.extend(math.dist(p, q) for i, p in enumerate(pts) for q in pts[i + 1:])
+            self._fallback_cost = max(known) if known else 0.0
+        return self._fallback_cost
+
+    def order_stops(self, start, stops: List[str], end=None) -> List[str]:
+        """
+        为 start -> stops(任意顺序) -> end 的行程排序：最近邻构造初始解，再用 2-opt 改进。
+        没有任何代价信息时保持原有顺序。
+        """
+        if not self or len(stops) < 2:
+            return list(stops)
+
+        remaining = list(stops)
+        route = []
+        current = start
+        while remaining:
+            nxt = min(remaining, key=lambda s: self._known_cost(current, s))
+            route.append(nxt)
+            remaining.remove(nxt)
+            current = nxt
+
+        def total(r):
+            path = ([start] if start else []) + r + ([end] if end else [])
+            return self.path_cost(path)
+
+        best = total(route)
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(route) - 1):
+                for j in range(i + 1, len(route)):
+                    candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                    cost = total(candidate)
+                    if cost + 1e-9 < best:
+                        route, best = candidate, cost
+                        improved = True
+        return route
@@ -479,6 +479,7 @@ if __name__ == '__main__':
     print(f"[Startup] PRINT_PROMPTS={PRINT_PROMPTS}", flush=True)
 
     port = int(os.getenv('PORT', '5000'))
-    # For development only; in production use a WSGI server (gunicorn/uvicorn)
-    app.run(host='0.0.0.0', port=port, debug=True)
+    debug_flag = os.getenv('RIMSPACE_SERVER_DEBUG', '1').strip().lower() in {'1', 'true', 'yes', 'on'}
+    # For development only; in production use a WSGI server.
+    app.run(host='0.0.0.0', port=port, debug=debug_flag, use_reloader=debug_flag)
 
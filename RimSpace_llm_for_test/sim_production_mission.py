@@ -8,10 +8,9 @@ from datetime import datetime
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
-try:
-    import requests
-except ImportError:  # pragma: no cover - runtime check
-    requests = None
+# HTTP 客户端与 LLMServer 共用同一模块（追加到 sys.path 末尾，不遮蔽本目录的同名模块）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LLMServer"))
+from http_client import PooledHttpClient  # noqa: E402
 
 
 LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "Log")
@@ -520,15 +519,20 @@ def build_default_world() -> Dict:
     }
 
 
+_http_client: Optional[PooledHttpClient] = None
+
+
 def _send_request(server_url: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
-    if requests is None:
-        raise RuntimeError("requests is not installed. Run: pip install requests")
-    kwargs = {"json": payload, "headers": {"Content-Type": "application/json"}}
-    if timeout is not None:
-        kwargs["timeout"] = timeout
-    response = requests.post(server_url, **kwargs)
-    response.raise_for_status()
-    return response.json()
+    global _http_client
+    if _http_client is None:
+        _http_client = PooledHttpClient()
+    return _http_client.post_json(server_url, payload, timeout)
+
+
+def _print_http_timings() -> None:
+    line = _http_client.format_summary() if _http_client is not None else ""
+    if line:
+        print(line, flush=True)
 
 
 def main() -> int:
@@ -721,6 +725,7 @@ def main() -> int:
                     elif user_input == 'q':
                         print("\n" + "=" * 70, flush=True)
                         print("  Simulation Stopped by User", flush=True)
+                        _print_http_timings()
                         print("=" * 70, flush=True)
                         return 0
                     else:
@@ -742,6 +747,7 @@ def main() -> int:
             print(f"  Total Actions: {total_actions}", flush=True)
             print(f"  Failed Actions: {failed_actions} ({fail_rate:.1f}%)", flush=True)
             print(f"  Redundant Move Actions: {redundant_move_actions} ({redundant_rate:.1f}%)", flush=True)
+        _print_http_timings()
         print("=" * 70, flush=True)
         return 0
     
@@ -9,10 +9,9 @@ from datetime import datetime
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
-try:
-    import requests
-except ImportError:  # pragma: no cover - runtime check
-    requests = None
+# HTTP 客户端与 LLMServer 共用同一模块（追加到 sys.path 末尾，不遮蔽本目录的同名模块）
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "LLMServer"))
+from http_client import PooledHttpClient  # noqa: E402
 
 
 LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "Log")
@@ -633,15 +632,20 @@ def is_single_task_completed(world: "SimWorld", single_task: str) -> Tuple[bool,
     return False, "未知单角色任务类型"
 
 
+_http_client: Optional[PooledHttpClient] = None
+
+
 def _send_request(server_url: str, payload: Dict, timeout: Optional[float] = None) -> Dict:
-    if requests is None:
-        raise RuntimeError("requests is not installed. Run: pip install requests")
-    kwargs = {"json": payload, "headers": {"Content-Type": "application/json"}}
-    if timeout is not None:
-        kwargs["timeout"] = timeout
-    response = requests.post(server_url, **kwargs)
-    response.raise_for_status()
-    return response.json()
+    global _http_client
+    if _http_client is None:
+        _http_client = PooledHttpClient()
+    return _http_client.post_json(server_url, payload, timeout)
+
+
+def _print_http_timings() -> None:
+    line = _http_client.format_summary() if _http_client is not None else ""
+    if line:
+        print(line, flush=True)
 
 
 def main() -> int:
@@ -875,6 +879,7 @@ def main() -> int:
                     elif user_input == 'q':
                         print("\n" + "=" * 70, flush=True)
                         print("  Simulation Stopped by User", flush=True)
+                        _print_http_timings()
                         print("=" * 70, flush=True)
                         return 0
                     else:
@@ -905,6 +910,7 @@ def main() -> int:
         print(f"  Total Request Time (send->receive): {total_request_seconds:.3f}s", flush=True)
         print(f"  Avg Request Time (send->receive): {avg_request_seconds:.3f}s", flush=True)
         print(f"  End-to-End Elapsed Time: {simulation_elapsed:.3f}s", flush=True)
+        _print_http_timings()
         print("=" * 70, flush=True)
         return 0
     